@@ -0,0 +1,69 @@
+"""
+Maintenance CLI for the shared on-disk upstream cache.
+
+    python cache_cli.py warm addresses.txt [--concurrency 4]
+    python cache_cli.py stats
+    python cache_cli.py compact
+
+warm runs the same five RentCast lookups as /analyze (with its default comp
+counts, radius and listing limit) for every non-blank line in the file, so
+later /analyze calls for those addresses are served from cache.
+"""
+import argparse
+import asyncio
+import json
+
+from main import DealRequest, analyze_calls, rentcast_fan_out
+from services.disk_cache import get_disk_cache
+from services.http_client import close_client, start_client
+
+
+async def warm(addresses, concurrency: int) -> None:
+    await start_client()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def warm_one(address: str) -> None:
+        async with semaphore:
+            # purchasePrice does not reach RentCast; any positive value works
+            calls = analyze_calls(DealRequest(address=address, purchasePrice=1))
+            results = await rentcast_fan_out(calls)
+            failed = [name for name, res in results.items() if not res["ok"]]
+            cached = sum(1 for res in results.values() if res.get("cached"))
+            print(f"{address}: {len(results) - len(failed)} ok, {cached} already cached"
+                  + (f", failed: {', '.join(failed)}" if failed else ""))
+
+    try:
+        await asyncio.gather(*(warm_one(address) for address in addresses))
+    finally:
+        await close_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Upstream cache maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    warm_parser = sub.add_parser("warm", help="Prefetch RentCast lookups for a list of addresses")
+    warm_parser.add_argument("file", help="Text file with one full address per line")
+    warm_parser.add_argument("--concurrency", type=int, default=4)
+
+    sub.add_parser("stats", help="Print entry counts, size and hit ratio per namespace")
+    sub.add_parser("compact", help="Expire, evict and vacuum now")
+
+    args = parser.parse_args()
+    disk_cache = get_disk_cache()
+    if disk_cache is None:
+        parser.error("UPSTREAM_CACHE_ENABLED is false")
+
+    if args.command == "warm":
+        with open(args.file) as f:
+            addresses = [line.strip() for line in f if line.strip()]
+        asyncio.run(warm(addresses, args.concurrency))
+        disk_cache.flush_stats()
+    elif args.command == "stats":
+        print(json.dumps(disk_cache.stats(), indent=2))
+    elif args.command == "compact":
+        print(json.dumps(disk_cache.compact(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,79 @@
+import asyncio
+import copy
+import csv
+import hmac
+import io
+import logging
+import math
 import os
-from typing import Any, Dict, Optional, List
-
-import requests
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, Optional, List, Literal, Set, Tuple
+
+import httpx
+import orjson
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 
 load_dotenv("backend.env")
 
+from services.bulk_jobs import BulkJob, BulkJobs
+from services.circuit_breaker import CircuitBreaker
+from services.comps import comp_stats
+from services.disk_cache import UPSTREAM_CACHE_COMPACT_INTERVAL, get_disk_cache
+from services.finance import amortization_schedule, effective_debt_cost, schedule_rows, xirr
+from services.financial_batch import METRIC_COLUMNS, column, evaluate_metrics, row_errors, sensitivity_grid
+from services.http_client import close_client, parse_retry_after, request_with_retry, start_client
+from services.irr import cash_flow_matrix, irr_batch, rates_to_percent, sign_changes
+from services.job_queue import JOB_POLL_INTERVAL, JOB_WORKERS, JobContext, JobError, JobWorkers, get_job_store
+from services.land_scoring import rank_records, score_weights
+from services.logging_config import (
+    configure_logging,
+    elapsed_ms,
+    get_logger,
+    request_id_var,
+    sampled_body,
+    stop_logging,
+)
+from services.market_history import get_market_history
+from services.market_stats import MARKET_STATS_FLUSH_INTERVAL, get_market_stats
+from services.metrics import (
+    FUNCTION_LATENCY,
+    HTTP_IN_FLIGHT,
+    HTTP_REQUEST_LATENCY,
+    HTTP_REQUEST_SIZE,
+    HTTP_RESPONSE_SIZE,
+    REGISTRY,
+    UPSTREAM_IN_FLIGHT,
+    UPSTREAM_LATENCY,
+    UPSTREAM_RESPONSE_SIZE,
+    record_cache_stats,
+    timed,
+)
+from services.parcel_index import SORT_COLUMNS as PARCEL_SORT_COLUMNS, get_parcel_index, is_absentee
+from services.rate_limit import UPSTREAM_LIMITERS, RateLimitExceeded
+from services.response_cache import TTLCache, make_cache_key
+from services.responses import (
+    STREAM_HEADERS,
+    STREAM_MEDIA_TYPES,
+    CompressionMiddleware,
+    FastJSONResponse,
+    ndjson_line,
+    raw_json,
+    stream_frame,
+)
+from services.serpapi_search import serpapi_flights
+from services.simulation import get_pool, range_distribution, run_simulation, shutdown_pool
+from services.singleflight import SingleFlight
+
+configure_logging()
+logger = get_logger("api")
+
 RENTCAST_API_KEY = os.getenv("RENTCAST_API_KEY")
 BASE_URL = os.getenv("RENTCAST_BASE_URL", "https://api.rentcast.io/v1")
 
@@ -17,7 +82,167 @@ HEADERS = {
     "Accept": "application/json",
 }
 
-app = FastAPI(title="FlipBot API")
+RENTCAST_TIMEOUT = float(os.getenv("RENTCAST_TIMEOUT", "20"))
+
+# /analyze fans its RentCast calls out concurrently: each call gets its own
+# deadline, and the whole fan-out is capped by an overall request budget.
+ANALYZE_CALL_TIMEOUT = float(os.getenv("ANALYZE_CALL_TIMEOUT", "10"))
+ANALYZE_BUDGET = float(os.getenv("ANALYZE_BUDGET", "15"))
+# With localListingsMaxAgeDays, a listings lookup is answered from the
+# market history when it has at least min(listingLimit, this) listings.
+LOCAL_LISTINGS_MIN = int(os.getenv("LOCAL_LISTINGS_MIN", "5"))
+
+# /search-land/stream walks RentCast /properties pages (RentCast's largest
+# page is 100) with at most this many page requests in flight.
+RENTCAST_PAGE_LIMIT = 100
+LAND_STREAM_CONCURRENCY = int(os.getenv("LAND_STREAM_CONCURRENCY", "4"))
+LAND_STREAM_MAX_RECORDS = int(os.getenv("LAND_STREAM_MAX_RECORDS", "10000"))
+# Zips per /search-land/local query; each stale one is walked upstream.
+PARCEL_QUERY_MAX_ZIPS = int(os.getenv("PARCEL_QUERY_MAX_ZIPS", "10"))
+# How long a zip's median lot size is held in memory for land scoring.
+ZIP_STATS_CACHE_TTL = float(os.getenv("ZIP_STATS_CACHE_TTL", "3600"))
+
+# /analyze/bulk: deals per upload, deals in flight across all jobs, how many
+# RentCast tokens bulk work leaves banked for interactive requests, retries
+# of a deal shed by the rate limiter, and how long finished jobs are kept.
+BULK_ANALYZE_MAX_DEALS = int(os.getenv("BULK_ANALYZE_MAX_DEALS", "5000"))
+BULK_ANALYZE_CONCURRENCY = int(os.getenv("BULK_ANALYZE_CONCURRENCY", "4"))
+BULK_RENTCAST_HEADROOM = float(os.getenv("BULK_RENTCAST_HEADROOM", "10"))
+BULK_ANALYZE_RETRIES = int(os.getenv("BULK_ANALYZE_RETRIES", "2"))
+BULK_MAX_JOBS = int(os.getenv("BULK_MAX_JOBS", "4"))
+BULK_JOB_TTL = float(os.getenv("BULK_JOB_TTL", "3600"))
+
+# Upper bound on scenarios per /financial-metrics/batch call.
+FINANCIAL_BATCH_MAX_ITEMS = int(os.getenv("FINANCIAL_BATCH_MAX_ITEMS", "10000"))
+# Upper bound on grid cells per /financial-metrics/sensitivity call.
+SENSITIVITY_MAX_CELLS = int(os.getenv("SENSITIVITY_MAX_CELLS", "50000"))
+# Upper bound on Monte Carlo paths per /simulate call.
+SIMULATE_MAX_PATHS = int(os.getenv("SIMULATE_MAX_PATHS", "200000"))
+
+# Successful RentCast responses are cached per endpoint. Property records
+# barely change; AVMs drift slowly; listings churn daily. Longest matching
+# path prefix wins.
+RENTCAST_CACHE_TTLS = {
+    "/properties": int(os.getenv("RENTCAST_TTL_PROPERTIES", str(7 * 24 * 3600))),
+    "/avm/": int(os.getenv("RENTCAST_TTL_AVM", str(24 * 3600))),
+    "/listings/": int(os.getenv("RENTCAST_TTL_LISTINGS", str(3600))),
+}
+RENTCAST_CACHE_MAX_BYTES = int(os.getenv("RENTCAST_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RENTCAST_STALE_TTL = int(os.getenv("RENTCAST_STALE_TTL", str(24 * 3600)))
+
+# Per-endpoint circuit breakers: after N consecutive failures/timeouts an
+# endpoint fails fast (serving stale cache where we have it) until a
+# half-open probe succeeds.
+RENTCAST_BREAKER_FAILURES = int(os.getenv("RENTCAST_BREAKER_FAILURES", "5"))
+RENTCAST_BREAKER_RESET = float(os.getenv("RENTCAST_BREAKER_RESET", "30"))
+
+# /metrics and /internal/* need "Authorization: Bearer <this>"; with no
+# token configured they are disabled (404).
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+
+rentcast_cache = TTLCache(max_bytes=RENTCAST_CACHE_MAX_BYTES, stale_ttl=RENTCAST_STALE_TTL)
+rentcast_flights = SingleFlight("rentcast")
+# one upstream walk per zip, however many /search-land/local callers want it
+parcel_cell_flights = SingleFlight("parcel_cells")
+bulk_jobs = BulkJobs(BULK_ANALYZE_CONCURRENCY, ttl=BULK_JOB_TTL, max_jobs=BULK_MAX_JOBS)
+# durable /jobs queue; handlers are registered next to the /jobs endpoints
+job_workers = JobWorkers(get_job_store(), get_pool, JOB_WORKERS, JOB_POLL_INTERVAL)
+# zip medians for land scoring, precomputed in the parcel index
+zip_stats_cache = TTLCache(max_bytes=4 * 1024 * 1024, stale_ttl=0)
+rentcast_breakers: Dict[str, CircuitBreaker] = {}
+
+
+async def compact_disk_cache_periodically():
+    disk_cache = get_disk_cache()
+    if disk_cache is None:
+        return
+    while True:
+        await asyncio.sleep(UPSTREAM_CACHE_COMPACT_INTERVAL)
+        try:
+            result = await asyncio.to_thread(disk_cache.compact)
+            logger.info("upstream cache compacted", extra={"fields": result})
+        except Exception:
+            logger.exception("upstream cache compaction failed")
+
+
+async def flush_market_stats_periodically():
+    market_stats = get_market_stats()
+    if market_stats is None:
+        return
+    while True:
+        try:
+            await asyncio.to_thread(market_stats.flush)
+        except Exception:
+            logger.exception("market stats flush failed")
+        await asyncio.sleep(MARKET_STATS_FLUSH_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging()
+    await start_client()
+    compaction_task = asyncio.create_task(compact_disk_cache_periodically())
+    market_stats_task = asyncio.create_task(flush_market_stats_periodically())
+    job_workers.start()
+    try:
+        yield
+    finally:
+        compaction_task.cancel()
+        market_stats_task.cancel()
+        await job_workers.stop()
+        await bulk_jobs.shutdown()
+        market_stats = get_market_stats()
+        if market_stats is not None:
+            await asyncio.to_thread(market_stats.flush)
+        disk_cache = get_disk_cache()
+        if disk_cache is not None:
+            await asyncio.to_thread(disk_cache.flush_stats)
+        await close_client()
+        shutdown_pool()
+        stop_logging()
+
+
+app = FastAPI(title="FlipBot API", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    """Tag everything logged while serving a request with one correlation ID."""
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    started = time.perf_counter()
+    HTTP_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        logger.info("request", extra={"fields": {
+            "method": request.method,
+            "path": request.url.path,
+            "status": response.status_code,
+            "elapsed_ms": elapsed_ms(started),
+        }})
+        record_request_metrics(request, response, time.perf_counter() - started)
+        return response
+    except Exception:
+        logger.exception("unhandled error", extra={"fields": {"method": request.method, "path": request.url.path}})
+        raise
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        request_id_var.reset(token)
+
+
+def record_request_metrics(request: Request, response: Any, seconds: float) -> None:
+    # Label by route template, not raw path, to keep label cardinality bounded
+    route = request.scope.get("route")
+    route_path = getattr(route, "path", "unmatched")
+    HTTP_REQUEST_LATENCY.observe(seconds, route=route_path, method=request.method, status=response.status_code)
+
+    request_size = request.headers.get("content-length")
+    if request_size and request_size.isdigit():
+        HTTP_REQUEST_SIZE.observe(int(request_size), route=route_path)
+    response_size = response.headers.get("content-length")
+    if response_size and response_size.isdigit():
+        HTTP_RESPONSE_SIZE.observe(int(response_size), route=route_path)
+
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,6 +251,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
 
 
 # ─── Pydantic Models ──────────────────────────────────────────────────────────
@@ -38,6 +264,16 @@ class DealRequest(BaseModel):
     rentCompCount: Optional[int] = Field(default=5, ge=1, le=25)
     listingLimit: Optional[int] = Field(default=10, ge=1, le=50)
     radius: Optional[float] = Field(default=0.5, gt=0, le=100)
+    view: Literal["summary", "standard", "full"] = Field(
+        default="standard",
+        description="summary: deal numbers only; standard: plus compact comps and listings; full: plus raw RentCast bodies",
+    )
+    localListingsMaxAgeDays: Optional[int] = Field(
+        default=None,
+        ge=0,
+        le=90,
+        description="Serve nearby listings from the local market history when it has enough seen within this many days",
+    )
 
 
 class LandSearchRequest(BaseModel):
@@ -52,6 +288,58 @@ class LandSearchRequest(BaseModel):
     offset: Optional[int] = Field(default=0, ge=0)
     includeListings: Optional[bool] = True
     listingLimit: Optional[int] = Field(default=25, ge=1, le=100)
+    scoreResults: Optional[bool] = Field(
+        default=True,
+        description="Attach a motivated-seller score to each compact record (and rank by it where the endpoint returns a list)"
+    )
+    scoreWeights: Optional[Dict[str, float]] = Field(
+        default=None,
+        description="Overrides for services.land_scoring.DEFAULT_SCORE_WEIGHTS"
+    )
+
+
+class LandSearchStreamRequest(LandSearchRequest):
+    # limit is ignored: pages are always RENTCAST_PAGE_LIMIT records
+    maxRecords: int = Field(default=1000, ge=1, le=LAND_STREAM_MAX_RECORDS)
+
+
+class GeoBox(BaseModel):
+    minLat: float = Field(..., ge=-90, le=90)
+    minLon: float = Field(..., ge=-180, le=180)
+    maxLat: float = Field(..., ge=-90, le=90)
+    maxLon: float = Field(..., ge=-180, le=180)
+
+
+class GeoRadius(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    radiusMiles: float = Field(..., gt=0, le=100)
+
+
+class LandIndexQuery(BaseModel):
+    zipCodes: List[str] = Field(..., min_items=1, max_items=PARCEL_QUERY_MAX_ZIPS)
+    minLotSize: Optional[float] = Field(default=None, ge=0)
+    maxLotSize: Optional[float] = Field(default=None, ge=0)
+    minLastSalePrice: Optional[float] = Field(default=None, ge=0)
+    maxLastSalePrice: Optional[float] = Field(default=None, ge=0)
+    lastSaleAfter: Optional[date] = None
+    lastSaleBefore: Optional[date] = None
+    ownerTypes: Optional[List[str]] = None
+    absentee: Optional[bool] = Field(
+        default=None,
+        description="Owner's mailing address differs from the parcel address"
+    )
+    ownerOccupied: Optional[bool] = None
+    bbox: Optional[GeoBox] = None
+    near: Optional[GeoRadius] = None
+    sort: Optional[str] = Field(
+        default=None,
+        description="lotSize, lastSalePrice, lastSaleDate, yearBuilt, squareFootage, score or distance (with near); prefix - for descending"
+    )
+    scoreWeights: Optional[Dict[str, float]] = None
+    limit: int = Field(default=100, ge=1, le=1000)
+    offset: int = Field(default=0, ge=0)
+    refresh: bool = Field(default=False, description="Re-fetch the zips from RentCast even if fresh")
 
 
 class FinancialMetricsRequest(BaseModel):
@@ -103,46 +391,311 @@ class FinancialMetricsRequest(BaseModel):
         description="Marginal tax rate for WACC interest-deductibility adjustment (%) — use 0 for pass-through entities"
     )
 
+    # Loan terms: with interest_rate + loan_amount the cost of debt comes
+    # from the amortization schedule instead of debt service / loan amount
+    interest_rate: Optional[float] = Field(
+        default=None, ge=0, le=100,
+        description="Note rate (%)"
+    )
+    amortization_months: int = Field(default=360, ge=1, le=600)
+    io_months: int = Field(default=0, ge=0, le=600, description="Interest-only months before amortization starts")
+    balloon_month: Optional[int] = Field(default=None, ge=1, le=600, description="Month the remaining balance is due")
+    points: float = Field(default=0.0, ge=0, le=20, description="Origination points (% of loan amount)")
+
+    # XIRR
+    cash_flow_dates: Optional[List[date]] = Field(
+        default=None,
+        description="Dates of the initial investment and each cash flow (len(cash_flows) + 1); adds xirr_percent"
+    )
+
+
+class LoanScheduleRequest(BaseModel):
+    loan_amount: float = Field(..., gt=0)
+    interest_rate: float = Field(..., ge=0, le=100, description="Note rate (%)")
+    amortization_months: int = Field(default=360, ge=1, le=600)
+    io_months: int = Field(default=0, ge=0, le=600)
+    balloon_month: Optional[int] = Field(default=None, ge=1, le=600)
+    points: float = Field(default=0.0, ge=0, le=20)
+    include_schedule: bool = True
+
+
+class FinancialMetricsColumns(BaseModel):
+    """
+    Columnar batch input: one list per FinancialMetricsRequest field, all
+    the same length. Optional columns may be omitted (field default for
+    every row) and may contain nulls.
+    """
+    initial_investment: List[Optional[float]]
+    cash_flows: List[List[float]]
+    net_operating_income: List[Optional[float]]
+    risk_free_rate: Optional[List[Optional[float]]] = None
+    beta: Optional[List[Optional[float]]] = None
+    market_return: Optional[List[Optional[float]]] = None
+    loan_amount: Optional[List[Optional[float]]] = None
+    annual_debt_service: Optional[List[Optional[float]]] = None
+    equity_value: Optional[List[Optional[float]]] = None
+    tax_rate: Optional[List[Optional[float]]] = None
+
+
+class FinancialMetricsBatchRequest(BaseModel):
+    # Exactly one of the two. items are validated one by one so a bad
+    # scenario only fails its own slot; columns skip per-item models.
+    items: Optional[List[Dict[str, Any]]] = None
+    columns: Optional[FinancialMetricsColumns] = None
+
+
+SensitivityDriver = Literal[
+    "hold_months",
+    "vacancy_rate",
+    "expense_rate",
+    "sale_closing_cost_pct",
+    "exit_cap_rate",
+]
+
+
+class SensitivityRange(BaseModel):
+    # Either explicit values, or start/stop/steps (inclusive, evenly spaced).
+    values: Optional[List[float]] = Field(default=None, min_items=1)
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    steps: Optional[int] = Field(default=None, ge=2, le=200)
+
+
+class SensitivityDealSummary(BaseModel):
+    # The /analyze deal_summary can be passed as-is; other keys are ignored.
+    total_basis: float = Field(..., gt=0)
+    estimated_rent: float = Field(..., ge=0)
+    estimated_value: Optional[float] = Field(default=None, ge=0)
+
+
+class FinancialSensitivityRequest(BaseModel):
+    deal_summary: SensitivityDealSummary
+    drivers: Dict[SensitivityDriver, SensitivityRange] = Field(..., min_length=2, max_length=4)
+
+    # Base assumptions for drivers not on the grid (frontend defaults)
+    hold_months: int = Field(default=12, ge=1, le=360)
+    vacancy_rate: float = Field(default=5.0, ge=0, le=100)
+    expense_rate: float = Field(default=35.0, ge=0, le=100)
+    sale_closing_cost_pct: float = Field(default=6.0, ge=0, le=100)
+    exit_cap_rate: Optional[float] = Field(
+        default=None, gt=0, le=100,
+        description="Exit cap rate (%). When set, sale price = NOI / cap rate instead of estimated_value"
+    )
+
+    # Capital stack, as in FinancialMetricsRequest
+    risk_free_rate: float = Field(default=4.5, ge=0)
+    beta: float = Field(default=0.7, ge=0)
+    market_return: float = Field(default=10.0, ge=0)
+    loan_amount: Optional[float] = Field(default=None, ge=0)
+    annual_debt_service: Optional[float] = Field(default=None, ge=0)
+    equity_value: Optional[float] = Field(default=None, ge=0)
+    tax_rate: Optional[float] = Field(default=0.0, ge=0, le=100)
+
+
+class Distribution(BaseModel):
+    """
+    fixed: value · uniform: low, high · triangular: low, mode, high ·
+    normal: mean, std (optionally clipped to low/high)
+    """
+    kind: Literal["fixed", "uniform", "triangular", "normal"] = "fixed"
+    value: Optional[float] = None
+    low: Optional[float] = None
+    mode: Optional[float] = None
+    high: Optional[float] = None
+    mean: Optional[float] = None
+    std: Optional[float] = Field(default=None, ge=0)
+
+
+class EstimateRange(BaseModel):
+    low: Optional[float] = None
+    high: Optional[float] = None
+
+
+class SimulationDealSummary(BaseModel):
+    # The /analyze deal_summary can be passed as-is; other keys are ignored.
+    purchase_price: float = Field(..., gt=0)
+    rehab_budget: float = Field(default=0.0, ge=0)
+    estimated_value: Optional[float] = Field(default=None, gt=0)
+    estimated_value_range: Optional[EstimateRange] = None
+    estimated_rent: Optional[float] = Field(default=None, ge=0)
+    estimated_rent_range: Optional[EstimateRange] = None
+
+
+class SimulationRequest(BaseModel):
+    deal_summary: SimulationDealSummary
+
+    # ARV and rent default to triangular(low, estimate, high) from the
+    # RentCast ranges in deal_summary; pass a distribution to override.
+    value_distribution: Optional[Distribution] = None
+    rent_distribution: Optional[Distribution] = None
+
+    vacancy_rate: Distribution = Field(
+        default_factory=lambda: Distribution(kind="fixed", value=5.0),
+        description="Vacancy (%)"
+    )
+    rehab_overrun_pct: Distribution = Field(
+        default_factory=lambda: Distribution(kind="fixed", value=0.0),
+        description="Rehab cost overrun as % of rehab_budget (negative = under budget)"
+    )
+    hold_months: Distribution = Field(
+        default_factory=lambda: Distribution(kind="fixed", value=12),
+        description="Hold length in months (rounded, clipped to 1–360)"
+    )
+    expense_rate: float = Field(default=35.0, ge=0, le=100)
+    sale_closing_cost_pct: float = Field(default=6.0, ge=0, le=100)
+
+    paths: int = Field(default=10000, ge=100)
+    seed: Optional[int] = Field(default=None, ge=0)
+    parallel: bool = Field(default=False, description="Spread chunks of paths over the process pool")
+    bins: int = Field(default=20, ge=5, le=200)
+    hurdle_irr_percent: Optional[float] = Field(
+        default=None,
+        description="Annualized IRR hurdle (%) for the irr_below_hurdle probability"
+    )
 
 # ─── RentCast helpers ─────────────────────────────────────────────────────────
 
-def rentcast_get(path: str, params: Optional[Dict[str, Any]] = None):
+@timed(FUNCTION_LATENCY, function="rentcast_get")
+async def rentcast_get(
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None,
+    use_cache: bool = True,
+):
     url = f"{BASE_URL}{path}"
+    # requests silently dropped None-valued params; httpx would send them empty
+    if params:
+        params = {k: v for k, v in params.items() if v is not None}
+
+    # use_cache=False always asks RentCast (still through the breaker and
+    # single-flight) and never answers from cache, stale or not; the fresh
+    # result is cached as usual.
+    cache_key = rentcast_cache_key(path, params)
+    if use_cache:
+        cached = await rentcast_cache_lookup(cache_key)
+        if cached is not None:
+            return rentcast_result_copy(cached, cached=True)
+
+    breaker = rentcast_breaker(path)
+    if not breaker.allow():
+        stale = await rentcast_cache_lookup(cache_key, allow_stale=True) if use_cache else None
+        if stale is not None:
+            return rentcast_result_copy(stale, cached=True, stale=True)
+        return {
+            "ok": False,
+            "status_code": 503,
+            "body": {"circuit_open": True, "message": f"RentCast {path} is failing; not calling it for now"},
+            "retry_after": breaker.retry_after(),
+        }
+
+    # Identical concurrent misses share one upstream request; each caller
+    # gets its own copy of the result, body included.
+    result = await rentcast_flights.do(
+        cache_key,
+        lambda: rentcast_fetch(url, path, params, cache_key, timeout),
+    )
 
-    print("\n--- ABOUT TO CALL RENTCAST ---")
-    print("PATH:", path)
-    print("PARAMS:", params)
-    print("API KEY PRESENT:", bool(RENTCAST_API_KEY))
-    print("BASE URL:", BASE_URL)
+    if use_cache and is_rentcast_outage(result):
+        stale = await rentcast_cache_lookup(cache_key, allow_stale=True)
+        if stale is not None:
+            return rentcast_result_copy(stale, cached=True, stale=True)
+    return rentcast_result_copy(result)
 
-    try:
-        response = requests.get(url, headers=HEADERS, params=params, timeout=20)
 
-        print("\n--- RENTCAST REQUEST ---")
-        print("FINAL URL:", response.url)
-        print("STATUS:", response.status_code)
-        print("TEXT:", response.text[:3000])
+def rentcast_result_copy(result: Dict[str, Any], **extra: Any) -> Dict[str, Any]:
+    """
+    A caller's own copy of a cached or shared result: callers may mutate
+    the body, which must not reach the cache entry or other waiters. The
+    body is re-decoded from raw when there is one (cheaper than a deep copy).
+    """
+    raw = result.get("raw")
+    body = orjson.loads(raw) if raw is not None else copy.deepcopy(result["body"])
+    return {**result, "body": body, **extra}
+
+
+async def rentcast_fetch(
+    url: str,
+    path: str,
+    params: Optional[Dict[str, Any]],
+    cache_key: str,
+    timeout: Optional[float],
+) -> Dict[str, Any]:
+    log_fields: Dict[str, Any] = {"upstream": "rentcast", "path": path, "params": params}
+    started = time.perf_counter()
+
+    try:
+        with timed(UPSTREAM_LATENCY, UPSTREAM_IN_FLIGHT, upstream="rentcast", operation=path):
+            response = await request_with_retry(
+                "rentcast",
+                "GET",
+                url,
+                headers=HEADERS,
+                params=params,
+                timeout=timeout if timeout is not None else RENTCAST_TIMEOUT,
+            )
+        UPSTREAM_RESPONSE_SIZE.observe(len(response.content), upstream="rentcast", operation=path)
+
+        breaker = rentcast_breaker(path)
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+        log_fields.update(status=response.status_code, elapsed_ms=elapsed_ms(started), bytes=len(response.content))
+        body_sample = sampled_body(response.content)
+        if body_sample is not None:
+            log_fields["body_sample"] = body_sample
+        logger.log(
+            logging.INFO if response.status_code == 200 else logging.WARNING,
+            "rentcast call",
+            extra={"fields": log_fields},
+        )
 
+        raw: Optional[bytes] = response.content
         try:
             body = response.json()
         except Exception:
             body = {"raw_text": response.text}
+            raw = None
 
         if response.status_code != 200:
             return {
                 "ok": False,
                 "status_code": response.status_code,
                 "body": body,
+                "retry_after": parse_retry_after(response.headers.get("Retry-After")),
             }
 
-        return {
+        # raw keeps the upstream bytes so full views can embed them without
+        # re-encoding (the disk tier stores exactly these bytes); it is set
+        # only when the bytes are JSON (otherwise views fall back to body).
+        result = {
             "ok": True,
             "status_code": response.status_code,
             "body": body,
         }
+        if raw is not None:
+            result["raw"] = raw
+        await rentcast_cache_store(cache_key, path, result, size=len(response.content))
+        observe_market_stats(path, body)
+        return {**result, "cached": False}
+
+    except RateLimitExceeded as exc:
+        logger.warning("rentcast call shed by rate limiter", extra={"fields": {
+            **log_fields, "retry_after": exc.retry_after,
+        }})
+        return {
+            "ok": False,
+            "status_code": 429,
+            "body": {"rate_limited": True, "message": str(exc)},
+            "retry_after": exc.retry_after,
+        }
 
-    except requests.RequestException as exc:
-        print("REQUEST ERROR:", str(exc))
+    except httpx.HTTPError as exc:
+        rentcast_breaker(path).record_failure()
+        logger.warning("rentcast call failed", extra={"fields": {
+            **log_fields, "elapsed_ms": elapsed_ms(started), "error": repr(exc),
+        }})
         return {
             "ok": False,
             "status_code": None,
@@ -150,6 +703,465 @@ def rentcast_get(path: str, params: Optional[Dict[str, Any]] = None):
         }
 
 
+def observe_market_stats(path: str, body: Any) -> None:
+    """Feed a fresh RentCast body into the per-zip market sketches (each upstream response once)."""
+    market_stats = get_market_stats()
+    if market_stats is None:
+        return
+    if path == "/avm/value" and isinstance(body, dict):
+        market_stats.observe_items(body.get("comparables"), "sale_price_per_sqft", "price", "squareFootage")
+        market_stats.observe_items(body.get("comparables"), "days_on_market", "daysOnMarket")
+    elif path == "/avm/rent/long-term" and isinstance(body, dict):
+        market_stats.observe_items(body.get("comparables"), "rent_price_per_sqft", "price", "squareFootage")
+    elif path == "/listings/sale":
+        market_stats.observe_items(body, "sale_price_per_sqft", "price", "squareFootage")
+        market_stats.observe_items(body, "days_on_market", "daysOnMarket")
+    elif path == "/listings/rental/long-term":
+        market_stats.observe_items(body, "rent_price_per_sqft", "price", "squareFootage")
+
+
+def rentcast_breaker(path: str) -> CircuitBreaker:
+    breaker = rentcast_breakers.get(path)
+    if breaker is None:
+        breaker = CircuitBreaker(path, RENTCAST_BREAKER_FAILURES, RENTCAST_BREAKER_RESET)
+        rentcast_breakers[path] = breaker
+    return breaker
+
+
+def is_rentcast_outage(res: Dict[str, Any]) -> bool:
+    """Transport errors and 5xx mean RentCast is unavailable (not that our request was bad)."""
+    status = res["status_code"]
+    return not res["ok"] and (status is None or status >= 500)
+
+
+def raise_rentcast_failure(res: Dict[str, Any], detail: Dict[str, Any]) -> None:
+    """
+    Surface a fatal RentCast failure. Throttling (upstream 429 or our own
+    limiter shedding the call) becomes a 429 and an open circuit a 503, both
+    with Retry-After so clients can back off; anything else keeps the
+    historical 400.
+    """
+    detail = {
+        **detail,
+        "rentcast_status_code": res["status_code"],
+        "rentcast_body": res["body"],
+    }
+    body = res["body"] if isinstance(res["body"], dict) else {}
+    if res["status_code"] == 429 or body.get("circuit_open"):
+        status_code = 429 if res["status_code"] == 429 else 503
+        retry_after = res.get("retry_after")
+        headers = {"Retry-After": str(math.ceil(retry_after))} if retry_after is not None else None
+        raise HTTPException(status_code=status_code, detail=detail, headers=headers)
+    raise HTTPException(status_code=400, detail=detail)
+
+
+def rentcast_cache_key(path: str, params: Optional[Dict[str, Any]]) -> str:
+    """Cache and single-flight key for a RentCast GET (None-valued params dropped)."""
+    return make_cache_key(path, {k: v for k, v in (params or {}).items() if v is not None})
+
+
+def rentcast_disk_key(cache_key: str) -> str:
+    """Disk-tier key: raw upstream bytes, distinct from the JSON envelopes older builds wrote."""
+    return f"{cache_key}:raw"
+
+
+def rentcast_cache_ttl(path: str) -> int:
+    matches = [prefix for prefix in RENTCAST_CACHE_TTLS if path.startswith(prefix)]
+    if not matches:
+        return 0
+    return RENTCAST_CACHE_TTLS[max(matches, key=len)]
+
+
+async def rentcast_cache_lookup(cache_key: str, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Memory tier first, then the shared on-disk tier (which refills memory).
+    allow_stale also returns entries past their TTL, for outage fallback.
+    """
+    cached = rentcast_cache.get_stale(cache_key) if allow_stale else rentcast_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    disk_cache = get_disk_cache()
+    if disk_cache is None:
+        return None
+
+    try:
+        hit = await asyncio.to_thread(disk_cache.get_bytes, rentcast_disk_key(cache_key), "rentcast", allow_stale)
+    except Exception:
+        logger.warning("upstream cache read failed", exc_info=True)
+        return None
+    if hit is None:
+        return None
+
+    raw, expires_at, size = hit
+    result = {"ok": True, "status_code": 200, "body": orjson.loads(raw), "raw": raw}
+    if allow_stale:
+        return result
+    rentcast_cache.set(cache_key, result, ttl=expires_at - time.time(), size=size)
+    return result
+
+
+async def rentcast_cache_store(cache_key: str, path: str, result: Dict[str, Any], size: int) -> None:
+    ttl = rentcast_cache_ttl(path)
+    rentcast_cache.set(cache_key, result, ttl=ttl, size=size)
+
+    # the disk tier keeps the upstream JSON bytes as they came (only 200s are
+    # cached), so a disk hit is parsed once and its raw bytes served as-is;
+    # non-JSON bodies stay in memory only
+    disk_cache = get_disk_cache()
+    if disk_cache is None or result.get("raw") is None:
+        return
+    try:
+        await asyncio.to_thread(disk_cache.set_bytes, rentcast_disk_key(cache_key), result["raw"], ttl, "rentcast")
+    except Exception:
+        logger.warning("upstream cache write failed", exc_info=True)
+
+
+async def rentcast_timed_get(
+    path: str,
+    params: Optional[Dict[str, Any]],
+    deadline: float,
+) -> Dict[str, Any]:
+    """
+    rentcast_get with a hard per-call deadline. A call that overruns is
+    answered from stale cache when possible, otherwise reported like any
+    other transport failure so callers can fail soft.
+    """
+    started = time.perf_counter()
+    try:
+        res = await asyncio.wait_for(rentcast_get(path, params, timeout=deadline), timeout=deadline)
+    except asyncio.TimeoutError:
+        stale = await rentcast_cache_lookup(rentcast_cache_key(path, params), allow_stale=True)
+        if stale is not None:
+            res = rentcast_result_copy(stale, cached=True, stale=True)
+        else:
+            res = {
+                "ok": False,
+                "status_code": None,
+                "body": {"request_error": f"RentCast call exceeded {deadline}s deadline"},
+            }
+    res["elapsed_ms"] = elapsed_ms(started)
+    return res
+
+
+async def rentcast_fan_out(
+    calls: Dict[str, Any],
+    call_timeout: Optional[float] = None,
+    budget: Optional[float] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run several independent RentCast GETs concurrently.
+
+    calls maps a result name to a (path, params) tuple. Every call gets its
+    own deadline (call_timeout) and the fan-out as a whole is bounded by
+    budget; anything still running when the budget runs out is cancelled
+    and reported as a failed call. Each result carries elapsed_ms.
+    """
+    call_timeout = call_timeout if call_timeout is not None else ANALYZE_CALL_TIMEOUT
+    budget = budget if budget is not None else ANALYZE_BUDGET
+
+    started = time.perf_counter()
+    tasks = {
+        name: asyncio.create_task(rentcast_timed_get(path, params, call_timeout))
+        for name, (path, params) in calls.items()
+    }
+    await asyncio.wait(tasks.values(), timeout=budget)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, task in tasks.items():
+        if task.done() and not task.cancelled() and task.exception() is None:
+            results[name] = task.result()
+            continue
+
+        task.cancel()
+        error = "request budget exhausted" if not task.done() else repr(task.exception())
+        results[name] = {
+            "ok": False,
+            "status_code": None,
+            "body": {"request_error": f"RentCast call aborted: {error}"},
+            "elapsed_ms": elapsed_ms(started),
+        }
+
+    return results
+
+
+def analyze_calls(data: DealRequest) -> Dict[str, Any]:
+    """The five independent RentCast lookups behind /analyze, as (path, params)."""
+    full_address = data.address.strip()
+
+    # 1) Property record lookup
+    property_params = {
+        "address": full_address,
+        "limit": 1,
+    }
+
+    # 2) Value estimate + sale comps
+    value_params = {
+        "address": full_address,
+        "compCount": data.arvCompCount,
+    }
+
+    # 3) Rent estimate + rental comps
+    rent_params = {
+        "address": full_address,
+        "compCount": data.rentCompCount,
+    }
+
+    # 4) Sale listings nearby / same address area
+    sale_params = {
+        "address": full_address,
+        "radius": data.radius,
+        "status": "Active",
+        "limit": data.listingLimit,
+    }
+
+    # 5) Rental listings nearby / same address area
+    rental_params = {
+        "address": full_address,
+        "radius": data.radius,
+        "status": "Active",
+        "limit": data.listingLimit,
+    }
+
+    return {
+        "property_records": ("/properties", property_params),
+        "value_estimate": ("/avm/value", value_params),
+        "rent_estimate": ("/avm/rent/long-term", rent_params),
+        "sale_listings": ("/listings/sale", sale_params),
+        "rental_listings": ("/listings/rental/long-term", rental_params),
+    }
+
+
+def land_location_params(data: LandSearchRequest) -> Dict[str, Any]:
+    params: Dict[str, Any] = {
+        "propertyType": "Land",
+        "zipCode": data.zipCode,
+    }
+
+    if data.city:
+        params["city"] = data.city
+
+    if data.state:
+        params["state"] = data.state
+
+    if data.address:
+        params["address"] = data.address
+
+    if data.radius is not None:
+        params["radius"] = data.radius
+
+    return params
+
+
+def land_property_params(data: LandSearchRequest, limit: Optional[int], offset: Optional[int]) -> Dict[str, Any]:
+    """One page of the /properties land search."""
+    params = land_location_params(data)
+    params["limit"] = limit
+    params["offset"] = offset
+
+    if data.minLotSize is not None or data.maxLotSize is not None:
+        min_lot = data.minLotSize if data.minLotSize is not None else ""
+        max_lot = data.maxLotSize if data.maxLotSize is not None else ""
+        params["lotSize"] = f"{min_lot}:{max_lot}"
+
+    return params
+
+
+def land_listing_params(data: LandSearchRequest) -> Dict[str, Any]:
+    params = land_location_params(data)
+    params["status"] = "Active"
+    params["limit"] = data.listingLimit
+    return params
+
+
+def is_whole_zip_search(data: LandSearchRequest) -> bool:
+    """A land search that, walked to the end, returns every parcel in the zip."""
+    return not (
+        data.city or data.state or data.address or data.radius is not None
+        or data.minLotSize is not None or data.maxLotSize is not None or data.offset
+    )
+
+
+async def index_land_records(records: List[Dict[str, Any]]) -> None:
+    """Add fetched compact land records to the parcel index. Indexing never fails a search."""
+    parcel_index = get_parcel_index()
+    if parcel_index is None or not records:
+        return
+    try:
+        await asyncio.to_thread(parcel_index.upsert, records)
+    except Exception:
+        logger.warning("parcel index write failed", exc_info=True)
+
+
+async def mark_land_cell(zip_code: str, walk_started: float) -> None:
+    parcel_index = get_parcel_index()
+    if parcel_index is None:
+        return
+    try:
+        await asyncio.to_thread(parcel_index.mark_cell, zip_code, walk_started)
+    except Exception:
+        logger.warning("parcel index write failed", exc_info=True)
+
+
+async def land_zip_medians(zip_codes: List[str]) -> Dict[str, Optional[float]]:
+    """Median lot size per zip from the parcel index's zip_stats, through a memory cache."""
+    medians: Dict[str, Optional[float]] = {}
+    missing = []
+    for zip_code in set(zip_codes):
+        cached = zip_stats_cache.get(zip_code)
+        if cached is None:
+            missing.append(zip_code)
+        else:
+            medians[zip_code] = cached["median_lot_size"]
+
+    parcel_index = get_parcel_index()
+    if not missing or parcel_index is None:
+        return medians
+    try:
+        found = await asyncio.to_thread(parcel_index.zip_stats, missing)
+    except Exception:
+        logger.warning("parcel index read failed", exc_info=True)
+        return medians
+    for zip_code, stats in found.items():
+        zip_stats_cache.set(zip_code, stats, ttl=ZIP_STATS_CACHE_TTL, size=128)
+        medians[zip_code] = stats["median_lot_size"]
+    return medians
+
+
+async def score_land_records(records: List[Dict[str, Any]], weights: Dict[str, float]) -> List[Dict[str, Any]]:
+    """Records with score/score_features attached, highest score first."""
+    if not records:
+        return records
+    medians = await land_zip_medians([record.get("zipCode") or "" for record in records])
+    return rank_records(records, weights, medians)
+
+
+def land_score_weights(overrides: Optional[Dict[str, float]]) -> Dict[str, float]:
+    try:
+        return score_weights(overrides)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+async def refresh_land_cell(zip_code: str) -> Dict[str, Any]:
+    """
+    Walk every /properties land page of a zip into the parcel index,
+    LAND_STREAM_CONCURRENCY pages at a time. Pages are always fetched
+    from RentCast (the page cache lives as long as a fresh cell, so reading
+    it would just replay the last walk); the params match an unfiltered
+    /search-land/stream walk, which then reads the refreshed pages.
+    """
+    search = LandSearchRequest(zipCode=zip_code)
+    walk_started = time.time()
+    offset = 0
+    while offset < LAND_STREAM_MAX_RECORDS:
+        offsets = range(offset, min(offset + LAND_STREAM_CONCURRENCY * RENTCAST_PAGE_LIMIT, LAND_STREAM_MAX_RECORDS), RENTCAST_PAGE_LIMIT)
+        results = await asyncio.gather(*(
+            rentcast_get("/properties", land_property_params(search, RENTCAST_PAGE_LIMIT, page_offset), use_cache=False)
+            for page_offset in offsets
+        ))
+        for res in results:
+            if not res["ok"]:
+                return {"ok": False, "status_code": res["status_code"], "body": res["body"]}
+
+        pages = [res["body"] if isinstance(res["body"], list) else [] for res in results]
+        await index_land_records([compact_land_record(item) for page in pages for item in page if isinstance(item, dict)])
+        if any(len(page) < RENTCAST_PAGE_LIMIT for page in pages):
+            await mark_land_cell(zip_code, walk_started)
+            return {"ok": True, "complete": True}
+        offset = offsets[-1] + RENTCAST_PAGE_LIMIT
+
+    # more parcels than a walk may fetch: what was indexed is served, but
+    # the zip is never considered fresh
+    return {"ok": True, "complete": False}
+
+
+# /analyze result name -> market history kind
+HISTORY_SOURCES = {
+    "value_estimate": "sale_comp",
+    "rent_estimate": "rental_comp",
+    "sale_listings": "sale_listing",
+    "rental_listings": "rental_listing",
+}
+
+
+async def record_market_history(results: Dict[str, Dict[str, Any]], subject_property: Optional[Dict[str, Any]]) -> None:
+    """
+    Append the comps and listings of fresh lookups (not cached, not local)
+    to the market history, plus the subject so its address can be located
+    later. Recording never fails a request.
+    """
+    observe_subject_yield(results, subject_property)
+    market_history = get_market_history()
+    if market_history is None:
+        return
+    observations = []
+    for name, kind in HISTORY_SOURCES.items():
+        res = results.get(name)
+        if not res or not res["ok"] or res.get("cached") or res.get("local"):
+            continue
+        body = res["body"]
+        items = body.get("comparables") if isinstance(body, dict) else body
+        if isinstance(items, list):
+            observations.extend((kind, item) for item in items)
+    property_res = results.get("property_records")
+    if subject_property and property_res and property_res["ok"] and not property_res.get("cached"):
+        observations.append(("subject", subject_property))
+    if not observations:
+        return
+    try:
+        await asyncio.to_thread(market_history.record, observations)
+    except Exception:
+        logger.warning("market history write failed", exc_info=True)
+
+
+def observe_subject_yield(results: Dict[str, Dict[str, Any]], subject_property: Optional[Dict[str, Any]]) -> None:
+    """A subject's AVM gross yield (rent x 12 / value) for its zip's gross_yield_percent sketch, when both AVMs are fresh."""
+    market_stats = get_market_stats()
+    value_res, rent_res = results.get("value_estimate"), results.get("rent_estimate")
+    if market_stats is None or not subject_property or not value_res or not rent_res:
+        return
+    if value_res.get("cached") or rent_res.get("cached"):
+        return
+    price = (ok_dict_body(value_res) or {}).get("price")
+    rent = (ok_dict_body(rent_res) or {}).get("rent")
+    if isinstance(price, (int, float)) and isinstance(rent, (int, float)) and price > 0:
+        market_stats.observe(subject_property.get("zipCode"), "gross_yield_percent", [rent * 12 / price * 100])
+
+
+async def local_listings(data: DealRequest) -> Dict[str, Dict[str, Any]]:
+    """
+    Listings lookups the market history can answer for this deal, as
+    rentcast_get-shaped results marked local. Needs the address to have
+    been seen before (for its coordinates) and enough listings within
+    data.radius seen in the last localListingsMaxAgeDays days.
+    """
+    market_history = get_market_history()
+    if data.localListingsMaxAgeDays is None or market_history is None:
+        return {}
+    started = time.perf_counter()
+    try:
+        location = await asyncio.to_thread(market_history.locate, data.address.strip())
+        if location is None:
+            return {}
+        found = {
+            name: await asyncio.to_thread(
+                market_history.nearby, kind, location[0], location[1],
+                data.radius, data.localListingsMaxAgeDays, data.listingLimit,
+            )
+            for name, kind in (("sale_listings", "sale_listing"), ("rental_listings", "rental_listing"))
+        }
+    except Exception:
+        logger.warning("market history read failed", exc_info=True)
+        return {}
+    enough = min(data.listingLimit, LOCAL_LISTINGS_MIN)
+    return {
+        name: {"ok": True, "status_code": 200, "body": items, "local": True, "elapsed_ms": elapsed_ms(started)}
+        for name, items in found.items()
+        if len(items) >= enough
+    }
+
+
 def safe_first(items: Any) -> Optional[Dict[str, Any]]:
     if isinstance(items, list) and items:
         first = items[0]
@@ -174,31 +1186,15 @@ def extract_subject_property(
     return record
 
 
-def average_price_per_sqft(comps: Any) -> Optional[float]:
-    if not isinstance(comps, list):
-        return None
-
-    values: List[float] = []
-    for comp in comps:
-        if not isinstance(comp, dict):
-            continue
-        price = comp.get("price")
-        sqft = comp.get("squareFootage")
-        if isinstance(price, (int, float)) and isinstance(sqft, (int, float)) and sqft > 0:
-            values.append(price / sqft)
-
-    if not values:
-        return None
-
-    return round(sum(values) / len(values), 2)
-
-
+@timed(FUNCTION_LATENCY, function="build_deal_summary")
 def build_deal_summary(
     purchase_price: float,
     rehab_budget: float,
     subject_property: Optional[Dict[str, Any]],
     value_estimate: Optional[Dict[str, Any]],
     rent_estimate: Optional[Dict[str, Any]],
+    sale_comps: Any = None,
+    rental_comps: Any = None,
 ) -> Dict[str, Any]:
     arv = value_estimate.get("price") if value_estimate else None
     arv_low = value_estimate.get("priceRangeLow") if value_estimate else None
@@ -225,6 +1221,37 @@ def build_deal_summary(
         annual_gross_rent = est_rent * 12
         cap_rate_gross = round((annual_gross_rent / total_basis) * 100, 2)
 
+    rent_ppsf = None
+    if isinstance(est_rent, (int, float)) and subject_property:
+        sqft = subject_property.get("squareFootage")
+        if isinstance(sqft, (int, float)) and sqft > 0:
+            rent_ppsf = est_rent / sqft
+
+    # the property's AVM gross yield, the same rent x 12 / value the zip's
+    # gross_yield_percent sketch is fed with (observe_subject_yield); the
+    # deal's cap rate on total basis is not comparable with it
+    avm_yield = None
+    if isinstance(est_rent, (int, float)) and isinstance(arv, (int, float)) and arv > 0:
+        avm_yield = est_rent * 12 / arv * 100
+
+    # where this deal sits in its zip's rolling distributions
+    market_stats = get_market_stats()
+    market = None
+    if market_stats is not None:
+        market = market_stats.compare((subject_property or {}).get("zipCode"), {
+            "sale_price_per_sqft": sale_ppsf,
+            "rent_price_per_sqft": rent_ppsf,
+            "gross_yield_percent": avm_yield,
+        })
+
+    # the comps' own view of value, next to the AVM's
+    sale_comp_stats = comp_stats(sale_comps, subject_property)
+    rental_comp_stats = comp_stats(rental_comps, subject_property)
+    comp_arv = sale_comp_stats["estimate"]
+    comp_arv_vs_avm = None
+    if comp_arv and isinstance(arv, (int, float)) and arv > 0:
+        comp_arv_vs_avm = round((comp_arv["value"] - arv) / arv * 100, 2)
+
     return {
         "purchase_price": purchase_price,
         "rehab_budget": rehab_budget,
@@ -244,6 +1271,13 @@ def build_deal_summary(
         "gross_rent_cap_rate_percent": cap_rate_gross,
         "estimated_sale_price_per_sqft": sale_ppsf,
         "gross_monthly_cashflow_before_expenses": gross_monthly_cashflow_before_expenses,
+        "avg_sale_comp_price_per_sqft": sale_comp_stats["mean_price_per_sqft"],
+        "avg_rental_comp_price_per_sqft": rental_comp_stats["mean_price_per_sqft"],
+        "comp_arv": comp_arv,
+        "comp_arv_vs_avm_percent": comp_arv_vs_avm,
+        "sale_comp_stats": sale_comp_stats,
+        "rental_comp_stats": rental_comp_stats,
+        "market": market,
     }
 
 
@@ -251,7 +1285,7 @@ def compact_land_record(item: Dict[str, Any]) -> Dict[str, Any]:
     owner = item.get("owner", {}) or {}
     mailing = owner.get("mailingAddress", {}) or {}
 
-    return {
+    record = {
         "id": item.get("id"),
         "formattedAddress": item.get("formattedAddress"),
         "addressLine1": item.get("addressLine1"),
@@ -269,53 +1303,115 @@ def compact_land_record(item: Dict[str, Any]) -> Dict[str, Any]:
         "ownerNames": owner.get("names"),
         "ownerType": owner.get("type"),
         "mailingAddress": mailing.get("formattedAddress"),
+        "mailingState": mailing.get("state"),
+        "latitude": item.get("latitude"),
+        "longitude": item.get("longitude"),
     }
+    record["absentee"] = is_absentee(record)
+    return record
 
 
-# ─── Financial math helpers ───────────────────────────────────────────────────
-
-def calculate_irr(
-    initial_investment: float,
-    cash_flows: List[float],
-    max_iterations: int = 1000,
-    tolerance: float = 1e-6,
-) -> Optional[float]:
-    """
-    Internal Rate of Return via Newton-Raphson iteration.
+def compact_comp(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": item.get("id"),
+        "formattedAddress": item.get("formattedAddress"),
+        "propertyType": item.get("propertyType"),
+        "bedrooms": item.get("bedrooms"),
+        "bathrooms": item.get("bathrooms"),
+        "squareFootage": item.get("squareFootage"),
+        "yearBuilt": item.get("yearBuilt"),
+        "price": item.get("price"),
+        "listedDate": item.get("listedDate"),
+        "daysOnMarket": item.get("daysOnMarket"),
+        "distance": item.get("distance"),
+        "daysOld": item.get("daysOld"),
+        "correlation": item.get("correlation"),
+    }
 
-    initial_investment should be positive (the total capital outlay); it is
-    negated internally to form t=0 of the cash-flow series.
+
+def compact_listing(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": item.get("id"),
+        "formattedAddress": item.get("formattedAddress"),
+        "propertyType": item.get("propertyType"),
+        "bedrooms": item.get("bedrooms"),
+        "bathrooms": item.get("bathrooms"),
+        "squareFootage": item.get("squareFootage"),
+        "lotSize": item.get("lotSize"),
+        "yearBuilt": item.get("yearBuilt"),
+        "status": item.get("status"),
+        "price": item.get("price"),
+        "listedDate": item.get("listedDate"),
+        "daysOnMarket": item.get("daysOnMarket"),
+    }
+
+
+def compact_estimate(body: Optional[Dict[str, Any]], value_key: str) -> Dict[str, Any]:
+    """An AVM body reduced to the estimate, its range and compact comps (value_key: "price" or "rent")."""
+    body = body or {}
+    comps = body.get("comparables")
+    return {
+        value_key: body.get(value_key),
+        f"{value_key}RangeLow": body.get(f"{value_key}RangeLow"),
+        f"{value_key}RangeHigh": body.get(f"{value_key}RangeHigh"),
+        "comparables": [compact_comp(c) for c in comps if isinstance(c, dict)] if isinstance(comps, list) else [],
+    }
+
+
+def compact_listings(body: Any) -> List[Dict[str, Any]]:
+    if not isinstance(body, list):
+        return []
+    return [compact_listing(item) for item in body if isinstance(item, dict)]
+
+
+def upstream_error(res: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "error": True,
+        "status_code": res["status_code"],
+        "body": res["body"],
+    }
+
+
+# ─── Financial math helpers ───────────────────────────────────────────────────
+
+@timed(FUNCTION_LATENCY, function="calculate_irr")
+def calculate_irr(
+    initial_investment: float,
+    cash_flows: List[float],
+    max_iterations: int = 1000,
+    tolerance: float = 1e-6,
+) -> Optional[float]:
+    """
+    Internal Rate of Return (see services.irr for the bracketed Newton solver).
+
+    initial_investment should be positive (the total capital outlay); it is
+    negated internally to form t=0 of the cash-flow series.
 
     cash_flows is a list of periodic net cash inflows (e.g. monthly hold
     income + net sale proceeds at the end for a flip).
 
     Returns the periodic rate as a percentage. To annualise a monthly IRR:
         annual_irr = (1 + monthly_irr / 100) ** 12 - 1
-    Returns None if the solver does not converge.
+    Returns None if the series has no IRR. When several rates zero the
+    NPV (more than one sign change) the one closest to 0% is returned.
     """
     if not cash_flows:
         return None
+    return calculate_irr_batch([initial_investment], [cash_flows], max_iterations, tolerance)[0]
 
-    flows = [-abs(initial_investment)] + list(cash_flows)
 
-    # Seed near 10% annualised, scaled to the period length
-    rate = 0.1 / len(cash_flows)
-
-    for _ in range(max_iterations):
-        npv = sum(cf / (1 + rate) ** t for t, cf in enumerate(flows))
-        dnpv = sum(-t * cf / (1 + rate) ** (t + 1) for t, cf in enumerate(flows))
-
-        if abs(dnpv) < 1e-12:
-            break  # derivative is flat — cannot continue
-
-        new_rate = rate - npv / dnpv
-
-        if abs(new_rate - rate) < tolerance:
-            return round(new_rate * 100, 4)  # return as percentage
-
-        rate = new_rate
-
-    return None  # did not converge
+@timed(FUNCTION_LATENCY, function="calculate_irr_batch")
+def calculate_irr_batch(
+    initial_investments: List[float],
+    cash_flows: List[List[float]],
+    max_iterations: int = 1000,
+    tolerance: float = 1e-6,
+) -> List[Optional[float]]:
+    """calculate_irr for many series in one vectorized solve; same percent contract per item."""
+    if not cash_flows:
+        return []
+    result = irr_batch(cash_flow_matrix(initial_investments, cash_flows), tolerance, max_iterations)
+    return rates_to_percent(result["rate"], result["converged"])
 
 
 def calculate_cost_of_equity(
@@ -400,198 +1496,657 @@ def calculate_wacc(
 
 # ─── Endpoints ────────────────────────────────────────────────────────────────
 
-@app.post("/analyze")
-def analyze(data: DealRequest):
-    print("\n===================")
-    print("HIT /analyze")
-    print("REQUEST BODY:", data.model_dump())
-    print("===================")
-
-    if not RENTCAST_API_KEY:
-        raise HTTPException(status_code=500, detail="Missing RentCast API Key")
-
-    full_address = data.address.strip()
-    rehab_budget = data.rehabBudget or 0
-
-    # 1) Property record lookup
-    property_params = {
-        "address": full_address,
-        "limit": 1,
-    }
-    property_res = rentcast_get("/properties", property_params)
-
-    if not property_res["ok"]:
-        raise HTTPException(
-            status_code=400,
-            detail={
-                "message": "RentCast property records request failed",
-                "address": full_address,
-                "params_used": property_params,
-                "rentcast_status_code": property_res["status_code"],
-                "rentcast_body": property_res["body"],
-            },
-        )
-
-    property_records = property_res["body"]
-
-    # 2) Value estimate + sale comps
-    value_params = {
-        "address": full_address,
-        "compCount": data.arvCompCount,
-    }
-    value_res = rentcast_get("/avm/value", value_params)
+def ok_dict_body(res: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return res["body"] if res["ok"] and isinstance(res["body"], dict) else None
 
-    # 3) Rent estimate + rental comps
-    rent_params = {
-        "address": full_address,
-        "compCount": data.rentCompCount,
-    }
-    rent_res = rentcast_get("/avm/rent/long-term", rent_params)
-
-    # 4) Sale listings nearby / same address area
-    sale_params = {
-        "address": full_address,
-        "radius": data.radius,
-        "status": "Active",
-        "limit": data.listingLimit,
-    }
-    sale_res = rentcast_get("/listings/sale", sale_params)
 
-    # 5) Rental listings nearby / same address area
-    rental_params = {
-        "address": full_address,
+def analyze_input(data: DealRequest) -> Dict[str, Any]:
+    return {
+        "address": data.address.strip(),
+        "purchasePrice": data.purchasePrice,
+        "rehabBudget": data.rehabBudget or 0,
+        "arvCompCount": data.arvCompCount,
+        "rentCompCount": data.rentCompCount,
+        "listingLimit": data.listingLimit,
         "radius": data.radius,
-        "status": "Active",
-        "limit": data.listingLimit,
+        "view": data.view,
+        "localListingsMaxAgeDays": data.localListingsMaxAgeDays,
     }
-    rental_res = rentcast_get("/listings/rental/long-term", rental_params)
 
-    value_body = value_res["body"] if value_res["ok"] and isinstance(value_res["body"], dict) else None
-    rent_body = rent_res["body"] if rent_res["ok"] and isinstance(rent_res["body"], dict) else None
 
+def analysis_summary(
+    data: DealRequest,
+    property_records: Any,
+    value_body: Optional[Dict[str, Any]],
+    rent_body: Optional[Dict[str, Any]],
+) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """subject_property and deal_summary from the /analyze lookups."""
     subject_property = extract_subject_property(
         property_records=property_records,
         value_estimate=value_body,
         rent_estimate=rent_body,
     )
 
-    sale_comps = value_body.get("comparables", []) if value_body else []
-    rental_comps = rent_body.get("comparables", []) if rent_body else []
-
     deal_summary = build_deal_summary(
         purchase_price=data.purchasePrice,
-        rehab_budget=rehab_budget,
+        rehab_budget=data.rehabBudget or 0,
         subject_property=subject_property,
         value_estimate=value_body or {},
         rent_estimate=rent_body or {},
+        sale_comps=value_body.get("comparables", []) if value_body else [],
+        rental_comps=rent_body.get("comparables", []) if rent_body else [],
     )
+    return subject_property, deal_summary
 
-    deal_summary["avg_sale_comp_price_per_sqft"] = average_price_per_sqft(sale_comps)
-    deal_summary["avg_rental_comp_price_per_sqft"] = average_price_per_sqft(rental_comps)
 
-    return {
-        "input": {
+@app.post("/analyze")
+async def analyze(data: DealRequest):
+    logger.debug("/analyze request", extra={"fields": {"body": data.model_dump()}})
+
+    if not RENTCAST_API_KEY:
+        raise HTTPException(status_code=500, detail="Missing RentCast API Key")
+
+    full_address = data.address.strip()
+
+    calls = analyze_calls(data)
+    property_params = calls["property_records"][1]
+    value_params = calls["value_estimate"][1]
+    rent_params = calls["rent_estimate"][1]
+    sale_params = calls["sale_listings"][1]
+    rental_params = calls["rental_listings"][1]
+
+    started = time.perf_counter()
+    local = await local_listings(data)
+    results = await rentcast_fan_out({name: call for name, call in calls.items() if name not in local})
+    results.update(local)
+    timings_ms = {name: res["elapsed_ms"] for name, res in results.items()}
+    timings_ms["total"] = elapsed_ms(started)
+    stale_sources = [name for name, res in results.items() if res.get("stale")]
+
+    property_res = results["property_records"]
+    value_res = results["value_estimate"]
+    rent_res = results["rent_estimate"]
+    sale_res = results["sale_listings"]
+    rental_res = results["rental_listings"]
+
+    if not property_res["ok"]:
+        raise_rentcast_failure(property_res, {
+            "message": "RentCast property records request failed",
             "address": full_address,
-            "purchasePrice": data.purchasePrice,
-            "rehabBudget": rehab_budget,
-            "arvCompCount": data.arvCompCount,
-            "rentCompCount": data.rentCompCount,
-            "listingLimit": data.listingLimit,
-            "radius": data.radius,
-        },
+            "params_used": property_params,
+        })
+
+    property_records = property_res["body"]
+    value_body = ok_dict_body(value_res)
+    rent_body = ok_dict_body(rent_res)
+    subject_property, deal_summary = analysis_summary(data, property_records, value_body, rent_body)
+    await record_market_history(results, subject_property)
+
+    response: Dict[str, Any] = {
+        "input": analyze_input(data),
         "subject_property": subject_property,
         "deal_summary": deal_summary,
+        "timings_ms": timings_ms,
+        "stale": bool(stale_sources),
+        "stale_sources": stale_sources,
+        "local_sources": sorted(local),
+    }
+
+    if data.view == "summary":
+        return FastJSONResponse(response)
+
+    if data.view == "standard":
+        response.update({
+            "value_estimate": {
+                "response": compact_estimate(value_body, "price") if value_res["ok"] else upstream_error(value_res),
+            },
+            "rent_estimate": {
+                "response": compact_estimate(rent_body, "rent") if rent_res["ok"] else upstream_error(rent_res),
+            },
+            "sale_listings": {
+                "response": compact_listings(sale_res["body"]) if sale_res["ok"] else upstream_error(sale_res),
+            },
+            "rental_listings": {
+                "response": compact_listings(rental_res["body"]) if rental_res["ok"] else upstream_error(rental_res),
+            },
+        })
+        return FastJSONResponse(response)
+
+    # Raw upstream bodies are embedded as the bytes RentCast sent (or the
+    # cache kept), not decoded and re-encoded.
+    response.update({
         "property_records": {
             "params_used": property_params,
-            "response": property_records,
+            "response": raw_json(property_res.get("raw"), property_records),
         },
         "value_estimate": {
             "params_used": value_params,
-            "response": value_body if value_res["ok"] else {
-                "error": True,
-                "status_code": value_res["status_code"],
-                "body": value_res["body"],
-            },
+            "response": raw_json(value_res.get("raw"), value_body) if value_res["ok"] else upstream_error(value_res),
         },
         "rent_estimate": {
             "params_used": rent_params,
-            "response": rent_body if rent_res["ok"] else {
-                "error": True,
-                "status_code": rent_res["status_code"],
-                "body": rent_res["body"],
-            },
+            "response": raw_json(rent_res.get("raw"), rent_body) if rent_res["ok"] else upstream_error(rent_res),
         },
         "sale_listings": {
             "params_used": sale_params,
-            "response": sale_res["body"] if sale_res["ok"] else {
-                "error": True,
-                "status_code": sale_res["status_code"],
-                "body": sale_res["body"],
-            },
+            "response": raw_json(sale_res.get("raw"), sale_res["body"]) if sale_res["ok"] else upstream_error(sale_res),
         },
         "rental_listings": {
             "params_used": rental_params,
-            "response": rental_res["body"] if rental_res["ok"] else {
-                "error": True,
-                "status_code": rental_res["status_code"],
-                "body": rental_res["body"],
-            },
+            "response": raw_json(rental_res.get("raw"), rental_res["body"]) if rental_res["ok"] else upstream_error(rental_res),
         },
-    }
+    })
+    return FastJSONResponse(response)
 
 
-@app.post("/search-land")
-def search_land(data: LandSearchRequest):
-    print("\n===================")
-    print("HIT /search-land")
-    print("REQUEST BODY:", data.model_dump())
-    print("===================")
+# Cleanup tasks of abandoned streams, referenced until they finish.
+stream_cleanups: Set["asyncio.Task[None]"] = set()
+
+
+async def wait_for_disconnect(request: Request) -> None:
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def release_upstream(unfinished: List["asyncio.Task[Any]"], keys: List[str]) -> int:
+    """Let a stream's cancelled lookups unwind, then drop the shared upstream calls nobody wants."""
+    await asyncio.gather(*unfinished, return_exceptions=True)
+    return rentcast_flights.cancel_abandoned(keys)
+
+
+def watch_disconnect(request: Request, on_disconnect: Callable[[], None]) -> "asyncio.Task[None]":
+    """
+    Watch a streaming request for http.disconnect. The server only notices a
+    dropped connection on the next write, and that write can stall, so
+    on_disconnect runs from the watcher itself rather than from the stream.
+    """
+    watcher = asyncio.create_task(wait_for_disconnect(request))
+    watcher.add_done_callback(lambda task: task.cancelled() or on_disconnect())
+    return watcher
+
+
+def run_stream_cleanup(cleanup: Awaitable[None]) -> None:
+    # The generator may itself be closing under cancellation, so the
+    # cleanup runs as its own task.
+    task = asyncio.ensure_future(cleanup)
+    stream_cleanups.add(task)
+    task.add_done_callback(stream_cleanups.discard)
+
+
+def analyze_stage_payload(name: str, res: Dict[str, Any], view: str) -> Dict[str, Any]:
+    """One /analyze/stream stage event: status plus the section /analyze would return for this view."""
+    payload: Dict[str, Any] = {
+        "ok": res["ok"],
+        "cached": bool(res.get("cached")),
+        "stale": bool(res.get("stale")),
+        "local": bool(res.get("local")),
+        "elapsed_ms": res.get("elapsed_ms"),
+    }
+    if view == "summary":
+        return payload
+    if not res["ok"]:
+        payload["response"] = upstream_error(res)
+    elif view == "full":
+        payload["response"] = raw_json(res.get("raw"), res["body"])
+    elif name == "property_records":
+        payload["subject_property"] = extract_subject_property(res["body"], None, None)
+    elif name == "value_estimate":
+        payload["response"] = compact_estimate(ok_dict_body(res), "price")
+    elif name == "rent_estimate":
+        payload["response"] = compact_estimate(ok_dict_body(res), "rent")
+    else:
+        payload["response"] = compact_listings(res["body"])
+    return payload
+
+
+@app.post("/analyze/stream")
+async def analyze_stream(
+    data: DealRequest,
+    request: Request,
+    stream_format: Literal["sse", "ndjson"] = Query(default="sse", alias="format"),
+):
+    """
+    /analyze, delivered progressively. Events, in completion order:
+
+        property_records, value_estimate, rent_estimate, sale_listings,
+        rental_listings   one per RentCast lookup as soon as it lands
+                          (compact sections, raw bodies for view=full)
+        deal_summary      subject_property + deal_summary + timings
+        error             property lookup failed; the stream ends
+        done
+
+    format=sse (default) sends Server-Sent Events, format=ndjson one
+    {"event", "data"} object per line. If the client disconnects, the
+    outstanding lookups are cancelled, including the shared upstream
+    requests nobody else is waiting on.
+    """
+    logger.debug("/analyze/stream request", extra={"fields": {"body": data.model_dump()}})
 
     if not RENTCAST_API_KEY:
         raise HTTPException(status_code=500, detail="Missing RentCast API Key")
 
-    if data.maxLotSize is not None and data.minLotSize is not None and data.maxLotSize < data.minLotSize:
-        raise HTTPException(status_code=400, detail="maxLotSize must be greater than or equal to minLotSize")
+    local = await local_listings(data)
+    calls = {name: call for name, call in analyze_calls(data).items() if name not in local}
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def property_failure() -> bytes:
+        res = results["property_records"]
+        return stream_frame(stream_format, "error", {
+            "message": "RentCast property records request failed",
+            "status_code": res["status_code"],
+            "body": res["body"],
+        })
+
+    async def events():
+        started = time.perf_counter()
+        tasks = {
+            asyncio.create_task(rentcast_timed_get(path, params, ANALYZE_CALL_TIMEOUT)): name
+            for name, (path, params) in calls.items()
+        }
+        released = False
+
+        def release(finished: bool) -> None:
+            nonlocal released
+            if released:
+                return
+            released = True
+            unfinished = [task for task in tasks if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            if unfinished or not finished:
+                run_stream_cleanup(release_abandoned(unfinished, finished))
+
+        disconnected = watch_disconnect(request, lambda: release(finished=False))
+        finished = False
+        try:
+            for name, res in local.items():
+                results[name] = res
+                yield stream_frame(stream_format, name, analyze_stage_payload(name, res, data.view))
+
+            pending = set(tasks)
+            while pending:
+                remaining = ANALYZE_BUDGET - (time.perf_counter() - started)
+                done, pending = await asyncio.wait(
+                    pending | {disconnected}, timeout=max(remaining, 0), return_when=asyncio.FIRST_COMPLETED,
+                )
+                pending.discard(disconnected)
+                if disconnected in done:
+                    return
+                if not done:
+                    break
+                for task in done:
+                    name = tasks[task]
+                    if task.exception() is not None:
+                        results[name] = {
+                            "ok": False,
+                            "status_code": None,
+                            "body": {"request_error": f"RentCast call aborted: {task.exception()!r}"},
+                            "elapsed_ms": elapsed_ms(started),
+                        }
+                    else:
+                        results[name] = task.result()
+                    yield stream_frame(stream_format, name, analyze_stage_payload(name, results[name], data.view))
+
+                if "property_records" in results and not results["property_records"]["ok"]:
+                    yield property_failure()
+                    finished = True
+                    return
+
+            for task in pending:
+                name = tasks[task]
+                results[name] = {
+                    "ok": False,
+                    "status_code": None,
+                    "body": {"request_error": "RentCast call aborted: request budget exhausted"},
+                    "elapsed_ms": elapsed_ms(started),
+                }
+                yield stream_frame(stream_format, name, analyze_stage_payload(name, results[name], data.view))
+
+            property_res = results["property_records"]
+            if not property_res["ok"]:
+                yield property_failure()
+                finished = True
+                return
+
+            subject_property, deal_summary = analysis_summary(
+                data, property_res["body"], ok_dict_body(results["value_estimate"]), ok_dict_body(results["rent_estimate"]),
+            )
+            await record_market_history(results, subject_property)
+            timings_ms = {name: res.get("elapsed_ms") for name, res in results.items()}
+            timings_ms["total"] = elapsed_ms(started)
+            stale_sources = [name for name, res in results.items() if res.get("stale")]
+            yield stream_frame(stream_format, "deal_summary", {
+                "input": analyze_input(data),
+                "subject_property": subject_property,
+                "deal_summary": deal_summary,
+                "timings_ms": timings_ms,
+                "stale": bool(stale_sources),
+                "stale_sources": stale_sources,
+                "local_sources": sorted(local),
+            })
+            yield stream_frame(stream_format, "done", {"elapsed_ms": elapsed_ms(started)})
+            finished = True
+        finally:
+            disconnected.cancel()
+            release(finished)
+
+    async def release_abandoned(unfinished: List["asyncio.Task[Any]"], finished: bool) -> None:
+        abandoned = await release_upstream(
+            unfinished, [rentcast_cache_key(path, params) for path, params in calls.values()],
+        )
+        if not finished:
+            logger.info("analyze stream abandoned by client", extra={"fields": {
+                "address": data.address.strip(),
+                "stages_sent": len(results),
+                "upstream_cancelled": abandoned,
+            }})
+
+    return StreamingResponse(events(), media_type=STREAM_MEDIA_TYPES[stream_format], headers=STREAM_HEADERS)
+
+
+# The lookups a bulk row needs: deal_summary does not use the listings.
+BULK_ANALYZE_CALLS = ("property_records", "value_estimate", "rent_estimate")
+
+BULK_CSV_COLUMNS = (
+    "index", "ok", "address", "purchase_price", "rehab_budget", "total_basis",
+    "estimated_value", "estimated_value_low", "estimated_value_high",
+    "estimated_rent", "estimated_rent_low", "estimated_rent_high",
+    "spread_to_arv", "mao_70_rule", "gross_rent_cap_rate_percent",
+    "estimated_sale_price_per_sqft", "avg_sale_comp_price_per_sqft",
+    "comp_arv", "comp_arv_low", "comp_arv_high", "comp_arv_vs_avm_percent", "stale", "error",
+)
 
-    property_params: Dict[str, Any] = {
-        "propertyType": "Land",
-        "zipCode": data.zipCode,
-        "limit": data.limit,
-        "offset": data.offset,
-    }
 
-    if data.city:
-        property_params["city"] = data.city
+def bulk_deals_from_csv(body: bytes) -> List[Dict[str, Any]]:
+    """CSV rows (header = DealRequest field names) as dicts; empty cells take the defaults."""
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8")
+    return [
+        {key.strip(): value.strip() for key, value in row.items() if key and value is not None and value.strip()}
+        for row in csv.DictReader(io.StringIO(text))
+    ]
+
+
+def validate_bulk_deals(items: List[Any]) -> List[Any]:
+    """DealRequest per valid item; invalid ones become their field errors."""
+    deals: List[Any] = []
+    for item in items:
+        try:
+            deals.append(DealRequest.model_validate(item))
+        except ValidationError as exc:
+            deals.append([
+                {"field": ".".join(str(part) for part in err["loc"]), "msg": err["msg"]}
+                for err in exc.errors()
+            ])
+    return deals
+
+
+async def analyze_bulk_deal(index: int, deal: Any) -> Dict[str, Any]:
+    """One bulk row: the /analyze summary view, retried when the rate limiter sheds it."""
+    if not isinstance(deal, DealRequest):
+        return {"index": index, "ok": False, "errors": deal}
+
+    calls = analyze_calls(deal)
+    calls = {name: calls[name] for name in BULK_ANALYZE_CALLS}
+    for attempt in range(BULK_ANALYZE_RETRIES + 1):
+        results = await rentcast_fan_out(calls)
+        shed = [res for res in results.values() if res.get("status_code") == 429]
+        if not shed or attempt == BULK_ANALYZE_RETRIES:
+            break
+        await asyncio.sleep(max(res.get("retry_after") or 1.0 for res in shed))
+
+    row: Dict[str, Any] = {
+        "index": index,
+        "address": deal.address.strip(),
+        "purchasePrice": deal.purchasePrice,
+        "stale": any(res.get("stale") for res in results.values()),
+    }
+    property_res = results["property_records"]
+    if not property_res["ok"]:
+        return {**row, "ok": False, "error": upstream_error(property_res)}
 
-    if data.state:
-        property_params["state"] = data.state
+    subject_property, deal_summary = analysis_summary(
+        deal, property_res["body"], ok_dict_body(results["value_estimate"]), ok_dict_body(results["rent_estimate"]),
+    )
+    await record_market_history(results, subject_property)
+    return {**row, "ok": True, "subject_property": subject_property, "deal_summary": deal_summary}
+
+
+async def bulk_rentcast_headroom() -> float:
+    """Hold a bulk deal until the RentCast bucket has BULK_RENTCAST_HEADROOM tokens to spare."""
+    return await UPSTREAM_LIMITERS["rentcast"].wait_for_headroom(BULK_RENTCAST_HEADROOM)
+
+
+def bulk_csv_row(row: Dict[str, Any]) -> List[Any]:
+    summary = row.get("deal_summary") or {}
+    value_range = summary.get("estimated_value_range") or {}
+    rent_range = summary.get("estimated_rent_range") or {}
+    comp_arv = summary.get("comp_arv") or {}
+    error = row.get("error") or row.get("errors")
+    flat = {
+        **summary,
+        "index": row["index"],
+        "ok": row["ok"],
+        "address": row.get("address"),
+        "purchase_price": summary.get("purchase_price", row.get("purchasePrice")),
+        "estimated_value_low": value_range.get("low"),
+        "estimated_value_high": value_range.get("high"),
+        "estimated_rent_low": rent_range.get("low"),
+        "estimated_rent_high": rent_range.get("high"),
+        "comp_arv": comp_arv.get("value"),
+        "comp_arv_low": comp_arv.get("low"),
+        "comp_arv_high": comp_arv.get("high"),
+        "stale": row.get("stale"),
+        "error": orjson.dumps(error).decode() if error else None,
+    }
+    return [flat.get(name) for name in BULK_CSV_COLUMNS]
 
-    if data.address:
-        property_params["address"] = data.address
 
-    if data.radius is not None:
-        property_params["radius"] = data.radius
+def get_bulk_job(job_id: str) -> BulkJob:
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
 
-    if data.minLotSize is not None or data.maxLotSize is not None:
-        min_lot = data.minLotSize if data.minLotSize is not None else ""
-        max_lot = data.maxLotSize if data.maxLotSize is not None else ""
-        property_params["lotSize"] = f"{min_lot}:{max_lot}"
 
-    property_res = rentcast_get("/properties", property_params)
+@app.post("/analyze/bulk", status_code=202)
+async def analyze_bulk(request: Request):
+    """
+    Run a portfolio of deals through /analyze's summary in the background.
+
+    Body: {"deals": [DealRequest, ...]} as JSON, or a CSV (Content-Type
+    text/csv) with DealRequest field names as the header. Invalid rows are
+    reported as failed results rather than rejecting the upload.
+
+    Deals from every job share BULK_ANALYZE_CONCURRENCY slots and wait for
+    BULK_RENTCAST_HEADROOM tokens in the RentCast bucket before calling it,
+    so interactive requests keep priority. Lookups go through the shared
+    cache and single-flight, so repeat addresses (across jobs too) cost
+    one upstream call. Poll GET /analyze/bulk/{job_id}; read rows from
+    /analyze/bulk/{job_id}/results.
+    """
+    if not RENTCAST_API_KEY:
+        raise HTTPException(status_code=500, detail="Missing RentCast API Key")
 
-    if not property_res["ok"]:
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith("text/csv"):
+        items = bulk_deals_from_csv(body)
+    else:
+        try:
+            payload = orjson.loads(body)
+        except orjson.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Body must be JSON {\"deals\": [...]} or text/csv")
+        items = payload.get("deals") if isinstance(payload, dict) else None
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Body must be JSON {\"deals\": [...]} or text/csv")
+
+    if not items:
+        raise HTTPException(status_code=400, detail="No deals to analyze")
+    if len(items) > BULK_ANALYZE_MAX_DEALS:
         raise HTTPException(
             status_code=400,
-            detail={
-                "message": "RentCast land search failed",
-                "params_used": property_params,
-                "rentcast_status_code": property_res["status_code"],
-                "rentcast_body": property_res["body"],
-            },
+            detail=f"Too many deals: {len(items)} (max {BULK_ANALYZE_MAX_DEALS})",
         )
 
+    deals = validate_bulk_deals(items)
+    invalid = sum(not isinstance(deal, DealRequest) for deal in deals)
+    try:
+        job = bulk_jobs.submit("analyze", deals, analyze_bulk_deal, before_item=bulk_rentcast_headroom)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=429, detail=str(exc))
+
+    logger.info("bulk analyze job started", extra={"fields": {
+        "job_id": job.id, "deals": len(deals), "invalid": invalid,
+    }})
+    return FastJSONResponse(
+        {
+            **job.progress(),
+            "invalid": invalid,
+            "status_url": f"/analyze/bulk/{job.id}",
+            "results_url": f"/analyze/bulk/{job.id}/results",
+        },
+        status_code=202,
+    )
+
+
+@app.get("/analyze/bulk/{job_id}")
+async def analyze_bulk_status(job_id: str):
+    return FastJSONResponse(get_bulk_job(job_id).progress())
+
+
+@app.get("/analyze/bulk/{job_id}/results")
+async def analyze_bulk_results(
+    job_id: str,
+    result_format: Literal["ndjson", "csv"] = Query(default="ndjson", alias="format"),
+    follow: bool = Query(default=True, description="Keep the stream open until the job finishes"),
+    start: int = Query(default=0, ge=0, description="Skip this many rows (resume a dropped stream)"),
+):
+    """
+    Result rows in completion order (each carries the deal's input index):
+    NDJSON objects, or CSV with BULK_CSV_COLUMNS. With follow (default)
+    the stream stays open and rows are sent as deals finish.
+    """
+    job = get_bulk_job(job_id)
+
+    async def rows():
+        if follow:
+            async for row in job.follow(start):
+                yield row
+        else:
+            for row in job.results[start:]:
+                yield row
+
+    async def ndjson():
+        async for row in rows():
+            yield ndjson_line(row)
+
+    async def csv_lines():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if start == 0:
+            writer.writerow(BULK_CSV_COLUMNS)
+        async for row in rows():
+            writer.writerow(bulk_csv_row(row))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    if result_format == "csv":
+        return StreamingResponse(
+            csv_lines(),
+            media_type="text/csv",
+            headers={**STREAM_HEADERS, "Content-Disposition": f'attachment; filename="analyze-{job.id}.csv"'},
+        )
+    return StreamingResponse(ndjson(), media_type=STREAM_MEDIA_TYPES["ndjson"], headers=STREAM_HEADERS)
+
+
+@app.delete("/analyze/bulk/{job_id}")
+async def analyze_bulk_cancel(job_id: str):
+    job = get_bulk_job(job_id)
+    bulk_jobs.cancel(job_id)
+    if job.task is not None:
+        await asyncio.gather(job.task, return_exceptions=True)
+    return FastJSONResponse(job.progress())
+
+
+def require_market_history():
+    market_history = get_market_history()
+    if market_history is None:
+        raise HTTPException(status_code=503, detail="Market history is disabled")
+    return market_history
+
+
+@app.get("/market-stats/{zip_code}")
+def market_stats_zip(zip_code: str):
+    """Rolling median and quartiles per metric for a zip, from the sketches (None where nothing was seen)."""
+    market_stats = get_market_stats()
+    if market_stats is None:
+        raise HTTPException(status_code=503, detail="Market stats are disabled")
+    return FastJSONResponse({"zip_code": zip_code, **market_stats.zip_summary(zip_code)})
+
+
+@app.get("/market-history/nearby")
+async def market_history_nearby(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    radius: float = Query(default=0.5, gt=0, le=25),
+    kind: Literal["sale_comp", "rental_comp", "sale_listing", "rental_listing"] = "sale_listing",
+    maxAgeDays: int = Query(default=30, ge=0, le=365),
+    limit: int = Query(default=50, ge=1, le=500),
+):
+    """
+    Comps or listings recorded from earlier RentCast lookups near a point,
+    latest observation per property, nearest first. No upstream calls.
+    """
+    market_history = require_market_history()
+    records = await asyncio.to_thread(
+        market_history.nearby, kind, latitude, longitude, radius, maxAgeDays, limit,
+    )
+    return FastJSONResponse({"count": len(records), "records": records})
+
+
+@app.get("/market-history/{property_id}")
+async def market_history_property(property_id: str):
+    """Every recorded sighting of a property, oldest first, with price and days-on-market changes."""
+    market_history = require_market_history()
+    observations = await asyncio.to_thread(market_history.history, property_id)
+    if not observations:
+        raise HTTPException(status_code=404, detail="No observations for this property")
+    return FastJSONResponse({"id": property_id, "observations": observations})
+
+
+@app.post("/search-land")
+async def search_land(data: LandSearchRequest):
+    logger.debug("/search-land request", extra={"fields": {"body": data.model_dump()}})
+
+    if not RENTCAST_API_KEY:
+        raise HTTPException(status_code=500, detail="Missing RentCast API Key")
+
+    if data.maxLotSize is not None and data.minLotSize is not None and data.maxLotSize < data.minLotSize:
+        raise HTTPException(status_code=400, detail="maxLotSize must be greater than or equal to minLotSize")
+
+    weights = land_score_weights(data.scoreWeights) if data.scoreResults else None
+    property_params = land_property_params(data, data.limit, data.offset)
+
+    property_res = await rentcast_get("/properties", property_params)
+
+    if not property_res["ok"]:
+        raise_rentcast_failure(property_res, {
+            "message": "RentCast land search failed",
+            "params_used": property_params,
+        })
+
     property_body = property_res["body"]
     land_records = property_body if isinstance(property_body, list) else []
+    stale = bool(property_res.get("stale"))
+    compact_records = [compact_land_record(item) for item in land_records if isinstance(item, dict)]
+    await index_land_records(compact_records)
+    if weights is not None:
+        compact_records = await score_land_records(compact_records, weights)
 
     listings_output: Dict[str, Any] = {
         "params_used": None,
@@ -599,38 +2154,18 @@ def search_land(data: LandSearchRequest):
     }
 
     if data.includeListings:
-        listing_params: Dict[str, Any] = {
-            "propertyType": "Land",
-            "zipCode": data.zipCode,
-            "status": "Active",
-            "limit": data.listingLimit,
-        }
-
-        if data.city:
-            listing_params["city"] = data.city
-
-        if data.state:
-            listing_params["state"] = data.state
-
-        if data.address:
-            listing_params["address"] = data.address
-
-        if data.radius is not None:
-            listing_params["radius"] = data.radius
-
-        listing_res = rentcast_get("/listings/sale", listing_params)
+        listing_params = land_listing_params(data)
+        listing_res = await rentcast_get("/listings/sale", listing_params)
+        stale = stale or bool(listing_res.get("stale"))
 
         listings_output = {
             "params_used": listing_params,
-            "response": listing_res["body"] if listing_res["ok"] else {
-                "error": True,
-                "status_code": listing_res["status_code"],
-                "body": listing_res["body"],
-            },
+            "response": raw_json(listing_res.get("raw"), listing_res["body"]) if listing_res["ok"] else upstream_error(listing_res),
         }
 
-    return {
+    return FastJSONResponse({
         "input": data.model_dump(),
+        "stale": stale,
         "search_summary": {
             "records_found": len(land_records),
             "zipCode": data.zipCode,
@@ -640,11 +2175,284 @@ def search_land(data: LandSearchRequest):
         "land_records": {
             "params_used": property_params,
             "count": len(land_records),
-            "response": land_records,
-            "compact": [compact_land_record(item) for item in land_records if isinstance(item, dict)],
+            "response": raw_json(property_res.get("raw") if land_records else None, land_records),
+            "compact": compact_records,
+            "score_weights": weights,
         },
         "land_sale_listings": listings_output,
+    })
+
+
+@app.post("/search-land/stream")
+async def search_land_stream(
+    data: LandSearchStreamRequest,
+    request: Request,
+    stream_format: Literal["sse", "ndjson"] = Query(default="ndjson", alias="format"),
+):
+    """
+    Every land parcel in the search, not just one page. Events:
+
+        parcel              one compact_land_record per parcel, deduplicated
+                            by id, in page-arrival order (scored, and by
+                            score within a page, unless scoreResults=false)
+        land_sale_listings  the /listings/sale lookup (once, includeListings)
+        error               a page request failed; no more pages are requested
+        done                records sent, pages read, duplicates skipped,
+                            truncated (maxRecords reached), stale
+
+    /properties is walked RENTCAST_PAGE_LIMIT records at a time from offset,
+    with up to LAND_STREAM_CONCURRENCY pages in flight, until a short page
+    or maxRecords. Rows are written as each page lands, so only the pages
+    in flight and the ids already sent are held, whatever the zip's size.
+    format=ndjson (default) or sse, as /analyze/stream.
+    """
+    logger.debug("/search-land/stream request", extra={"fields": {"body": data.model_dump()}})
+
+    if not RENTCAST_API_KEY:
+        raise HTTPException(status_code=500, detail="Missing RentCast API Key")
+
+    if data.maxLotSize is not None and data.minLotSize is not None and data.maxLotSize < data.minLotSize:
+        raise HTTPException(status_code=400, detail="maxLotSize must be greater than or equal to minLotSize")
+
+    weights = land_score_weights(data.scoreWeights) if data.scoreResults else None
+    listing_params = land_listing_params(data) if data.includeListings else None
+    # every lookup still running -> its single-flight key
+    inflight: Dict["asyncio.Task[Dict[str, Any]]", str] = {}
+    progress = {"records": 0, "pages": 0, "duplicates": 0}
+
+    def start(path: str, params: Dict[str, Any]) -> "asyncio.Task[Dict[str, Any]]":
+        task = asyncio.create_task(rentcast_timed_get(path, params, RENTCAST_TIMEOUT))
+        inflight[task] = rentcast_cache_key(path, params)
+        return task
+
+    def task_result(task: "asyncio.Task[Dict[str, Any]]") -> Dict[str, Any]:
+        if task.exception() is not None:
+            return {
+                "ok": False,
+                "status_code": None,
+                "body": {"request_error": f"RentCast call aborted: {task.exception()!r}"},
+            }
+        return task.result()
+
+    async def events():
+        started = time.perf_counter()
+        pages: Dict["asyncio.Task[Dict[str, Any]]", int] = {}  # page task -> offset
+        seen: Set[Any] = set()
+        next_offset = data.offset or 0
+        exhausted = reached_end = truncated = failed = stale = False
+        walk_started = time.time()
+
+        def fill() -> None:
+            nonlocal next_offset
+            # stop short of requesting pages maxRecords cannot use
+            while (
+                not exhausted
+                and not released
+                and len(pages) < LAND_STREAM_CONCURRENCY
+                and progress["records"] + len(pages) * RENTCAST_PAGE_LIMIT < data.maxRecords
+            ):
+                pages[start("/properties", land_property_params(data, RENTCAST_PAGE_LIMIT, next_offset))] = next_offset
+                next_offset += RENTCAST_PAGE_LIMIT
+
+        def stop_pages(beyond: int = -1) -> None:
+            nonlocal exhausted
+            exhausted = True
+            for task, offset in list(pages.items()):
+                if offset > beyond:
+                    task.cancel()
+                    del pages[task]
+
+        released = False
+
+        def release(finished: bool) -> None:
+            nonlocal released
+            if released:
+                return
+            released = True
+            # still running, or cancelled by stop_pages
+            unfinished = list(inflight)
+            for task in unfinished:
+                task.cancel()
+            if unfinished or not finished:
+                run_stream_cleanup(release_abandoned(unfinished, finished))
+
+        disconnected = watch_disconnect(request, lambda: release(finished=False))
+        finished = False
+        try:
+            listing_task = start("/listings/sale", listing_params) if listing_params is not None else None
+            fill()
+            while pages or (listing_task is not None and not listing_task.done()):
+                waiting = set(pages) | {disconnected}
+                if listing_task is not None and not listing_task.done():
+                    waiting.add(listing_task)
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                if disconnected in done:
+                    return
+
+                for task in done:
+                    inflight.pop(task, None)
+                    res = task_result(task)
+                    stale = stale or bool(res.get("stale"))
+
+                    if task is listing_task:
+                        yield stream_frame(stream_format, "land_sale_listings", {
+                            "params_used": listing_params,
+                            "response": raw_json(res.get("raw"), res["body"]) if res["ok"] else upstream_error(res),
+                        })
+                        continue
+
+                    offset = pages.pop(task, None)
+                    if offset is None:  # cancelled by stop_pages after it finished
+                        continue
+                    if not res["ok"]:
+                        failed = True
+                        stop_pages()
+                        yield stream_frame(stream_format, "error", {
+                            "message": "RentCast land search failed",
+                            "offset": offset,
+                            "status_code": res["status_code"],
+                            "body": res["body"],
+                        })
+                        continue
+
+                    progress["pages"] += 1
+                    records = res["body"] if isinstance(res["body"], list) else []
+                    if len(records) < RENTCAST_PAGE_LIMIT:
+                        # last page: anything further along comes back empty
+                        reached_end = True
+                        stop_pages(beyond=offset)
+
+                    compact_records = [compact_land_record(item) for item in records if isinstance(item, dict)]
+                    await index_land_records(compact_records)
+                    if weights is not None:
+                        compact_records = await score_land_records(compact_records, weights)
+                    for record in compact_records:
+                        parcel_id = record["id"]
+                        if parcel_id is not None:
+                            if parcel_id in seen:
+                                progress["duplicates"] += 1
+                                continue
+                            seen.add(parcel_id)
+                        if progress["records"] >= data.maxRecords:
+                            truncated = True
+                            stop_pages()
+                            break
+                        progress["records"] += 1
+                        yield stream_frame(stream_format, "parcel", record)
+
+                fill()
+
+            if reached_end and not (truncated or failed) and is_whole_zip_search(data):
+                await mark_land_cell(data.zipCode, walk_started)
+
+            yield stream_frame(stream_format, "done", {
+                "zipCode": data.zipCode,
+                **progress,
+                "truncated": truncated,
+                "stale": stale,
+                "elapsed_ms": elapsed_ms(started),
+            })
+            finished = True
+        finally:
+            disconnected.cancel()
+            release(finished)
+
+    async def release_abandoned(unfinished: List["asyncio.Task[Any]"], finished: bool) -> None:
+        abandoned = await release_upstream(unfinished, [inflight.pop(task) for task in unfinished])
+        if not finished:
+            logger.info("land stream abandoned by client", extra={"fields": {
+                "zipCode": data.zipCode,
+                **progress,
+                "upstream_cancelled": abandoned,
+            }})
+
+    return StreamingResponse(events(), media_type=STREAM_MEDIA_TYPES[stream_format], headers=STREAM_HEADERS)
+
+
+@app.post("/search-land/local")
+async def search_land_local(data: LandIndexQuery):
+    """
+    Land search answered from the local parcel index, with filters and
+    sorts RentCast lacks: lot size and last-sale ranges, owner type,
+    absentee owners, bounding box or radius, any sort order. Every record
+    carries its motivated-seller score; sort=-score ranks by it.
+
+    Zips the index has not walked within PARCEL_CELL_TTL (or all of them
+    with refresh=true) are first fetched from RentCast in full; everything
+    else never leaves the box. If a refresh fails, whatever the index
+    already holds for that zip is served and the zip is reported stale.
+    """
+    logger.debug("/search-land/local request", extra={"fields": {"body": data.model_dump()}})
+
+    parcel_index = get_parcel_index()
+    if parcel_index is None:
+        raise HTTPException(status_code=503, detail="Parcel index is disabled")
+
+    sort_key = data.sort.lstrip("-") if data.sort else None
+    if sort_key is not None and sort_key not in PARCEL_SORT_COLUMNS and sort_key not in ("distance", "score"):
+        raise HTTPException(status_code=400, detail=f"unknown sort: {data.sort}")
+    if sort_key == "distance" and data.near is None:
+        raise HTTPException(status_code=400, detail="sort=distance requires near")
+    if data.minLotSize is not None and data.maxLotSize is not None and data.maxLotSize < data.minLotSize:
+        raise HTTPException(status_code=400, detail="maxLotSize must be greater than or equal to minLotSize")
+
+    started = time.perf_counter()
+    zip_codes = list(dict.fromkeys(code.strip() for code in data.zipCodes))
+    cells = await asyncio.to_thread(parcel_index.cells, zip_codes)
+    to_refresh = [code for code, cell in cells.items() if cell["stale"] or data.refresh]
+
+    refresh_errors: Dict[str, Any] = {}
+    if to_refresh:
+        if not RENTCAST_API_KEY:
+            raise HTTPException(status_code=500, detail="Missing RentCast API Key")
+        results = await asyncio.gather(*(
+            parcel_cell_flights.do(code, lambda code=code: refresh_land_cell(code)) for code in to_refresh
+        ))
+        refresh_errors = {code: res for code, res in zip(to_refresh, results) if not res["ok"]}
+        cells = await asyncio.to_thread(parcel_index.cells, zip_codes)
+
+    filters = {
+        "zip_codes": zip_codes,
+        "min_lot_size": data.minLotSize,
+        "max_lot_size": data.maxLotSize,
+        "min_last_sale_price": data.minLastSalePrice,
+        "max_last_sale_price": data.maxLastSalePrice,
+        "last_sale_after": data.lastSaleAfter.isoformat() if data.lastSaleAfter else None,
+        "last_sale_before": data.lastSaleBefore.isoformat() if data.lastSaleBefore else None,
+        "owner_types": data.ownerTypes,
+        "absentee": data.absentee,
+        "owner_occupied": data.ownerOccupied,
+        "bbox": (data.bbox.minLat, data.bbox.minLon, data.bbox.maxLat, data.bbox.maxLon) if data.bbox else None,
+        "near": (data.near.latitude, data.near.longitude, data.near.radiusMiles) if data.near else None,
     }
+    weights = land_score_weights(data.scoreWeights)
+    if sort_key == "score":
+        # scores are not stored: score every match, then page
+        records, total = await asyncio.to_thread(parcel_index.query, filters, None, LAND_STREAM_MAX_RECORDS, 0)
+        records = await score_land_records(records, weights)
+        if not data.sort.startswith("-"):
+            records.reverse()
+        records = records[data.offset:data.offset + data.limit]
+    else:
+        records, total = await asyncio.to_thread(parcel_index.query, filters, data.sort, data.limit, data.offset)
+        scored = {record["id"]: record for record in await score_land_records(records, weights)}
+        records = [scored[record["id"]] for record in records]
+
+    return FastJSONResponse({
+        "input": data.model_dump(),
+        "stale": any(cell["stale"] for cell in cells.values()),
+        "cells": {
+            code: {
+                **cell,
+                "refreshed": code in to_refresh and code not in refresh_errors,
+                "error": upstream_error(refresh_errors[code]) if code in refresh_errors else None,
+            }
+            for code, cell in cells.items()
+        },
+        "count": total,
+        "records": records,
+        "elapsed_ms": elapsed_ms(started),
+    })
 
 
 @app.post("/financial-metrics")
@@ -661,23 +2469,48 @@ def financial_metrics(data: FinancialMetricsRequest):
     cost_of_debt_percent      Annual debt service / loan amount
     wacc_percent              Blended cost of capital (requires loan + equity inputs)
     irr_beats_wacc            True if IRR > WACC — the core go/no-go signal
+    xirr_percent              Annual IRR on cash_flow_dates, when given
+    debt                      Schedule-based loan cost, when interest_rate is given
     """
-    print("\n===================")
-    print("HIT /financial-metrics")
-    print("REQUEST BODY:", data.model_dump())
-    print("===================")
+    logger.debug("/financial-metrics request", extra={"fields": {"body": data.model_dump()}})
 
     irr = calculate_irr(data.initial_investment, data.cash_flows)
+    irr_multiple_possible = bool(sign_changes(cash_flow_matrix([data.initial_investment], [data.cash_flows]))[0] > 1)
 
     roc = calculate_return_on_cost(data.net_operating_income, data.initial_investment)
 
     coe = calculate_cost_of_equity(data.risk_free_rate, data.beta, data.market_return)
 
-    cod = (
-        calculate_cost_of_debt(data.annual_debt_service, data.loan_amount)
-        if data.loan_amount and data.annual_debt_service
-        else None
-    )
+    debt = None
+    if data.interest_rate is not None and data.loan_amount:
+        if data.io_months > data.amortization_months:
+            raise HTTPException(status_code=400, detail="io_months cannot exceed amortization_months")
+        debt = effective_debt_cost(
+            data.loan_amount,
+            data.interest_rate,
+            data.amortization_months,
+            data.io_months,
+            data.balloon_month,
+            data.points,
+        )
+        cod = debt["effective_annual_rate_percent"]
+    else:
+        cod = (
+            calculate_cost_of_debt(data.annual_debt_service, data.loan_amount)
+            if data.loan_amount and data.annual_debt_service
+            else None
+        )
+
+    xirr_percent = None
+    if data.cash_flow_dates is not None:
+        if len(data.cash_flow_dates) != len(data.cash_flows) + 1:
+            raise HTTPException(
+                status_code=400,
+                detail="cash_flow_dates needs one date for the initial investment plus one per cash flow",
+            )
+        amounts = [-abs(data.initial_investment)] + list(data.cash_flows)
+        rate = xirr(list(zip(data.cash_flow_dates, amounts)))
+        xirr_percent = round(rate * 100, 4) if rate is not None else None
 
     wacc = None
     if data.equity_value is not None and data.loan_amount and cod is not None:
@@ -698,21 +2531,561 @@ def financial_metrics(data: FinancialMetricsRequest):
     return {
         "input": data.model_dump(),
         "irr_percent": irr,
+        "irr_multiple_possible": irr_multiple_possible,
+        "xirr_percent": xirr_percent,
         "return_on_cost_percent": roc,
         "cost_of_equity_percent_capm": coe,
         "cost_of_debt_percent": cod,
         "wacc_percent": wacc,
         "irr_beats_wacc": irr_beats_wacc,
+        "debt": debt,
         "notes": {
             "irr": "Periodic rate — annualise monthly IRR with (1 + r/100)^12 - 1",
+            "irr_multiple_possible": "Cash flows change sign more than once; several IRRs may exist and the one nearest 0% is reported",
             "return_on_cost": "Compare to prevailing market cap rate; above = value creation",
             "cost_of_equity": f"CAPM: {data.risk_free_rate}% + {data.beta} × ({data.market_return}% − {data.risk_free_rate}%)",
-            "wacc": "Requires loan_amount, annual_debt_service, and equity_value",
+            "xirr": "Annual rate from cash_flow_dates (actual/365)",
+            "cost_of_debt": "Effective annual rate from the amortization schedule (points included) when interest_rate is given, else annual_debt_service / loan_amount",
+            "wacc": "Requires loan_amount, equity_value, and interest_rate or annual_debt_service",
             "irr_beats_wacc": "Primary go/no-go signal: IRR > WACC means the deal clears its hurdle rate",
         },
     }
 
 
+@app.post("/financial-metrics/amortization")
+def loan_amortization(data: LoanScheduleRequest):
+    """
+    Amortization schedule (interest-only months, balloon) and the all-in
+    cost of the loan including points. Schedules are memoized on the loan
+    terms.
+    """
+    if data.io_months > data.amortization_months:
+        raise HTTPException(status_code=400, detail="io_months cannot exceed amortization_months")
+
+    terms = (data.loan_amount, data.interest_rate, data.amortization_months, data.io_months, data.balloon_month)
+    schedule = amortization_schedule(*terms)
+    return FastJSONResponse({
+        "input": data.model_dump(),
+        "cost": effective_debt_cost(*terms, data.points),
+        "schedule": schedule_rows(schedule) if data.include_schedule else None,
+    })
+
+
+FINANCIAL_OPTIONAL_COLUMNS = (
+    "risk_free_rate",
+    "beta",
+    "market_return",
+    "loan_amount",
+    "annual_debt_service",
+    "equity_value",
+    "tax_rate",
+)
+
+
+def batch_metric_columns(
+    columns: Dict[str, Any],
+    cash_flows: List[List[float]],
+    errors: Dict[int, List[Dict[str, Any]]],
+) -> Dict[str, list]:
+    """Evaluate the error-free rows in one vectorized pass; failed rows get None in every column."""
+    size = len(cash_flows)
+    valid = [index for index in range(size) if index not in errors]
+    output: Dict[str, list] = {name: [None] * size for name in METRIC_COLUMNS}
+    if not valid:
+        return output
+
+    selected = {name: values[valid] for name, values in columns.items()}
+    with timed(FUNCTION_LATENCY, function="financial_metrics_batch"):
+        evaluated = evaluate_metrics(selected, [cash_flows[index] for index in valid])
+    for name, values in evaluated.items():
+        for index, value in zip(valid, values):
+            output[name][index] = value
+    return output
+
+
+@app.post("/financial-metrics/batch")
+def financial_metrics_batch(data: FinancialMetricsBatchRequest):
+    """
+    /financial-metrics for many scenarios in one call, computed with array
+    math across all of them.
+
+    items     list of /financial-metrics bodies. Response: results[] in
+              input order, each {"index", "ok", <metrics>} or
+              {"index", "ok": false, "errors"}.
+    columns   FinancialMetricsColumns. Response: columns{metric: [...]}
+              in input order plus errors[] ({"index", "errors"}) for the
+              rows that were rejected (their metric slots are null).
+    """
+    if (data.items is None) == (data.columns is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of 'items' or 'columns'")
+
+    size = len(data.items) if data.items is not None else len(data.columns.cash_flows)
+    if size > FINANCIAL_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large: {size} scenarios (max {FINANCIAL_BATCH_MAX_ITEMS})",
+        )
+
+    defaults = {name: FinancialMetricsRequest.model_fields[name].default for name in FINANCIAL_OPTIONAL_COLUMNS}
+
+    if data.columns is not None:
+        raw = data.columns.model_dump()
+        mismatched = [name for name, values in raw.items() if values is not None and len(values) != size]
+        if mismatched:
+            raise HTTPException(
+                status_code=400,
+                detail={"error": "Column lengths differ from cash_flows", "columns": mismatched},
+            )
+        columns = {
+            name: column(raw[name], size, defaults.get(name))
+            for name in ("initial_investment", "net_operating_income") + FINANCIAL_OPTIONAL_COLUMNS
+        }
+        errors = row_errors(columns, raw["cash_flows"])
+        return FastJSONResponse({
+            "count": size,
+            "columns": batch_metric_columns(columns, raw["cash_flows"], errors),
+            "errors": [{"index": index, "errors": errors[index]} for index in sorted(errors)],
+        })
+
+    scenarios: List[Optional[FinancialMetricsRequest]] = []
+    errors = {}
+    for index, item in enumerate(data.items):
+        try:
+            scenarios.append(FinancialMetricsRequest.model_validate(item))
+        except ValidationError as exc:
+            scenarios.append(None)
+            errors[index] = [
+                {"field": ".".join(str(part) for part in err["loc"]), "msg": err["msg"]}
+                for err in exc.errors()
+            ]
+
+    # Loan schedules and XIRR are per-row scalar work, done the same way
+    # /financial-metrics does them so a row still matches a single call.
+    debts: List[Optional[Dict[str, Any]]] = [None] * size
+    xirrs: List[Optional[float]] = [None] * size
+    for index, req in enumerate(scenarios):
+        if req is None:
+            continue
+        if req.interest_rate is not None and req.loan_amount:
+            if req.io_months > req.amortization_months:
+                errors[index] = [{"field": "io_months", "msg": "io_months cannot exceed amortization_months"}]
+                continue
+            debts[index] = effective_debt_cost(
+                req.loan_amount, req.interest_rate, req.amortization_months,
+                req.io_months, req.balloon_month, req.points,
+            )
+        if req.cash_flow_dates is not None:
+            if len(req.cash_flow_dates) != len(req.cash_flows) + 1:
+                errors[index] = [{
+                    "field": "cash_flow_dates",
+                    "msg": "cash_flow_dates needs one date for the initial investment plus one per cash flow",
+                }]
+                continue
+            amounts = [-abs(req.initial_investment)] + list(req.cash_flows)
+            rate = xirr(list(zip(req.cash_flow_dates, amounts)))
+            xirrs[index] = round(rate * 100, 4) if rate is not None else None
+
+    def values(name: str) -> List[Optional[float]]:
+        return [getattr(req, name) if req is not None else None for req in scenarios]
+
+    columns = {
+        name: column(values(name), size)
+        for name in ("initial_investment", "net_operating_income") + FINANCIAL_OPTIONAL_COLUMNS
+    }
+    columns["cost_of_debt_percent"] = column(
+        [debt["effective_annual_rate_percent"] if debt is not None else None for debt in debts], size,
+    )
+    cash_flows = [req.cash_flows if req is not None else [] for req in scenarios]
+    metrics = batch_metric_columns(columns, cash_flows, errors)
+
+    results = []
+    for index in range(size):
+        if index in errors:
+            results.append({"index": index, "ok": False, "errors": errors[index]})
+        else:
+            results.append({
+                "index": index,
+                "ok": True,
+                **{name: metrics[name][index] for name in METRIC_COLUMNS},
+                "xirr_percent": xirrs[index],
+                "debt": debts[index],
+            })
+    return FastJSONResponse({"count": size, "results": results})
+
+
+# driver -> (min, max, integer-valued)
+SENSITIVITY_BOUNDS = {
+    "hold_months": (1, 360, True),
+    "vacancy_rate": (0, 100, False),
+    "expense_rate": (0, 100, False),
+    "sale_closing_cost_pct": (0, 100, False),
+    "exit_cap_rate": (0.01, 100, False),
+}
+
+
+def sensitivity_axis(name: str, spec: SensitivityRange) -> List[float]:
+    if spec.values is not None:
+        values = list(spec.values)
+    elif spec.start is not None and spec.stop is not None and spec.steps:
+        step = (spec.stop - spec.start) / (spec.steps - 1)
+        values = [round(spec.start + step * i, 6) for i in range(spec.steps)]
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Driver '{name}' needs either values or start/stop/steps",
+        )
+
+    low, high, integer = SENSITIVITY_BOUNDS[name]
+    if integer and any(v != int(v) for v in values):
+        raise HTTPException(status_code=400, detail=f"Driver '{name}' values must be whole numbers")
+    if any(v < low or v > high for v in values):
+        raise HTTPException(status_code=400, detail=f"Driver '{name}' values must be between {low} and {high}")
+    return [int(v) for v in values] if integer else values
+
+
+@app.post("/financial-metrics/sensitivity")
+def financial_metrics_sensitivity(data: FinancialSensitivityRequest):
+    """
+    IRR / return-on-cost surface over 2–4 deal drivers, built from an
+    /analyze deal_summary the same way the frontend builds a single
+    /financial-metrics payload. The whole grid is solved in one vectorized
+    pass instead of one request per scenario.
+
+    Response: axes[] (driver + values, in request order), shape, and
+    surfaces{metric: nested lists indexed [axis0][axis1]...}; capital{}
+    holds the grid-independent CAPM / cost of debt / WACC.
+    """
+    axes = {name: sensitivity_axis(name, spec) for name, spec in data.drivers.items()}
+
+    cells = math.prod(len(values) for values in axes.values())
+    if cells > SENSITIVITY_MAX_CELLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Grid too large: {cells} cells (max {SENSITIVITY_MAX_CELLS})",
+        )
+    if data.deal_summary.estimated_value is None and "exit_cap_rate" not in axes and data.exit_cap_rate is None:
+        raise HTTPException(
+            status_code=400,
+            detail="deal_summary.estimated_value or an exit_cap_rate is required to price the sale",
+        )
+
+    body = data.model_dump()
+    with timed(FUNCTION_LATENCY, function="sensitivity_grid"):
+        grid = sensitivity_grid(
+            deal={**body["deal_summary"], "estimated_value": data.deal_summary.estimated_value or 0.0},
+            drivers=axes,
+            base={name: body[name] for name in SENSITIVITY_BOUNDS},
+            capital={name: body[name] for name in FINANCIAL_OPTIONAL_COLUMNS},
+        )
+
+    return FastJSONResponse({
+        "cells": cells,
+        **grid,
+        "notes": {
+            "irr_percent": "Monthly IRR; irr_annualized_percent = (1 + r/100)^12 - 1",
+            "cash_flows": "NOI/12 each month of the hold, net sale proceeds added to the last month",
+        },
+    })
+
+
+# kind -> fields it needs
+DISTRIBUTION_FIELDS = {
+    "fixed": ("value",),
+    "uniform": ("low", "high"),
+    "triangular": ("low", "mode", "high"),
+    "normal": ("mean", "std"),
+}
+
+
+def distribution_spec(name: str, dist: Distribution) -> Dict[str, Any]:
+    spec = dist.model_dump(exclude_none=True)
+    missing = [field for field in DISTRIBUTION_FIELDS[dist.kind] if field not in spec]
+    if missing:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{name}: a {dist.kind} distribution needs {', '.join(missing)}",
+        )
+    if dist.kind in ("uniform", "triangular") and not (
+        dist.low <= (dist.mode if dist.mode is not None else dist.low) <= dist.high
+    ):
+        raise HTTPException(status_code=400, detail=f"{name}: expected low <= mode <= high")
+    return spec
+
+
+def simulation_params(data: SimulationRequest) -> Dict[str, Any]:
+    """run_simulation params for a request; raises HTTPException on bad input."""
+    if data.paths > SIMULATE_MAX_PATHS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many paths: {data.paths} (max {SIMULATE_MAX_PATHS})",
+        )
+
+    ds = data.deal_summary
+    value_range = ds.estimated_value_range or EstimateRange()
+    rent_range = ds.estimated_rent_range or EstimateRange()
+    value = (
+        distribution_spec("value_distribution", data.value_distribution)
+        if data.value_distribution
+        else range_distribution(ds.estimated_value, value_range.low, value_range.high)
+    )
+    rent = (
+        distribution_spec("rent_distribution", data.rent_distribution)
+        if data.rent_distribution
+        else range_distribution(ds.estimated_rent, rent_range.low, rent_range.high)
+    )
+    if value is None:
+        raise HTTPException(status_code=400, detail="deal_summary.estimated_value or value_distribution is required")
+
+    return {
+        "purchase_price": ds.purchase_price,
+        "rehab_budget": ds.rehab_budget,
+        "value": value,
+        "rent": rent or {"kind": "fixed", "value": 0.0},
+        "vacancy_rate": distribution_spec("vacancy_rate", data.vacancy_rate),
+        "rehab_overrun_pct": distribution_spec("rehab_overrun_pct", data.rehab_overrun_pct),
+        "hold_months": distribution_spec("hold_months", data.hold_months),
+        "max_hold_months": 360,
+        "expense_rate": data.expense_rate,
+        "sale_closing_cost_pct": data.sale_closing_cost_pct,
+    }
+
+
+def simulation_response(params: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        **result,
+        "distributions": {name: params[name] for name in ("value", "rent", "vacancy_rate", "rehab_overrun_pct", "hold_months")},
+        "notes": {
+            "irr_annualized_percent": "Annualized from the monthly IRR of each path",
+            "purchase_exceeds_mao": "Share of paths where purchase_price > 70% of simulated ARV minus simulated rehab",
+        },
+    }
+
+
+@app.post("/simulate")
+def simulate(data: SimulationRequest):
+    """
+    Monte Carlo risk profile for a deal. Each path draws ARV, rent, vacancy,
+    rehab overrun and hold length, builds the same monthly cash flows as
+    /financial-metrics/sensitivity and solves its IRR; all paths are
+    vectorized, optionally chunked across a process pool.
+
+    Response: probabilities (loss, negative spread to ARV, purchase above
+    70%-rule MAO, IRR below hurdle) and per-outcome mean/std/percentiles/
+    histogram. Pass the returned seed back to reproduce a run.
+    """
+    params = simulation_params(data)
+    with timed(FUNCTION_LATENCY, function="run_simulation"):
+        result = run_simulation(
+            params,
+            paths=data.paths,
+            seed=data.seed,
+            parallel=data.parallel,
+            bins=data.bins,
+            hurdle_irr_percent=data.hurdle_irr_percent,
+        )
+    return FastJSONResponse(simulation_response(params, result))
+
+
+# ─── Background jobs ──────────────────────────────────────────────────────────
+
+class JobSubmitRequest(BaseModel):
+    kind: Literal["simulate", "analyze_deals", "warm_land_cells"]
+    payload: Dict[str, Any]
+    priority: Literal["high", "normal", "low"] = "normal"
+    maxAttempts: int = Field(default=3, ge=1, le=10)
+
+
+class AnalyzeDealsJob(BaseModel):
+    deals: List[Dict[str, Any]] = Field(min_length=1)
+
+
+class WarmLandCellsJob(BaseModel):
+    zipCodes: List[str] = Field(min_length=1)
+
+
+def job_payload(kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate a job payload at submit time so bad input is a 400, not a failed job."""
+    try:
+        if kind == "simulate":
+            simulation_params(SimulationRequest.model_validate(payload))
+        elif kind == "analyze_deals":
+            deals = AnalyzeDealsJob.model_validate(payload).deals
+            if len(deals) > BULK_ANALYZE_MAX_DEALS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Too many deals: {len(deals)} (max {BULK_ANALYZE_MAX_DEALS})",
+                )
+        else:
+            zip_codes = WarmLandCellsJob.model_validate(payload).zipCodes
+            if len(zip_codes) > PARCEL_QUERY_MAX_ZIPS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Too many zip codes: {len(zip_codes)} (max {PARCEL_QUERY_MAX_ZIPS})",
+                )
+    except ValidationError as exc:
+        raise HTTPException(status_code=400, detail=[
+            {"field": ".".join(str(part) for part in err["loc"]), "msg": err["msg"]}
+            for err in exc.errors()
+        ])
+    return payload
+
+
+async def simulate_job(payload: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    """The whole simulation runs in one process-pool worker, off the event loop."""
+    data = SimulationRequest.model_validate(payload)
+    params = simulation_params(data)
+    result = await ctx.run_cpu(
+        run_simulation, params, data.paths, data.seed, False, data.bins, data.hurdle_irr_percent,
+    )
+    return simulation_response(params, result)
+
+
+async def analyze_deals_job(payload: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    """/analyze/bulk as a durable job: rows in input order, sharing bulk_jobs' cap and rate-limit headroom."""
+    deals = validate_bulk_deals(AnalyzeDealsJob.model_validate(payload).deals)
+    rows: List[Dict[str, Any]] = []
+
+    def record(row: Dict[str, Any]) -> None:
+        rows.append(row)
+        ctx.report(completed=len(rows), total=len(deals))
+
+    await bulk_jobs.run_items(deals, analyze_bulk_deal, record, before_item=bulk_rentcast_headroom)
+    rows.sort(key=lambda row: row["index"])
+    return {"total": len(rows), "failed": sum(not row["ok"] for row in rows), "rows": rows}
+
+
+async def warm_land_cells_job(payload: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    """Walk zips into the parcel index; an upstream failure fails the attempt so it is retried."""
+    if get_parcel_index() is None:
+        raise JobError("parcel index is disabled")
+    zip_codes = WarmLandCellsJob.model_validate(payload).zipCodes
+    cells = {}
+    for done, zip_code in enumerate(zip_codes, start=1):
+        res = await parcel_cell_flights.do(zip_code, lambda code=zip_code: refresh_land_cell(code))
+        if not res["ok"]:
+            raise RuntimeError(f"RentCast error for zip {zip_code}: HTTP {res['status_code']}")
+        cells[zip_code] = {"complete": res["complete"]}
+        ctx.report(completed=done, total=len(zip_codes))
+    return {"cells": cells}
+
+
+job_workers.register("simulate", simulate_job)
+job_workers.register("analyze_deals", analyze_deals_job)
+job_workers.register("warm_land_cells", warm_land_cells_job)
+
+
+def job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {**job, "status_url": f"/jobs/{job['id']}"}
+
+
+async def get_job(job_id: str) -> Dict[str, Any]:
+    job = await asyncio.to_thread(job_workers.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(data: JobSubmitRequest):
+    """
+    Queue background work: "simulate" (SimulationRequest, run on the
+    process pool), "analyze_deals" ({"deals": [DealRequest, ...]}) or
+    "warm_land_cells" ({"zipCodes": [...]}, fills the parcel index).
+
+    Jobs are stored in a local SQLite file, so they survive restarts and
+    are shared by every worker process. High priority runs before normal
+    before low; a failed attempt is retried with exponential backoff up to
+    maxAttempts. Poll GET /jobs/{job_id} for status, progress and result.
+    """
+    if data.kind != "simulate" and not RENTCAST_API_KEY:
+        raise HTTPException(status_code=500, detail="Missing RentCast API Key")
+    payload = job_payload(data.kind, data.payload)
+    job = await job_workers.enqueue(data.kind, payload, data.priority, data.maxAttempts)
+    logger.info("job queued", extra={"fields": {"job_id": job["id"], "kind": data.kind, "priority": data.priority}})
+    view = job_view(job)
+    del view["payload"]
+    return FastJSONResponse(view, status_code=202)
+
+
+@app.get("/jobs")
+async def list_jobs(
+    status: Optional[Literal["queued", "running", "done", "failed", "cancelled"]] = None,
+    kind: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500),
+):
+    """Newest first; payloads and results are left out (GET /jobs/{job_id} has them)."""
+    jobs = await asyncio.to_thread(job_workers.store.list, status, kind, limit)
+    return FastJSONResponse({"jobs": [job_view(job) for job in jobs]})
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    return FastJSONResponse(job_view(await get_job(job_id)))
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """
+    Cancel a job. A queued one is cancelled at once; a running one is
+    interrupted here, or by its owning process at the next lease renewal.
+    """
+    await get_job(job_id)
+    return FastJSONResponse(job_view(await job_workers.cancel(job_id)))
+
+
 @app.get("/health")
 def health():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+
+def require_internal_token(authorization: Optional[str] = Header(default=None)) -> None:
+    if not INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), INTERNAL_API_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid internal API token", headers={"WWW-Authenticate": "Bearer"})
+
+
+def collect_cache_metrics() -> None:
+    record_cache_stats("rentcast_memory", rentcast_cache.hits, rentcast_cache.misses)
+    disk_cache = get_disk_cache()
+    if disk_cache is not None:
+        for namespace, counters in disk_cache.local_counters().items():
+            record_cache_stats(f"{namespace}_disk", counters["hits"], counters["misses"])
+
+
+REGISTRY.add_collector(collect_cache_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_internal_token)])
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/internal/rate-limits", dependencies=[Depends(require_internal_token)])
+def internal_rate_limits():
+    return {name: bucket.stats() for name, bucket in UPSTREAM_LIMITERS.items()}
+
+
+@app.get("/internal/stats", dependencies=[Depends(require_internal_token)])
+def internal_stats():
+    disk_cache = get_disk_cache()
+    parcel_index = get_parcel_index()
+    market_history = get_market_history()
+    market_stats = get_market_stats()
+    return {
+        "rentcast_cache": rentcast_cache.stats(),
+        "upstream_disk_cache": disk_cache.stats() if disk_cache else None,
+        "circuit_breakers": {path: breaker.stats() for path, breaker in rentcast_breakers.items()},
+        "amortization_schedules": amortization_schedule.cache_info()._asdict(),
+        "parcel_index": parcel_index.stats() if parcel_index else None,
+        "market_history": market_history.stats() if market_history else None,
+        "market_stats": market_stats.stats() if market_stats else None,
+        "bulk_jobs": bulk_jobs.stats(),
+        "jobs": {**job_workers.store.stats(), **job_workers.stats()},
+        "single_flight": {
+            "rentcast": rentcast_flights.stats(),
+            "parcel_cells": parcel_cell_flights.stats(),
+            "serpapi": serpapi_flights.stats(),
+        },
+    }
\ No newline at end of file
@@ -0,0 +1,204 @@
+import asyncio
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence
+
+# Background bulk jobs: a list of items run through an async worker, with
+# one concurrency cap shared by every job in the process so a big upload
+# cannot crowd out another one (or interactive requests). Jobs live in
+# memory and are dropped ttl seconds after they finish.
+
+Worker = Callable[[int, Any], Awaitable[Dict[str, Any]]]
+
+
+class BulkJob:
+    def __init__(self, kind: str, total: int):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.total = total
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.failed = 0
+        # completion order; every row carries its input "index"
+        self.results: List[Dict[str, Any]] = []
+        self.task: Optional["asyncio.Task[None]"] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "cancelled")
+
+    def record(self, row: Dict[str, Any]) -> None:
+        self.results.append(row)
+        if not row.get("ok"):
+            self.failed += 1
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def finish(self, status: str) -> None:
+        self.status = status
+        self.finished_at = time.time()
+        self._notify()
+
+    async def follow(self, start: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """Rows from position start on, waiting for new ones until the job finishes."""
+        position = start
+        while True:
+            changed = self._changed
+            while position < len(self.results):
+                yield self.results[position]
+                position += 1
+            if self.finished:
+                return
+            await changed.wait()
+
+    def progress(self) -> Dict[str, Any]:
+        completed = len(self.results)
+        elapsed = ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0
+        eta = None
+        if self.status == "running" and completed:
+            eta = round(elapsed / completed * (self.total - completed), 1)
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "total": self.total,
+            "completed": completed,
+            "failed": self.failed,
+            "percent": round(completed / self.total * 100, 1) if self.total else 100.0,
+            "created_at": self.created_at,
+            "elapsed_sec": round(elapsed, 1),
+            "eta_sec": eta,
+        }
+
+
+class BulkJobs:
+    """
+    Registry and runner. Each job gets up to `concurrency` workers pulling
+    its items in order; every item also takes the shared semaphore, which
+    admits waiters first come first served, so concurrent jobs interleave
+    instead of running one after another. before_item (e.g. waiting for
+    rate-limit headroom) runs inside the semaphore, ahead of the worker.
+    """
+
+    def __init__(self, concurrency: int, ttl: float, max_jobs: int):
+        self.concurrency = concurrency
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self._jobs: Dict[str, BulkJob] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_use = 0
+        self.items_run = 0
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        return self._slots
+
+    def active(self) -> int:
+        return sum(not job.finished for job in self._jobs.values())
+
+    def submit(
+        self,
+        kind: str,
+        items: Sequence[Any],
+        worker: Worker,
+        before_item: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> BulkJob:
+        """Start a job; raises RuntimeError when max_jobs are already running."""
+        self.prune()
+        if self.active() >= self.max_jobs:
+            raise RuntimeError(f"{self.max_jobs} bulk jobs already running")
+        job = BulkJob(kind, len(items))
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job, items, worker, before_item))
+        return job
+
+    async def _run(
+        self,
+        job: BulkJob,
+        items: Sequence[Any],
+        worker: Worker,
+        before_item: Optional[Callable[[], Awaitable[Any]]],
+    ) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            await self.run_items(items, worker, job.record, before_item)
+        except asyncio.CancelledError:
+            job.finish("cancelled")
+            raise
+        job.finish("done")
+
+    async def run_items(
+        self,
+        items: Sequence[Any],
+        worker: Worker,
+        on_row: Callable[[Dict[str, Any]], None],
+        before_item: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> None:
+        """
+        Run items through worker under the shared semaphore, at most
+        `concurrency` at a time from this call, handing each row to on_row
+        as it finishes. A worker exception becomes a failed row. Used by
+        submit() and by callers that track their own progress (durable
+        queue jobs), so every bulk caller counts against the same cap.
+        """
+        queue = iter(enumerate(items))
+        slots = self._semaphore()
+
+        async def drain() -> None:
+            for index, item in queue:
+                async with slots:
+                    self.in_use += 1
+                    try:
+                        if before_item is not None:
+                            await before_item()
+                        row = await worker(index, item)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as exc:
+                        row = {"index": index, "ok": False, "error": f"{type(exc).__name__}: {exc}"}
+                    finally:
+                        self.in_use -= 1
+                    self.items_run += 1
+                on_row(row)
+
+        await asyncio.gather(*(drain() for _ in range(min(self.concurrency, len(items)) or 1)))
+
+    def get(self, job_id: str) -> Optional[BulkJob]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[BulkJob]:
+        job = self._jobs.get(job_id)
+        if job is not None and not job.finished and job.task is not None:
+            job.task.cancel()
+        return job
+
+    def prune(self) -> int:
+        """Forget jobs that finished more than ttl seconds ago."""
+        cutoff = time.time() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+        return len(expired)
+
+    async def shutdown(self) -> None:
+        tasks = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "in_use": self.in_use,
+            "jobs": len(self._jobs),
+            "active_jobs": self.active(),
+            "items_run": self.items_run,
+        }
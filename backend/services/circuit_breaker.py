@@ -0,0 +1,75 @@
+import time
+from typing import Any, Dict
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker.
+
+    closed     calls flow; `failure_threshold` consecutive failures open it
+    open       calls are refused until `reset_timeout` has passed
+    half_open  one probe call is let through; success closes the breaker,
+               failure re-opens it. If the probe never reports back within
+               reset_timeout another probe is allowed.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started = 0.0
+        self.rejected = 0
+        self.opened = 0
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        if self.state == CLOSED:
+            return True
+
+        if self.state == OPEN:
+            if now - self._opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self._probe_started = now
+            return True
+
+        # half-open: a single probe at a time
+        if now - self._probe_started >= self.reset_timeout:
+            self._probe_started = now
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.opened += 1
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+
+    def retry_after(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "times_opened": self.opened,
+            "rejected_calls": self.rejected,
+            "retry_after_sec": round(self.retry_after(), 1),
+        }
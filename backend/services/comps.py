@@ -0,0 +1,164 @@
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+# Comparable-sales analytics for the AVM comps RentCast returns with a value
+# or rent estimate. Comps become float columns once (NaN for missing or
+# non-numeric fields); each comp then gets a weight from its distance, age
+# and similarity to the subject, $/sqft outliers beyond the IQR fences are
+# dropped, and the weighted $/sqft distribution of what is left, scaled by
+# the subject's square footage, gives an estimate and band next to the AVM.
+
+COMP_FIELDS = ("price", "squareFootage", "bedrooms", "bathrooms", "yearBuilt", "distance", "daysOld")
+
+# a comp this far away / this old counts half
+DISTANCE_HALF_LIFE_MILES = 0.5
+AGE_HALF_LIFE_DAYS = 90.0
+
+# difference at which a feature stops counting toward similarity;
+# squareFootage is relative to the subject's
+SIMILARITY_SCALES = {
+    "bedrooms": 2.0,
+    "bathrooms": 2.0,
+    "squareFootage": 0.5,
+    "yearBuilt": 40.0,
+}
+
+IQR_FENCE = 1.5
+# fewer usable comps than this are never trimmed
+MIN_COMPS_TO_TRIM = 4
+BAND_QUANTILES = (0.25, 0.75)
+
+
+def _number(value: Any) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return np.nan
+
+
+def comp_columns(comps: Any) -> Dict[str, np.ndarray]:
+    """COMP_FIELDS of the dict comps as float arrays, plus price_per_sqft and id."""
+    rows = [comp for comp in comps if isinstance(comp, dict)] if isinstance(comps, list) else []
+    columns = {
+        field: np.array([_number(row.get(field)) for row in rows], dtype=float)
+        for field in COMP_FIELDS
+    }
+    sqft = columns["squareFootage"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        columns["price_per_sqft"] = np.where(sqft > 0, columns["price"] / sqft, np.nan)
+    columns["id"] = np.array([row.get("id") for row in rows], dtype=object)
+    return columns
+
+
+def similarity(columns: Dict[str, np.ndarray], subject: Optional[Dict[str, Any]]) -> np.ndarray:
+    """
+    0-1 per comp: one minus the mean scaled difference from the subject over
+    the features both have. Comps sharing none of the subject's features
+    score 0.5; with nothing known about the subject every comp scores 1.
+    """
+    size = len(columns["price"])
+    subject = subject or {}
+    penalties, known = [], []
+    for field, scale in SIMILARITY_SCALES.items():
+        target = _number(subject.get(field))
+        if np.isnan(target) or (field == "squareFootage" and target <= 0):
+            continue
+        diff = np.abs(columns[field] - target)
+        if field == "squareFootage":
+            diff = diff / target
+        penalties.append(np.clip(diff / scale, 0.0, 1.0))
+        known.append(~np.isnan(diff))
+    if not penalties:
+        return np.ones(size)
+
+    penalty = np.stack(penalties)
+    mask = np.stack(known)
+    counts = mask.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_penalty = np.where(mask, penalty, 0.0).sum(axis=0) / counts
+    return np.where(counts > 0, 1.0 - mean_penalty, 0.5)
+
+
+def comp_weights(columns: Dict[str, np.ndarray], similarity_scores: np.ndarray) -> np.ndarray:
+    """Distance decay x recency decay x similarity; a missing distance or age counts as one half-life."""
+    distance = np.nan_to_num(columns["distance"], nan=DISTANCE_HALF_LIFE_MILES)
+    age = np.nan_to_num(columns["daysOld"], nan=AGE_HALF_LIFE_DAYS)
+    return (
+        0.5 ** (np.maximum(distance, 0.0) / DISTANCE_HALF_LIFE_MILES)
+        * 0.5 ** (np.maximum(age, 0.0) / AGE_HALF_LIFE_DAYS)
+        * similarity_scores
+    )
+
+
+def iqr_inliers(values: np.ndarray) -> np.ndarray:
+    """Mask of values inside the Tukey fences (all True below MIN_COMPS_TO_TRIM values)."""
+    if len(values) < MIN_COMPS_TO_TRIM:
+        return np.ones(len(values), dtype=bool)
+    q1, q3 = np.percentile(values, [25, 75])
+    spread = (q3 - q1) * IQR_FENCE
+    return (values >= q1 - spread) & (values <= q3 + spread)
+
+
+def weighted_quantiles(values: np.ndarray, weights: np.ndarray, quantiles: Sequence[float]) -> np.ndarray:
+    """Quantiles of the weighted sample, interpolating between weight midpoints."""
+    order = np.argsort(values)
+    values, weights = values[order], weights[order]
+    midpoints = (np.cumsum(weights) - weights / 2) / weights.sum()
+    return np.interp(quantiles, midpoints, values)
+
+
+def _round(value: Any) -> Optional[float]:
+    return round(float(value), 2) if value is not None and np.isfinite(value) else None
+
+
+def comp_stats(comps: Any, subject: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    $/sqft statistics over the comps and, when the subject's square footage
+    is known, an estimate (weighted $/sqft x sqft) with a band from the
+    weighted 25th-75th percentile $/sqft. Works the same for sale comps
+    (estimate = value) and rental comps (estimate = monthly rent).
+    """
+    columns = comp_columns(comps)
+    usable = ~np.isnan(columns["price_per_sqft"])
+    ppsf = columns["price_per_sqft"][usable]
+    stats: Dict[str, Any] = {
+        "count": int(usable.sum()),
+        "used": 0,
+        "outlier_ids": [],
+        "mean_price_per_sqft": None,
+        "median_price_per_sqft": None,
+        "trimmed_mean_price_per_sqft": None,
+        "weighted_price_per_sqft": None,
+        "price_per_sqft_band": None,
+        "mean_similarity": None,
+        "estimate": None,
+    }
+    if not len(ppsf):
+        return stats
+
+    all_scores = similarity(columns, subject)
+    scores = all_scores[usable]
+    weights = comp_weights(columns, all_scores)[usable]
+    inliers = iqr_inliers(ppsf)
+    kept, kept_weights = ppsf[inliers], weights[inliers]
+    if kept_weights.sum() <= 0:
+        kept_weights = np.ones(len(kept))
+
+    weighted = float(np.average(kept, weights=kept_weights))
+    low, high = weighted_quantiles(kept, kept_weights, BAND_QUANTILES)
+    stats.update({
+        "used": int(inliers.sum()),
+        "outlier_ids": [comp_id for comp_id in columns["id"][usable][~inliers].tolist() if comp_id is not None],
+        "mean_price_per_sqft": _round(ppsf.mean()),
+        "median_price_per_sqft": _round(np.median(ppsf)),
+        "trimmed_mean_price_per_sqft": _round(kept.mean()),
+        "weighted_price_per_sqft": _round(weighted),
+        "price_per_sqft_band": {"low": _round(low), "high": _round(high)},
+        "mean_similarity": round(float(scores.mean()), 4),
+    })
+
+    sqft = _number((subject or {}).get("squareFootage"))
+    if sqft > 0:
+        stats["estimate"] = {"value": _round(weighted * sqft), "low": _round(low * sqft), "high": _round(high * sqft)}
+    return stats
+
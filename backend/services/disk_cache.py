@@ -0,0 +1,257 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+# Second cache tier shared by every uvicorn worker on the box. SQLite in WAL
+# mode gives us safe multi-process reads/writes without running a server.
+UPSTREAM_CACHE_PATH = os.getenv("UPSTREAM_CACHE_PATH", "upstream_cache.sqlite3")
+UPSTREAM_CACHE_ENABLED = os.getenv("UPSTREAM_CACHE_ENABLED", "true").lower() == "true"
+UPSTREAM_CACHE_MAX_BYTES = int(os.getenv("UPSTREAM_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+UPSTREAM_CACHE_COMPACT_INTERVAL = float(os.getenv("UPSTREAM_CACHE_COMPACT_INTERVAL", "300"))
+# Rows outlive their TTL by this long so they can be served stale during an
+# upstream outage; compaction only deletes them after the grace period.
+UPSTREAM_CACHE_STALE_TTL = float(os.getenv("UPSTREAM_CACHE_STALE_TTL", str(3 * 24 * 3600)))
+
+# accessed_at drives LRU eviction; only bump it when it is this stale so hot
+# keys don't turn every read into a write.
+_TOUCH_INTERVAL = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS stats (
+    namespace TEXT PRIMARY KEY,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def encode_value(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def decode_value(blob: bytes) -> Tuple[Any, int]:
+    """Return the decoded value and its uncompressed size in bytes."""
+    raw = zlib.decompress(blob)
+    return json.loads(raw), len(raw)
+
+
+class DiskCache:
+    """
+    File-backed TTL cache with zlib-compressed JSON values (or opaque
+    bytes through set_bytes/get_bytes).
+
+    Lookups and writes are synchronous and cheap (one indexed row); call them
+    through asyncio.to_thread from async code. Expired rows stay readable
+    with allow_stale for stale_ttl seconds and are removed by compact(),
+    which also enforces max_bytes by dropping the least recently accessed
+    rows and folds this process's hit/miss counters into the shared stats
+    table.
+    """
+
+    def __init__(self, path: str, max_bytes: int, stale_ttl: float = 0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+        # Running totals for this process only; _counters is reset on flush
+        self._lifetime: Dict[str, Dict[str, int]] = {}
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, namespace: str, field: str) -> None:
+        with self._counter_lock:
+            counters = self._counters.setdefault(namespace, {"hits": 0, "misses": 0})
+            counters[field] += 1
+            lifetime = self._lifetime.setdefault(namespace, {"hits": 0, "misses": 0})
+            lifetime[field] += 1
+
+    def local_counters(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss totals seen by this process since it started."""
+        with self._counter_lock:
+            return {namespace: dict(counters) for namespace, counters in self._lifetime.items()}
+
+    def _lookup(self, key: str, namespace: str, allow_stale: bool) -> Optional[Tuple[bytes, float]]:
+        now = time.time()
+        row = self._conn().execute(
+            "SELECT value, expires_at, accessed_at FROM entries WHERE key = ?",
+            (key,),
+        ).fetchone()
+
+        if allow_stale:
+            if row is None or row[1] + self.stale_ttl <= now:
+                return None
+            return row[0], row[1]
+
+        if row is None or row[1] <= now:
+            self._count(namespace, "misses")
+            return None
+
+        if now - row[2] > _TOUCH_INTERVAL:
+            self._conn().execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+
+        self._count(namespace, "hits")
+        return row[0], row[1]
+
+    def get(
+        self,
+        key: str,
+        namespace: str = "default",
+        allow_stale: bool = False,
+    ) -> Optional[Tuple[Any, float, int]]:
+        """
+        Return (value, expires_at, size) or None. expires_at is a wall-clock
+        timestamp and size the uncompressed payload length. With allow_stale,
+        rows past their TTL but inside the stale grace period are returned
+        too (stale reads are not counted as hits or misses).
+        """
+        hit = self._lookup(key, namespace, allow_stale)
+        if hit is None:
+            return None
+        value, size = decode_value(hit[0])
+        return value, hit[1], size
+
+    def get_bytes(
+        self,
+        key: str,
+        namespace: str = "default",
+        allow_stale: bool = False,
+    ) -> Optional[Tuple[bytes, float, int]]:
+        """Like get() for entries written by set_bytes(): the bytes exactly as stored."""
+        hit = self._lookup(key, namespace, allow_stale)
+        if hit is None:
+            return None
+        data = zlib.decompress(hit[0])
+        return data, hit[1], len(data)
+
+    def _store(self, key: str, namespace: str, blob: bytes, ttl: float) -> None:
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO entries (key, namespace, value, size, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, namespace, blob, len(blob), now + ttl, now),
+        )
+
+    def set(self, key: str, value: Any, ttl: float, namespace: str = "default") -> None:
+        if ttl <= 0:
+            return
+        self._store(key, namespace, encode_value(value), ttl)
+
+    def set_bytes(self, key: str, data: bytes, ttl: float, namespace: str = "default") -> None:
+        """Store opaque bytes (compressed, not JSON-encoded); read them back with get_bytes()."""
+        if ttl <= 0:
+            return
+        self._store(key, namespace, zlib.compress(data, 6), ttl)
+
+    def flush_stats(self) -> None:
+        with self._counter_lock:
+            pending, self._counters = self._counters, {}
+
+        conn = self._conn()
+        for namespace, counters in pending.items():
+            conn.execute(
+                "INSERT INTO stats (namespace, hits, misses) VALUES (?, ?, ?) "
+                "ON CONFLICT(namespace) DO UPDATE SET "
+                "hits = hits + excluded.hits, misses = misses + excluded.misses",
+                (namespace, counters["hits"], counters["misses"]),
+            )
+
+    def compact(self) -> Dict[str, int]:
+        """Drop rows past their stale grace, evict LRU rows past max_bytes and reclaim free pages."""
+        self.flush_stats()
+        conn = self._conn()
+
+        expired = conn.execute(
+            "DELETE FROM entries WHERE expires_at <= ?",
+            (time.time() - self.stale_ttl,),
+        ).rowcount
+
+        evicted = 0
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total > self.max_bytes:
+            excess = total - self.max_bytes
+            freed = 0
+            victims = []
+            for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at"):
+                victims.append((key,))
+                freed += size
+                if freed >= excess:
+                    break
+            conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+            evicted = len(victims)
+
+        conn.execute("PRAGMA incremental_vacuum")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {"expired": expired, "evicted": evicted}
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        entries, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+
+        namespaces: Dict[str, Any] = {}
+        for namespace, hits, misses in conn.execute("SELECT namespace, hits, misses FROM stats"):
+            namespaces[namespace] = {"hits": hits, "misses": misses}
+        with self._counter_lock:
+            for namespace, counters in self._counters.items():
+                merged = namespaces.setdefault(namespace, {"hits": 0, "misses": 0})
+                merged["hits"] += counters["hits"]
+                merged["misses"] += counters["misses"]
+        for counters in namespaces.values():
+            lookups = counters["hits"] + counters["misses"]
+            counters["hit_ratio"] = round(counters["hits"] / lookups, 4) if lookups else None
+
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "namespaces": namespaces,
+        }
+
+
+_disk_cache: Optional[DiskCache] = None
+_disk_cache_lock = threading.Lock()
+
+
+def get_disk_cache() -> Optional[DiskCache]:
+    """Process-wide DiskCache, or None when UPSTREAM_CACHE_ENABLED is false."""
+    global _disk_cache
+    if not UPSTREAM_CACHE_ENABLED:
+        return None
+    with _disk_cache_lock:
+        if _disk_cache is None:
+            _disk_cache = DiskCache(
+                UPSTREAM_CACHE_PATH,
+                UPSTREAM_CACHE_MAX_BYTES,
+                stale_ttl=UPSTREAM_CACHE_STALE_TTL,
+            )
+    return _disk_cache
@@ -0,0 +1,148 @@
+import functools
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.irr import irr_batch
+
+# Dated cash flows and loan math. Schedules are built with closed-form
+# array expressions (no per-month Python loop) and memoized: the same few
+# loan products are priced over and over with identical terms.
+
+DAYS_PER_YEAR = 365.0
+
+
+def xirr(flows: Sequence[Tuple[date, float]], tolerance: float = 1e-9) -> Optional[float]:
+    """
+    Annual IRR for irregularly dated cash flows (Excel XIRR convention:
+    actual days / 365 from the earliest date). Same-day flows are netted.
+    Returns a fraction, or None when the flows have no IRR.
+    """
+    if len(flows) < 2:
+        return None
+    by_day: Dict[date, float] = {}
+    for day, amount in flows:
+        by_day[day] = by_day.get(day, 0.0) + amount
+    days = sorted(by_day)
+    start = days[0]
+    times = [(day - start).days / DAYS_PER_YEAR for day in days]
+    solved = irr_batch(np.array([[by_day[day] for day in days]]), tolerance=tolerance, times=times)
+    rate = solved["rate"][0]
+    if not solved["converged"][0] or not np.isfinite(rate):
+        return None
+    return float(rate)
+
+
+@functools.lru_cache(maxsize=1024)
+def amortization_schedule(
+    principal: float,
+    annual_rate_pct: float,
+    term_months: int,
+    io_months: int = 0,
+    balloon_month: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Monthly schedule as parallel arrays (month, payment, interest,
+    principal, balloon, balance), month 1..N; payment includes balloon.
+
+    io_months       interest-only months up front; the remaining
+                    term_months - io_months fully amortize the principal
+    balloon_month   the outstanding balance is paid with that month's
+                    payment and the schedule stops there
+
+    Balances come from the annuity closed form
+        B_k = P (1+i)^k - pmt ((1+i)^k - 1) / i
+    so the whole schedule is a handful of vector operations. The returned
+    arrays are shared through the cache and are read-only.
+    """
+    i = annual_rate_pct / 100 / 12
+    amortizing = term_months - io_months
+    last_month = min(balloon_month or term_months, term_months)
+
+    if amortizing > 0:
+        if i == 0:
+            level_payment = principal / amortizing
+        else:
+            level_payment = principal * i / (1 - (1 + i) ** -amortizing)
+    else:
+        level_payment = 0.0
+
+    month = np.arange(1, last_month + 1)
+    k = np.maximum(month - io_months, 0)  # amortizing payments made by month end
+    if i == 0:
+        balance = principal - level_payment * k
+    else:
+        growth = (1 + i) ** k
+        balance = principal * growth - level_payment * (growth - 1) / i
+    if amortizing <= 0:
+        balance = np.full(month.shape, float(principal))
+    balance = np.where(np.abs(balance) < 1e-6, 0.0, balance)
+
+    opening = np.concatenate([[principal], balance[:-1]])
+    interest = opening * i
+    payment = np.where(month <= io_months, interest, level_payment)
+    principal_paid = payment - interest
+
+    # balloon (or a non-amortizing loan reaching term): pay off what is left
+    balloon = np.zeros(month.shape)
+    balloon[-1] = balance[-1]
+    payment[-1] += balance[-1]
+    principal_paid[-1] += balance[-1]
+    balance[-1] = 0.0
+
+    schedule = {
+        "month": month,
+        "payment": payment,
+        "interest": interest,
+        "principal": principal_paid,
+        "balloon": balloon,
+        "balance": balance,
+    }
+    for values in schedule.values():
+        values.flags.writeable = False
+    return schedule
+
+
+def effective_debt_cost(
+    principal: float,
+    annual_rate_pct: float,
+    term_months: int,
+    io_months: int = 0,
+    balloon_month: Optional[int] = None,
+    points_pct: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    All-in cost of a loan from its schedule: the IRR of receiving the
+    principal net of points at t=0 and paying the scheduled payments
+    (balloon included). Points raise the cost above the note rate, and
+    more so the earlier the loan is repaid.
+    """
+    schedule = amortization_schedule(principal, annual_rate_pct, term_months, io_months, balloon_month)
+    payments = schedule["payment"]
+    net_proceeds = principal * (1 - points_pct / 100)
+
+    flows = np.concatenate([[-net_proceeds], payments])
+    solved = irr_batch(flows[None, :], tolerance=1e-10)
+    monthly = float(solved["rate"][0]) if solved["converged"][0] else np.nan
+
+    first_year = payments[:12]
+    return {
+        "monthly_rate_percent": None if np.isnan(monthly) else round(monthly * 100, 4),
+        "effective_annual_rate_percent": None if np.isnan(monthly) else round(((1 + monthly) ** 12 - 1) * 100, 4),
+        "nominal_annual_rate_percent": None if np.isnan(monthly) else round(monthly * 12 * 100, 4),
+        "points_cost": round(principal - net_proceeds, 2),
+        "first_year_debt_service": round(float(first_year.sum()), 2),
+        "total_interest": round(float(schedule["interest"].sum()), 2),
+        "balloon_payment": round(float(schedule["balloon"][-1]), 2),
+        "payoff_month": int(schedule["month"][-1]),
+    }
+
+
+def schedule_rows(schedule: Dict[str, np.ndarray]) -> List[Dict[str, float]]:
+    """Row-per-month view of a schedule, rounded to cents."""
+    columns = {name: np.round(values, 2).tolist() for name, values in schedule.items() if name != "month"}
+    return [
+        {"month": int(month), **{name: values[index] for name, values in columns.items()}}
+        for index, month in enumerate(schedule["month"])
+    ]
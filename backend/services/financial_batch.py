@@ -0,0 +1,229 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from services.irr import cash_flow_matrix, irr_batch, rates_to_percent
+
+# Array versions of the /financial-metrics calculations in main.py. Inputs
+# are equal-length float columns with NaN standing in for "not provided";
+# outputs are plain lists with None in the same places the scalar helpers
+# return None, so a row here matches a single /financial-metrics call.
+
+METRIC_COLUMNS = (
+    "irr_percent",
+    "irr_multiple_possible",
+    "return_on_cost_percent",
+    "cost_of_equity_percent_capm",
+    "cost_of_debt_percent",
+    "wacc_percent",
+    "irr_beats_wacc",
+)
+
+# column -> (lower bound, upper bound, bound is inclusive)
+COLUMN_BOUNDS = {
+    "initial_investment": (0.0, None, False),
+    "net_operating_income": (0.0, None, True),
+    "risk_free_rate": (0.0, None, True),
+    "beta": (0.0, None, True),
+    "market_return": (0.0, None, True),
+    "loan_amount": (0.0, None, True),
+    "annual_debt_service": (0.0, None, True),
+    "equity_value": (0.0, None, True),
+    "tax_rate": (0.0, 100.0, True),
+}
+
+
+def column(values: Optional[Sequence[Optional[float]]], size: int, default: Optional[float] = None) -> np.ndarray:
+    """List (None -> NaN) or a missing column (-> default everywhere) as a float array."""
+    if values is None:
+        return np.full(size, np.nan if default is None else default, dtype=float)
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def _present(values: np.ndarray) -> np.ndarray:
+    """Truthy in the scalar code's sense: provided and non-zero."""
+    return ~np.isnan(values) & (values != 0)
+
+
+def _to_list(values: np.ndarray) -> List[Optional[float]]:
+    values = np.asarray(values, dtype=float)
+    boxed = values.astype(object)
+    boxed[np.isnan(values)] = None
+    return boxed.tolist()
+
+
+def row_errors(columns: Dict[str, np.ndarray], cash_flows: Sequence[Sequence[float]]) -> Dict[int, List[Dict[str, Any]]]:
+    """Per-row field errors mirroring FinancialMetricsRequest's constraints."""
+    errors: Dict[int, List[Dict[str, Any]]] = {}
+
+    def flag(mask: np.ndarray, field: str, msg: str) -> None:
+        for index in np.flatnonzero(mask):
+            errors.setdefault(int(index), []).append({"field": field, "msg": msg})
+
+    required = ("initial_investment", "net_operating_income")
+    for name, (low, high, inclusive) in COLUMN_BOUNDS.items():
+        values = columns[name]
+        if name in required:
+            flag(np.isnan(values), name, "field required")
+        with np.errstate(invalid="ignore"):
+            below = values < low if inclusive else values <= low
+            flag(below, name, f"must be {'>=' if inclusive else '>'} {low:g}")
+            if high is not None:
+                flag(values > high, name, f"must be <= {high:g}")
+
+    empty = np.array([len(flows) == 0 for flows in cash_flows], dtype=bool)
+    flag(empty, "cash_flows", "at least one cash flow required")
+    return errors
+
+
+def evaluate_metrics(columns: Dict[str, np.ndarray], cash_flows: Sequence[Sequence[float]]) -> Dict[str, list]:
+    """IRR, return on cost, CAPM, cost of debt and WACC for every row at once."""
+    return evaluate_matrix(columns, cash_flow_matrix(columns["initial_investment"], cash_flows))
+
+
+def evaluate_matrix(columns: Dict[str, np.ndarray], matrix: np.ndarray) -> Dict[str, list]:
+    """
+    evaluate_metrics for a prebuilt cash-flow matrix (t=0 column included).
+    An optional cost_of_debt_percent column (schedule-based cost, NaN where
+    not given) replaces debt service / loan amount for its rows.
+    """
+    initial = columns["initial_investment"]
+    noi = columns["net_operating_income"]
+    rf, beta, rm = columns["risk_free_rate"], columns["beta"], columns["market_return"]
+    loan, debt_service = columns["loan_amount"], columns["annual_debt_service"]
+    equity, tax = columns["equity_value"], np.nan_to_num(columns["tax_rate"])
+
+    solved = irr_batch(matrix, tolerance=1e-6, max_iterations=1000)
+    irr = rates_to_percent(solved["rate"], solved["converged"])
+    irr_values = np.array([np.nan if v is None else v for v in irr], dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roc = np.where(initial > 0, np.round(noi / initial * 100, 4), np.nan)
+        coe = np.round(rf + beta * (rm - rf), 4)
+
+        has_debt = _present(loan) & _present(debt_service) & (loan > 0)
+        cod = np.where(has_debt, np.round(debt_service / loan * 100, 4), np.nan)
+        scheduled = columns.get("cost_of_debt_percent")
+        if scheduled is not None:
+            cod = np.where(np.isnan(scheduled), cod, scheduled)
+
+        total = equity + loan
+        has_wacc = ~np.isnan(equity) & _present(loan) & ~np.isnan(cod) & (total > 0)
+        wacc = np.where(
+            has_wacc,
+            np.round(equity / total * coe + loan / total * cod * (1 - tax / 100), 4),
+            np.nan,
+        )
+
+    comparable = ~np.isnan(irr_values) & ~np.isnan(wacc)
+    beats = [bool(b) if ok else None for b, ok in zip(irr_values > wacc, comparable)]
+
+    return {
+        "irr_percent": irr,
+        "irr_multiple_possible": (solved["sign_changes"] > 1).tolist(),
+        "return_on_cost_percent": _to_list(roc),
+        "cost_of_equity_percent_capm": _to_list(coe),
+        "cost_of_debt_percent": _to_list(cod),
+        "wacc_percent": _to_list(wacc),
+        "irr_beats_wacc": beats,
+    }
+
+
+# ─── Sensitivity grid ─────────────────────────────────────────────────────────
+
+# Driver names accepted by sensitivity_grid, with the frontend's defaults
+# (ChatPage.buildFinancialPayload). exit_cap_rate has no default: without
+# it the sale price is the deal's estimated value.
+SENSITIVITY_DEFAULTS = {
+    "hold_months": 12,
+    "vacancy_rate": 5.0,
+    "expense_rate": 35.0,
+    "sale_closing_cost_pct": 6.0,
+    "exit_cap_rate": None,
+}
+
+
+def sensitivity_grid(
+    deal: Dict[str, float],
+    drivers: Dict[str, Sequence[float]],
+    base: Dict[str, Optional[float]],
+    capital: Dict[str, Optional[float]],
+) -> Dict[str, Any]:
+    """
+    Every combination of the driver values (axes in the order given),
+    cash flows built the way buildFinancialPayload does it:
+
+        NOI       = rent * 12 * (1 - vacancy) * (1 - expense rate)
+        monthly   = NOI / 12 for hold_months months
+        sale      = (exit_cap_rate ? NOI / exit_cap_rate : estimated_value)
+                    * (1 - sale closing cost), added to the last month
+
+    The whole grid becomes one cash-flow matrix and goes through the batch
+    solver in a single call. The capital-stack metrics (CAPM, cost of debt,
+    WACC) do not depend on the drivers and are computed once.
+    """
+    names = list(drivers)
+    axes = [np.asarray(drivers[name], dtype=float) for name in names]
+    shape = tuple(len(axis) for axis in axes)
+    mesh = dict(zip(names, (grid.ravel() for grid in np.meshgrid(*axes, indexing="ij"))))
+    cells = int(np.prod(shape))
+
+    def driver(name: str) -> np.ndarray:
+        if name in mesh:
+            return mesh[name]
+        value = base.get(name)
+        if value is None:
+            value = SENSITIVITY_DEFAULTS[name]
+        return np.full(cells, np.nan if value is None else value, dtype=float)
+
+    hold = driver("hold_months").astype(int)
+    vacancy = driver("vacancy_rate") / 100
+    expenses = driver("expense_rate") / 100
+    closing = driver("sale_closing_cost_pct") / 100
+    exit_cap = driver("exit_cap_rate") / 100
+
+    basis = float(deal["total_basis"])
+    noi = deal["estimated_rent"] * 12 * (1 - vacancy) * (1 - expenses)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sale_price = np.where(np.isnan(exit_cap), deal["estimated_value"], noi / exit_cap)
+    proceeds = sale_price * (1 - closing)
+
+    periods = np.arange(hold.max() + 1)
+    matrix = np.where((periods >= 1) & (periods <= hold[:, None]), (noi / 12)[:, None], 0.0)
+    matrix[:, 0] = -abs(basis)
+    matrix[np.arange(cells), hold] += proceeds
+
+    columns = {
+        "initial_investment": np.full(cells, basis),
+        "net_operating_income": noi,
+        **{name: column([capital.get(name)] * cells, cells) for name in (
+            "risk_free_rate", "beta", "market_return", "loan_amount",
+            "annual_debt_service", "equity_value", "tax_rate",
+        )},
+    }
+    metrics = evaluate_matrix(columns, matrix)
+
+    irr = np.array([np.nan if v is None else v for v in metrics["irr_percent"]], dtype=float)
+    with np.errstate(invalid="ignore"):
+        annualized = np.round(((1 + irr / 100) ** 12 - 1) * 100, 4)
+
+    def surface(values: Sequence[Any]) -> list:
+        return np.array(values, dtype=object).reshape(shape).tolist()
+
+    return {
+        "axes": [{"driver": name, "values": list(drivers[name])} for name in names],
+        "shape": list(shape),
+        "surfaces": {
+            "irr_percent": surface(metrics["irr_percent"]),
+            "irr_annualized_percent": surface(_to_list(annualized)),
+            "return_on_cost_percent": surface(metrics["return_on_cost_percent"]),
+            "irr_beats_wacc": surface(metrics["irr_beats_wacc"]),
+            "net_operating_income": surface(np.round(noi, 2).tolist()),
+            "net_sale_proceeds": surface(_to_list(np.round(proceeds, 2))),
+        },
+        "capital": {
+            "cost_of_equity_percent_capm": metrics["cost_of_equity_percent_capm"][0],
+            "cost_of_debt_percent": metrics["cost_of_debt_percent"][0],
+            "wacc_percent": metrics["wacc_percent"][0],
+        },
+    }
@@ -0,0 +1,146 @@
+import asyncio
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
+
+import httpx
+
+from services.rate_limit import RateLimitExceeded, get_limiter
+
+# Pool sizing and timeouts are read once at import so every worker process
+# shares the same settings; override them from backend.env when tuning.
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "200"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "50"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "20"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+
+# Retries apply to idempotent methods only, on throttling, gateway errors
+# and transport failures. Delays use full-jitter exponential backoff unless
+# the upstream sends Retry-After.
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.25"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "4"))
+
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def build_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(
+        HTTP_READ_TIMEOUT,
+        connect=HTTP_CONNECT_TIMEOUT,
+        pool=HTTP_POOL_TIMEOUT,
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+async def start_client() -> httpx.AsyncClient:
+    """
+    Open the process-wide client. Called from the FastAPI lifespan so the
+    connection pool (and its keep-alive sockets) lives as long as the app.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_client()
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Return the shared client. Falls back to lazily creating one so helpers
+    still work when the app is driven without its lifespan (scripts, REPL).
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_client()
+    return _client
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int) -> float:
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+
+async def request_with_retry(
+    upstream: str,
+    method: str,
+    url: str,
+    max_retries: Optional[int] = None,
+    **kwargs: Any,
+) -> httpx.Response:
+    """
+    Send a request through the shared client, gated by the upstream's token
+    bucket. Raises RateLimitExceeded when the call would queue past the
+    bucket's wait budget, including when a Retry-After is longer than that
+    budget. The last response (or transport error) is returned/raised once
+    retries are exhausted.
+    """
+    limiter = get_limiter(upstream)
+    retries = HTTP_MAX_RETRIES if max_retries is None else max_retries
+    if method.upper() not in IDEMPOTENT_METHODS:
+        retries = 0
+
+    attempt = 0
+    while True:
+        if limiter is not None:
+            await limiter.acquire()
+
+        try:
+            response = await get_client().request(method, url, **kwargs)
+        except httpx.TransportError:
+            if attempt >= retries:
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+            continue
+
+        if response.status_code not in RETRYABLE_STATUS_CODES:
+            return response
+
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        delay = retry_after if retry_after is not None else backoff_delay(attempt)
+        if response.status_code == 429 and limiter is not None:
+            # Everyone sharing this bucket backs off, not just this caller;
+            # the next acquire() waits the pause out or sheds the call.
+            limiter.pause(delay)
+
+        if attempt >= retries:
+            return response
+
+        if response.status_code == 429 and limiter is not None:
+            if delay > limiter.max_wait:
+                raise RateLimitExceeded(upstream, delay)
+        else:
+            await asyncio.sleep(delay)
+        attempt += 1
@@ -0,0 +1,277 @@
+import functools
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# NPV is evaluated in one of two equivalent forms so the powers never
+# overflow: for r >= 0 as sum(c_t * x**t) with x = 1/(1+r) (present value);
+# for -1 < r < 0 as sum(c_t * y**(T-t)) with y = 1+r (future value at the
+# last non-zero flow T). Both have the same sign and the same roots.
+# Times default to 0, 1, 2, ... periods; XIRR passes year fractions.
+
+RATE_FLOOR = -0.9999
+# Upper probes for the bracket on conventional series (rates per period).
+# Past the last one the ceiling keeps growing by BRACKET_GROWTH until the
+# NPV sign flips or BRACKET_LIMIT is reached.
+BRACKET_CEILINGS = (1.0, 10.0, 100.0, 1e4, 1e6)
+BRACKET_GROWTH = 100.0
+BRACKET_LIMIT = 1e300
+# Scan grid for series with several sign changes (possible multiple IRRs).
+ROOT_SCAN_GRID = np.unique(np.concatenate([
+    -1 + np.geomspace(1 + RATE_FLOOR, 1, 60),
+    -np.geomspace(1e-5, 0.5, 60),
+    [0.0],
+    np.geomspace(1e-5, 10, 120),
+]))
+
+
+def cash_flow_matrix(
+    initial_investments: Sequence[float],
+    cash_flows: Sequence[Sequence[float]],
+) -> np.ndarray:
+    """
+    One row per series: [-|initial|, cf_1, ..., cf_n], right-padded with
+    zeros to the longest series (trailing zeros do not move the IRR).
+    """
+    width = 1 + max((len(flows) for flows in cash_flows), default=0)
+    matrix = np.zeros((len(cash_flows), width))
+    for row, (initial, flows) in enumerate(zip(initial_investments, cash_flows)):
+        matrix[row, 0] = -abs(initial)
+        matrix[row, 1:1 + len(flows)] = flows
+    return matrix
+
+
+def sign_changes(flows: np.ndarray) -> np.ndarray:
+    """Sign changes per row, ignoring zeros; >1 means more than one IRR is possible."""
+    signs = np.sign(flows)
+    periods = np.arange(flows.shape[1])
+    last_nonzero = np.maximum.accumulate(np.where(signs != 0, periods, 0), axis=1)
+    filled = np.take_along_axis(signs, last_nonzero, axis=1)
+    return (filled[:, 1:] * filled[:, :-1] < 0).sum(axis=1)
+
+
+def _last_nonzero_period(flows: np.ndarray) -> np.ndarray:
+    nonzero = flows != 0
+    return flows.shape[1] - 1 - np.argmax(nonzero[:, ::-1], axis=1)
+
+
+def _npv_and_slope(rates: np.ndarray, flows: np.ndarray, last: np.ndarray, periods: np.ndarray):
+    """
+    Scaled NPV and its derivative for each row at its own rate. The power
+    matrix is computed once and shared by both sums.
+    """
+    present = rates >= 0
+    base = np.where(present, 1 / (1 + rates), 1 + rates)
+    if present.all():
+        # common case: every row shares the exponent vector
+        exponents = periods
+    else:
+        exponents = np.where(
+            present[:, None],
+            periods[None, :],
+            np.maximum(last[:, None] - periods[None, :], 0),
+        )
+    with np.errstate(over="ignore", under="ignore", invalid="ignore", divide="ignore"):
+        powers = np.exp(np.log(base)[:, None] * exponents)
+        weighted = flows * powers
+        npv = weighted.sum(axis=1)
+        if exponents is periods:
+            moment = weighted @ periods
+        else:
+            moment = (weighted * exponents).sum(axis=1)
+        slope = moment * np.where(present, -base, 1 / base)
+    return npv, slope
+
+
+def _npv_sign(rate: float, flows: np.ndarray, last: np.ndarray, periods: np.ndarray) -> np.ndarray:
+    npv, _ = _npv_and_slope(np.full(flows.shape[0], rate), flows, last, periods)
+    return np.sign(npv)
+
+
+def _bracket_ceilings():
+    yield from BRACKET_CEILINGS
+    ceiling = BRACKET_CEILINGS[-1] * BRACKET_GROWTH
+    while ceiling <= BRACKET_LIMIT:
+        yield ceiling
+        ceiling *= BRACKET_GROWTH
+
+
+def _conventional_brackets(flows: np.ndarray, last: np.ndarray, periods: np.ndarray):
+    lo = np.full(flows.shape[0], RATE_FLOOR)
+    hi = np.full(flows.shape[0], np.nan)
+    lo_sign = _npv_sign(RATE_FLOOR, flows, last, periods)
+    for ceiling in _bracket_ceilings():
+        open_rows = np.flatnonzero(np.isnan(hi))
+        if not open_rows.size:
+            break
+        crossed = _npv_sign(ceiling, flows[open_rows], last[open_rows], periods) * lo_sign[open_rows] < 0
+        hi[open_rows[crossed]] = ceiling
+    return lo, hi
+
+
+@functools.lru_cache(maxsize=64)
+def _scan_powers(times: Tuple[float, ...]) -> np.ndarray:
+    """(len(times), len(ROOT_SCAN_GRID)) discount/growth factors, shared by every series on these times."""
+    periods = np.array(times)
+    negative = ROOT_SCAN_GRID < 0
+    with np.errstate(over="ignore", under="ignore"):
+        powers = np.where(
+            negative[None, :],
+            (1 + ROOT_SCAN_GRID)[None, :] ** (periods[-1] - periods)[:, None],
+            (1 / (1 + ROOT_SCAN_GRID))[None, :] ** periods[:, None],
+        )
+    powers.flags.writeable = False
+    return powers
+
+
+def _scan_brackets(flows: np.ndarray, periods: np.ndarray):
+    """
+    Evaluate NPV at every ROOT_SCAN_GRID rate for every row with a single
+    matrix product, count the sign changes (distinct IRRs found) and keep
+    the bracket closest to a 0% rate. Negative rates use the future-value
+    form at the common last column; terms that underflow there read as 0
+    and are skipped like any other zero.
+    """
+    rows = flows.shape[0]
+    signs = np.sign(flows @ _scan_powers(tuple(periods.tolist())))
+
+    lo = np.full(rows, np.nan)
+    hi = np.full(rows, np.nan)
+    best = np.full(rows, np.inf)
+    roots = np.zeros(rows, dtype=int)
+    previous = signs[:, 0]
+    previous_rate = np.full(rows, ROOT_SCAN_GRID[0])
+    for column, rate in enumerate(ROOT_SCAN_GRID[1:], start=1):
+        current = signs[:, column]
+        # zeros keep the previous sign, so a root sitting exactly on a grid
+        # point is counted once, bracketed by its non-zero neighbours
+        crossed = previous * current < 0
+        roots += crossed
+        distance = np.minimum(np.abs(previous_rate), abs(rate))
+        closer = crossed & (distance < best)
+        lo[closer], hi[closer], best[closer] = previous_rate[closer], rate, distance[closer]
+        nonzero = current != 0
+        previous = np.where(nonzero, current, previous)
+        previous_rate = np.where(nonzero, rate, previous_rate)
+    return lo, hi, roots
+
+
+def irr_batch(
+    flows: np.ndarray,
+    tolerance: float = 1e-10,
+    max_iterations: int = 100,
+    times: Optional[Sequence[float]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Solve the periodic IRR of every row of a 2-D cash-flow array in one pass.
+    Column j sits at period j, or at times[j] (shared by all rows) when given,
+    e.g. year fractions for XIRR.
+
+    Each row gets a bracket [lo, hi] with NPV of opposite signs, then a
+    safeguarded Newton iteration runs on all rows together: a Newton step
+    is taken when it stays strictly inside the bracket, otherwise the
+    bracket is bisected, and the bracket shrinks on every iteration so
+    convergence is guaranteed.
+
+    Returns arrays of
+        rate        periodic IRR as a fraction (nan where none exists)
+        converged   rate is within tolerance
+        sign_changes / multiple_irr
+                    more than one sign change means NPV can cross zero
+                    several times; for those rows the rate nearest 0% is
+                    returned and root_count holds how many were found
+        root_count
+    """
+    flows = np.atleast_2d(np.asarray(flows, dtype=float))
+    rows = flows.shape[0]
+    changes = sign_changes(flows)
+    periods = np.arange(flows.shape[1], dtype=float) if times is None else np.asarray(times, dtype=float)
+    last = periods[_last_nonzero_period(flows)]
+
+    lo = np.full(rows, np.nan)
+    hi = np.full(rows, np.nan)
+    root_count = np.where(changes == 1, 1, 0)
+
+    conventional = changes == 1
+    if conventional.any():
+        lo[conventional], hi[conventional] = _conventional_brackets(flows[conventional], last[conventional], periods)
+        root_count[conventional & np.isnan(hi)] = 0
+
+    multiple = changes > 1
+    if multiple.any():
+        lo[multiple], hi[multiple], root_count[multiple] = _scan_brackets(flows[multiple], periods)
+
+    solvable = ~np.isnan(lo) & ~np.isnan(hi)
+    rate = np.full(rows, np.nan)
+    converged = np.zeros(rows, dtype=bool)
+
+    if solvable.any():
+        sub_flows, sub_last = flows[solvable], last[solvable]
+        a, b = lo[solvable], hi[solvable]
+        fa, _ = _npv_and_slope(a, sub_flows, sub_last, periods)
+
+        # Seed near 10% annualised, scaled to the series length (as before).
+        seed = 0.1 / np.maximum(sub_last, 1)
+        x = np.where((seed > a) & (seed < b), seed, (a + b) / 2)
+        x = np.where(a == b, a, x)
+        active = a != b
+        done = ~active
+
+        for _ in range(max_iterations):
+            # only rows still iterating are evaluated
+            rows_left = np.flatnonzero(active)
+            if rows_left.size == 0:
+                break
+            xs, a_s, b_s, fa_s = x[rows_left], a[rows_left], b[rows_left], fa[rows_left]
+            f, slope = _npv_and_slope(xs, sub_flows[rows_left], sub_last[rows_left], periods)
+            root_hit = f == 0
+
+            same_side = np.sign(f) == np.sign(fa_s)
+            a_s = np.where(same_side, xs, a_s)
+            fa_s = np.where(same_side, f, fa_s)
+            b_s = np.where(same_side, b_s, xs)
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                newton = xs - f / slope
+            inside = np.isfinite(newton) & (newton > np.minimum(a_s, b_s)) & (newton < np.maximum(a_s, b_s))
+            stepped = np.where(inside, newton, (a_s + b_s) / 2)
+
+            finished = root_hit | (np.abs(stepped - xs) <= tolerance * (1 + np.abs(xs))) | (np.abs(b_s - a_s) <= tolerance)
+            x[rows_left] = np.where(root_hit, xs, stepped)
+            a[rows_left], b[rows_left], fa[rows_left] = a_s, b_s, fa_s
+            done[rows_left[finished]] = True
+            active[rows_left[finished]] = False
+
+        rate[solvable] = x
+        converged[solvable] = done
+
+    return {
+        "rate": rate,
+        "converged": converged,
+        "sign_changes": changes,
+        "multiple_irr": root_count > 1,
+        "root_count": root_count,
+    }
+
+
+def irr(
+    initial_investment: float,
+    cash_flows: Sequence[float],
+    tolerance: float = 1e-10,
+    max_iterations: int = 100,
+) -> Dict[str, Any]:
+    """Single-series convenience wrapper around irr_batch."""
+    result = irr_batch(cash_flow_matrix([initial_investment], [cash_flows]), tolerance, max_iterations)
+    rate = result["rate"][0]
+    return {
+        "rate": None if np.isnan(rate) or not result["converged"][0] else float(rate),
+        "multiple_irr": bool(result["multiple_irr"][0]),
+        "root_count": int(result["root_count"][0]),
+    }
+
+
+def rates_to_percent(rates: np.ndarray, converged: np.ndarray, digits: int = 4) -> List[Optional[float]]:
+    """Fractional rates -> rounded percentages, None where unsolved (the calculate_irr contract)."""
+    percent = np.round(np.asarray(rates, dtype=float) * 100, digits).astype(object)
+    percent[~(np.asarray(converged) & np.isfinite(rates))] = None
+    return percent.tolist()
@@ -0,0 +1,446 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from services.logging_config import get_logger
+
+# Durable background jobs with no broker: job rows live in a local SQLite
+# file (WAL, shared by every uvicorn worker on the box) and each process
+# runs a few async workers that claim rows from it. A claim is a lease
+# that the running worker keeps renewing; a job whose lease runs out (its
+# process died) is claimed again, so nothing is lost on a crash. A clean
+# shutdown hands its running jobs back at once instead.
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_LEASE = float(os.getenv("JOB_LEASE", "60"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+JOB_RETRY_BASE = float(os.getenv("JOB_RETRY_BASE", "5"))
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", str(7 * 24 * 3600)))
+
+# claimed lowest first
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+logger = get_logger("jobs")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    progress TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    run_after REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority, run_after);
+CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at);
+"""
+
+_COLUMNS = (
+    "id, kind, priority, status, payload, result, error, progress, attempts, max_attempts, "
+    "cancel_requested, created_at, run_after, started_at, finished_at, lease_until"
+)
+
+
+class JobError(Exception):
+    """A failure retrying will not fix (bad payload, missing data): the job fails at once."""
+
+
+def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+    job = dict(row)
+    for field in ("payload", "result", "progress"):
+        if job[field] is not None:
+            job[field] = json.loads(job[field])
+    job["priority"] = next(name for name, rank in PRIORITIES.items() if rank == job["priority"])
+    job["cancel_requested"] = bool(job["cancel_requested"])
+    return job
+
+
+class JobStore:
+    """
+    The jobs table. Methods are synchronous; call them through
+    asyncio.to_thread from async code. Status moves queued -> running ->
+    done | failed | cancelled, and back to queued for a retry.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, kind: str, payload: Any, priority: str = "normal", max_attempts: int = 3) -> Dict[str, Any]:
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        self._conn().execute(
+            "INSERT INTO jobs (id, kind, priority, status, payload, max_attempts, created_at, run_after) "
+            "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+            (job_id, kind, PRIORITIES[priority], json.dumps(payload, separators=(",", ":")), max_attempts, now, now),
+        )
+        return self.get(job_id)
+
+    def claim(self, kinds: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Atomically take the next runnable job: queued and due, or running
+        with an expired lease (its worker died) and attempts left. Highest
+        priority first, then oldest. Expired jobs that were asked to cancel
+        are marked cancelled, and ones that already used their last attempt
+        failed, instead of being run again.
+
+        The claimed job's attempts is the worker's lease token: renew,
+        complete, fail, mark_cancelled and requeue only touch the row while
+        it is still running under that attempt.
+        """
+        now = time.time()
+        conn = self._conn()
+        placeholders = ",".join("?" * len(kinds))
+        expired = f"kind IN ({placeholders}) AND status = 'running' AND lease_until < ?"
+        conn.execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ?, lease_until = NULL "
+            f"WHERE {expired} AND cancel_requested = 1",
+            (now, *kinds, now),
+        )
+        exhausted = conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'lease expired on the last attempt', "
+            "finished_at = ?, lease_until = NULL "
+            f"WHERE {expired} AND attempts >= max_attempts "
+            "RETURNING id, kind, attempts",
+            (now, *kinds, now),
+        ).fetchall()
+        for job_id, kind, attempts in exhausted:
+            logger.warning("job lease expired on its last attempt", extra={"fields": {
+                "job_id": job_id, "kind": kind, "attempt": attempts, "status": "failed",
+            }})
+        row = conn.execute(
+            f"UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, lease_until = ? "
+            f"WHERE id = (SELECT id FROM jobs WHERE kind IN ({placeholders}) AND cancel_requested = 0 AND ("
+            "(status = 'queued' AND run_after <= ?) "
+            "OR (status = 'running' AND lease_until < ? AND attempts < max_attempts)"
+            ") ORDER BY priority, run_after LIMIT 1) "
+            f"RETURNING {_COLUMNS}",
+            (now, now + JOB_LEASE, *kinds, now, now),
+        ).fetchone()
+        return _row_to_job(row) if row is not None else None
+
+    def renew(self, job_id: str, attempt: int, progress: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Extend a running job's lease (and store progress). Returns True when
+        the worker should stop: cancellation was requested, or the lease is
+        no longer this attempt's.
+        """
+        row = self._conn().execute(
+            "UPDATE jobs SET lease_until = ?, progress = COALESCE(?, progress) "
+            "WHERE id = ? AND status = 'running' AND attempts = ? RETURNING cancel_requested",
+            (
+                time.time() + JOB_LEASE,
+                json.dumps(progress, separators=(",", ":")) if progress is not None else None,
+                job_id,
+                attempt,
+            ),
+        ).fetchone()
+        return row is None or bool(row[0])
+
+    def complete(self, job_id: str, attempt: int, result: Any, progress: Optional[Dict[str, Any]] = None) -> bool:
+        """Record the result. Returns False (and writes nothing) if the lease was lost."""
+        return self._conn().execute(
+            "UPDATE jobs SET status = 'done', result = ?, progress = COALESCE(?, progress), error = NULL, "
+            "finished_at = ?, lease_until = NULL WHERE id = ? AND status = 'running' AND attempts = ?",
+            (
+                json.dumps(result, separators=(",", ":")),
+                json.dumps(progress, separators=(",", ":")) if progress is not None else None,
+                time.time(),
+                job_id,
+                attempt,
+            ),
+        ).rowcount == 1
+
+    def fail(self, job_id: str, attempt: int, error: str, retry: bool) -> str:
+        """
+        Record a failed attempt; requeue with exponential backoff while
+        attempts remain. Returns the new status, or "lost" (nothing written)
+        if the lease was lost.
+        """
+        conn = self._conn()
+        held = "id = ? AND status = 'running' AND attempts = ?"
+        row = conn.execute(f"SELECT max_attempts FROM jobs WHERE {held}", (job_id, attempt)).fetchone()
+        if row is None:
+            return "lost"
+        now = time.time()
+        if retry and attempt < row[0]:
+            updated = conn.execute(
+                f"UPDATE jobs SET status = 'queued', error = ?, run_after = ?, lease_until = NULL WHERE {held}",
+                (error, now + JOB_RETRY_BASE * 2 ** (attempt - 1), job_id, attempt),
+            )
+            return "queued" if updated.rowcount == 1 else "lost"
+        updated = conn.execute(
+            f"UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, lease_until = NULL WHERE {held}",
+            (error, now, job_id, attempt),
+        )
+        return "failed" if updated.rowcount == 1 else "lost"
+
+    def mark_cancelled(self, job_id: str, attempt: int) -> None:
+        self._conn().execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ?, lease_until = NULL "
+            "WHERE id = ? AND status = 'running' AND attempts = ?",
+            (time.time(), job_id, attempt),
+        )
+
+    def requeue(self, job_id: str, attempt: int) -> None:
+        """
+        Hand back a job interrupted by shutdown: queued again, due now, and
+        the interrupted attempt not counted (cancelled instead if that was
+        requested).
+        """
+        now = time.time()
+        self._conn().execute(
+            "UPDATE jobs SET "
+            "status = CASE WHEN cancel_requested THEN 'cancelled' ELSE 'queued' END, "
+            "finished_at = CASE WHEN cancel_requested THEN ? ELSE NULL END, "
+            "attempts = CASE WHEN cancel_requested THEN attempts ELSE attempts - 1 END, "
+            "run_after = ?, lease_until = NULL "
+            "WHERE id = ? AND status = 'running' AND attempts = ?",
+            (now, now, job_id, attempt),
+        )
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Queued jobs are cancelled outright; running ones are flagged and
+        stopped by their worker at its next lease renewal.
+        """
+        conn = self._conn()
+        conn.execute(
+            "UPDATE jobs SET status = 'cancelled', cancel_requested = 1, finished_at = ? "
+            "WHERE id = ? AND status = 'queued'",
+            (time.time(), job_id),
+        )
+        conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row is not None else None
+
+    def list(self, status: Optional[str] = None, kind: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Newest first, without payloads or results."""
+        where, args = [], []
+        if status:
+            where.append("status = ?")
+            args.append(status)
+        if kind:
+            where.append("kind = ?")
+            args.append(kind)
+        sql = f"SELECT {_COLUMNS} FROM jobs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        rows = self._conn().execute(f"{sql} ORDER BY created_at DESC LIMIT ?", (*args, limit)).fetchall()
+        jobs = [_row_to_job(row) for row in rows]
+        for job in jobs:
+            del job["payload"], job["result"]
+        return jobs
+
+    def prune(self, retention: float) -> int:
+        """Delete finished jobs older than retention seconds."""
+        return self._conn().execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND finished_at < ?",
+            (time.time() - retention,),
+        ).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        counts = {status: 0 for status in ("queued", "running", "done", "failed", "cancelled")}
+        for status, count in self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+            counts[status] = count
+        return {"path": self.path, "jobs": counts}
+
+
+class JobContext:
+    """What a handler gets besides its payload."""
+
+    def __init__(self, job: Dict[str, Any], executor: Callable[[], Executor]):
+        self.job = job
+        self.progress: Optional[Dict[str, Any]] = None
+        self._executor = executor
+
+    def report(self, **progress: Any) -> None:
+        """Progress to store with the next lease renewal, e.g. report(done=10, total=200)."""
+        self.progress = progress
+
+    async def run_cpu(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a picklable CPU-bound function on the process pool."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor(), fn, *args)
+
+
+Handler = Callable[[Dict[str, Any], JobContext], Awaitable[Any]]
+
+
+class JobWorkers:
+    """
+    `workers` async loops in this process, each claiming one job at a time
+    for the registered kinds. enqueue() wakes an idle local worker at once;
+    jobs queued by other processes are picked up within poll_interval.
+    """
+
+    def __init__(self, store: JobStore, executor: Callable[[], Executor], workers: int, poll_interval: float):
+        self.store = store
+        self.executor = executor
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.handlers: Dict[str, Handler] = {}
+        self._tasks: List["asyncio.Task[None]"] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self.running: Dict[str, "asyncio.Task[Any]"] = {}
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+
+    def register(self, kind: str, handler: Handler) -> None:
+        self.handlers[kind] = handler
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._loop()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._prune_periodically()))
+
+    async def stop(self) -> None:
+        """Stop the loops. Interrupted jobs are requeued without counting the attempt."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, kind: str, payload: Any, priority: str = "normal", max_attempts: int = 3) -> Dict[str, Any]:
+        job = await asyncio.to_thread(self.store.enqueue, kind, payload, priority, max_attempts)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = await asyncio.to_thread(self.store.cancel, job_id)
+        task = self.running.get(job_id)
+        if task is not None:
+            task.cancel()
+        return job
+
+    async def _prune_periodically(self) -> None:
+        while True:
+            try:
+                pruned = await asyncio.to_thread(self.store.prune, JOB_RETENTION)
+                if pruned:
+                    logger.info("finished jobs pruned", extra={"fields": {"jobs": pruned}})
+            except Exception:
+                logger.exception("job prune failed")
+            await asyncio.sleep(3600)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                job = await asyncio.to_thread(self.store.claim, list(self.handlers))
+            except Exception:
+                logger.exception("job claim failed")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        job_id, attempt = job["id"], job["attempts"]
+        context = JobContext(job, self.executor)
+        task = asyncio.create_task(self.handlers[job["kind"]](job["payload"], context))
+        self.running[job_id] = task
+        started = time.perf_counter()
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=JOB_LEASE / 3)
+                if done:
+                    break
+                if await asyncio.to_thread(self.store.renew, job_id, attempt, context.progress):
+                    task.cancel()
+            result = task.result()
+        except asyncio.CancelledError:
+            if task.cancelled():
+                await asyncio.to_thread(self.store.mark_cancelled, job_id, attempt)
+                logger.info("job cancelled", extra={"fields": {"job_id": job_id, "kind": job["kind"]}})
+                return
+            # shutting down: hand the job back instead of letting its lease run out
+            task.cancel()
+            try:
+                await asyncio.to_thread(self.store.requeue, job_id, attempt)
+            except Exception:
+                logger.exception("job requeue failed")
+            logger.info("job requeued on shutdown", extra={"fields": {"job_id": job_id, "kind": job["kind"]}})
+            raise
+        except Exception as exc:
+            retry = not isinstance(exc, JobError)
+            status = await asyncio.to_thread(self.store.fail, job_id, attempt, f"{type(exc).__name__}: {exc}", retry)
+            if status == "queued":
+                self.retried += 1
+            elif status == "failed":
+                self.failed += 1
+            logger.warning("job attempt failed", exc_info=not isinstance(exc, JobError), extra={"fields": {
+                "job_id": job_id, "kind": job["kind"], "attempt": job["attempts"], "status": status,
+            }})
+            return
+        finally:
+            self.running.pop(job_id, None)
+
+        if not await asyncio.to_thread(self.store.complete, job_id, attempt, result, context.progress):
+            logger.warning("job finished after losing its lease", extra={"fields": {"job_id": job_id, "kind": job["kind"]}})
+            return
+        self.completed += 1
+        logger.info("job done", extra={"fields": {
+            "job_id": job_id, "kind": job["kind"], "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": len(self.running),
+            "kinds": sorted(self.handlers),
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+        }
+
+
+_job_store: Optional[JobStore] = None
+_job_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """Process-wide JobStore at JOB_DB_PATH."""
+    global _job_store
+    with _job_store_lock:
+        if _job_store is None:
+            _job_store = JobStore(JOB_DB_PATH)
+    return _job_store
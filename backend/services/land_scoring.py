@@ -0,0 +1,142 @@
+from datetime import date
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.parcel_index import is_absentee
+
+# Motivated-seller scoring for compact land records. Records are turned into
+# columns once; every feature is then a whole-array expression scaled to
+# [0, 1], and the score is their weighted mean on a 0-100 scale. Features
+# that cannot be computed for a record (missing data) score 0.
+
+SCORE_FEATURES = (
+    "absentee_owner",           # mailing address differs from the parcel
+    "out_of_state_owner",       # mailing state differs from the parcel's
+    "corporate_owner",          # ownerType Organization
+    "not_owner_occupied",
+    "years_since_sale",         # saturates at YEARS_SINCE_SALE_CAP
+    "lot_size_vs_zip_median",   # lot / zip median, saturates at LOT_RATIO_CAP
+)
+
+DEFAULT_SCORE_WEIGHTS = {
+    "absentee_owner": 3.0,
+    "out_of_state_owner": 2.0,
+    "corporate_owner": 1.0,
+    "not_owner_occupied": 1.0,
+    "years_since_sale": 2.0,
+    "lot_size_vs_zip_median": 1.0,
+}
+
+YEARS_SINCE_SALE_CAP = 20.0
+LOT_RATIO_CAP = 3.0
+
+
+def score_weights(overrides: Optional[Mapping[str, float]]) -> Dict[str, float]:
+    """DEFAULT_SCORE_WEIGHTS with caller overrides; raises ValueError on unknown or negative weights."""
+    weights = dict(DEFAULT_SCORE_WEIGHTS)
+    for name, weight in (overrides or {}).items():
+        if name not in weights:
+            raise ValueError(f"unknown score feature: {name}")
+        if weight < 0:
+            raise ValueError(f"score weight for {name} must be >= 0")
+        weights[name] = float(weight)
+    if not any(weights.values()):
+        raise ValueError("at least one score weight must be positive")
+    return weights
+
+
+def _float_column(records: Sequence[Dict[str, Any]], field: str) -> np.ndarray:
+    return np.array([np.nan if r.get(field) is None else r[field] for r in records], dtype=float)
+
+
+def _day(value: Any) -> np.datetime64:
+    """An ISO date(-time) string as a day; anything else, or malformed, is NaT."""
+    if isinstance(value, str) and value:
+        try:
+            return np.datetime64(value[:10], "D")
+        except ValueError:
+            pass
+    return np.datetime64("NaT", "D")
+
+
+def _date_column(records: Sequence[Dict[str, Any]], field: str) -> np.ndarray:
+    return np.array([_day(r.get(field)) for r in records], dtype="datetime64[D]")
+
+
+def sample_medians(zip_codes: np.ndarray, lot_sizes: np.ndarray) -> Dict[str, float]:
+    """Median lot size per zip over the records at hand (fallback when the index has no stats)."""
+    medians: Dict[str, float] = {}
+    known = ~np.isnan(lot_sizes)
+    for zip_code in np.unique(zip_codes[known]):
+        medians[str(zip_code)] = float(np.median(lot_sizes[known & (zip_codes == zip_code)]))
+    return medians
+
+
+def score_records(
+    records: Sequence[Dict[str, Any]],
+    weights: Mapping[str, float],
+    zip_medians: Mapping[str, Optional[float]],
+    today: Optional[date] = None,
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    (scores, features) for the records, in input order. zip_medians maps
+    zip -> median lot size; zips missing from it use the median of their
+    records here.
+    """
+    count = len(records)
+    if count == 0:
+        return np.zeros(0), {name: np.zeros(0) for name in SCORE_FEATURES}
+    today = today or date.today()
+
+    zip_codes = np.array([r.get("zipCode") or "" for r in records], dtype=object)
+    lot_sizes = _float_column(records, "lotSize")
+    state = np.array([(r.get("state") or "").upper() for r in records], dtype=object)
+    mailing_state = np.array([(r.get("mailingState") or "").upper() for r in records], dtype=object)
+    owner_type = np.array([r.get("ownerType") or "" for r in records], dtype=object)
+    owner_occupied = np.array([r.get("ownerOccupied") is False for r in records])
+    absentee = np.array([bool(r["absentee"] if "absentee" in r else is_absentee(r)) for r in records])
+    sale_dates = _date_column(records, "lastSaleDate")
+
+    medians = {**sample_medians(zip_codes, lot_sizes), **{k: v for k, v in zip_medians.items() if v}}
+    median_lot = np.array([medians.get(code, np.nan) for code in zip_codes], dtype=float)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        years = (np.datetime64(today, "D") - sale_dates).astype(float) / 365.25
+        lot_ratio = lot_sizes / median_lot
+
+    features = {
+        "absentee_owner": absentee.astype(float),
+        "out_of_state_owner": ((mailing_state != "") & (state != "") & (mailing_state != state)).astype(float),
+        "corporate_owner": (owner_type == "Organization").astype(float),
+        "not_owner_occupied": owner_occupied.astype(float),
+        "years_since_sale": np.nan_to_num(np.clip(years / YEARS_SINCE_SALE_CAP, 0, 1)),
+        "lot_size_vs_zip_median": np.nan_to_num(np.clip(lot_ratio / LOT_RATIO_CAP, 0, 1)),
+    }
+
+    names = list(SCORE_FEATURES)
+    weight_vector = np.array([weights.get(name, 0.0) for name in names])
+    matrix = np.column_stack([features[name] for name in names])
+    scores = matrix @ weight_vector / weight_vector.sum() * 100
+    return scores, features
+
+
+def rank_records(
+    records: List[Dict[str, Any]],
+    weights: Mapping[str, float],
+    zip_medians: Mapping[str, Optional[float]],
+    today: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """Copies of the records with score and score_features, highest score first (stable)."""
+    scores, features = score_records(records, weights, zip_medians, today)
+    order = np.argsort(-scores, kind="stable")
+    rounded_scores = np.round(scores, 2).tolist()
+    rounded = {name: np.round(values, 4).tolist() for name, values in features.items()}
+    return [
+        {
+            **records[index],
+            "score": rounded_scores[index],
+            "score_features": {name: values[index] for name, values in rounded.items()},
+        }
+        for index in order.tolist()
+    ]
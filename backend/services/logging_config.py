@@ -0,0 +1,157 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Fraction of upstream responses whose (truncated) body is logged.
+LOG_BODY_SAMPLE_RATE = float(os.getenv("LOG_BODY_SAMPLE_RATE", "0.01"))
+LOG_BODY_MAX_CHARS = int(os.getenv("LOG_BODY_MAX_CHARS", "2000"))
+
+SECRET_ENV_VARS = (
+    "RENTCAST_API_KEY",
+    "SERPAPI_KEY",
+    "STRIPE_SECRET_KEY",
+    "STRIPE_WEBHOOK_SECRET",
+    "SUPABASE_KEY",
+    "SUPABASE_SERVICE_ROLE_KEY",
+    "OPENAI_API_KEY",
+    "INTERNAL_API_TOKEN",
+)
+_SECRET_PARAMS = re.compile(r"((?:api_key|apikey|x-api-key|secret|token)[\"']?\s*[=:]\s*[\"']?)[^&\s\"',}]+", re.IGNORECASE)
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+def redact(text: str) -> str:
+    for name in SECRET_ENV_VARS:
+        secret = os.getenv(name)
+        if secret and len(secret) >= 6:
+            text = text.replace(secret, "[REDACTED]")
+    return _SECRET_PARAMS.sub(r"\1[REDACTED]", text)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; structured fields come from extra={"fields": {...}}."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            payload["request_id"] = request_id
+        fields = getattr(record, "fields", None)
+        if fields:
+            payload.update(fields)
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc"] = record.exc_text
+        return redact(json.dumps(payload, default=str))
+
+
+class StructuredQueueHandler(QueueHandler):
+    """
+    QueueHandler whose prepare() keeps the record structured. The stdlib
+    one formats the traceback into msg and drops exc_info; here msg is only
+    the message and the traceback travels as exc_text, which JsonFormatter
+    emits as "exc".
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exc_formatter.formatException(record.exc_info)
+        # tracebacks hold frames alive; the text is all the listener needs
+        record.exc_info = None
+        return record
+
+
+_exc_formatter = logging.Formatter()
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp the correlation ID while still on the request's task (before queueing)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+def configure_logging() -> None:
+    """
+    Route every "flipbot.*" logger through a QueueHandler so the request
+    path only enqueues; a background QueueListener thread formats and
+    writes to stdout. Safe to call more than once.
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+
+    _queue_handler = StructuredQueueHandler(log_queue)
+    _queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger("flipbot")
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(_queue_handler)
+    root.propagate = False
+
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flush queued records and detach; configure_logging() can be called again afterwards."""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger("flipbot").removeHandler(_queue_handler)
+        _queue_handler = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"flipbot.{name}")
+
+
+def should_sample_body() -> bool:
+    return LOG_BODY_SAMPLE_RATE > 0 and random.random() < LOG_BODY_SAMPLE_RATE
+
+
+def sampled_body(content: bytes) -> Optional[str]:
+    """
+    The truncated body if this response was picked for sampling, else None.
+    Takes the raw bytes so only a sampled prefix is ever decoded.
+    """
+    if not should_sample_body():
+        return None
+    # a UTF-8 character is at most 4 bytes
+    return content[:LOG_BODY_MAX_CHARS * 4].decode("utf-8", errors="replace")[:LOG_BODY_MAX_CHARS]
+
+
+def elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
@@ -0,0 +1,233 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from services.parcel_index import MILES_PER_DEGREE_LAT, distance_miles
+from services.response_cache import normalize_address
+
+# Append-only history of the comps, listings and subject properties RentCast
+# returns, one row per (kind, property id, UTC day). Nothing is updated in
+# place: a property seen again tomorrow gets a new row, which is what lets
+# price and days-on-market changes be read back later, and repeat sightings
+# on the same day are dropped.
+MARKET_HISTORY_PATH = os.getenv("MARKET_HISTORY_PATH", "market_history.sqlite3")
+MARKET_HISTORY_ENABLED = os.getenv("MARKET_HISTORY_ENABLED", "true").lower() == "true"
+
+KINDS = ("subject", "sale_comp", "rental_comp", "sale_listing", "rental_listing")
+
+# the fields kept from each RentCast item
+RECORD_FIELDS = (
+    "id", "formattedAddress", "zipCode", "latitude", "longitude", "propertyType",
+    "bedrooms", "bathrooms", "squareFootage", "lotSize", "yearBuilt", "status", "price",
+    "listedDate", "removedDate", "lastSeenDate", "daysOnMarket", "distance", "daysOld", "correlation",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    rowid INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    observed_on TEXT NOT NULL,
+    address_key TEXT,
+    zip_code TEXT,
+    latitude REAL,
+    longitude REAL,
+    price REAL,
+    days_on_market INTEGER,
+    record TEXT NOT NULL,
+    UNIQUE (kind, id, observed_on)
+);
+CREATE INDEX IF NOT EXISTS observations_zip ON observations (zip_code, kind, observed_on);
+CREATE INDEX IF NOT EXISTS observations_id ON observations (id, observed_on);
+CREATE INDEX IF NOT EXISTS observations_address ON observations (address_key);
+CREATE VIRTUAL TABLE IF NOT EXISTS observation_geo USING rtree (
+    rowid, min_lat, max_lat, min_lon, max_lon
+);
+"""
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def _number(value: Any) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+class MarketHistory:
+    """
+    SQLite store of observations with an R-tree on lat/lon. Calls are
+    synchronous; use asyncio.to_thread from async code.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def record(self, observations: Iterable[Tuple[str, Dict[str, Any]]], observed_on: Optional[str] = None) -> int:
+        """
+        Append (kind, RentCast item) pairs as observed today (UTC). Items
+        without an id, and ones already recorded today, are skipped.
+        Returns how many rows were added.
+        """
+        observed_on = observed_on or _today()
+        rows = []
+        for kind, item in observations:
+            if not isinstance(item, dict) or item.get("id") is None:
+                continue
+            record = {field: item.get(field) for field in RECORD_FIELDS}
+            address = record.get("formattedAddress")
+            rows.append((
+                kind,
+                str(record["id"]),
+                observed_on,
+                normalize_address(address) if address else None,
+                record.get("zipCode"),
+                _number(record.get("latitude")),
+                _number(record.get("longitude")),
+                _number(record.get("price")),
+                record.get("daysOnMarket"),
+                json.dumps(record, separators=(",", ":")),
+            ))
+        if not rows:
+            return 0
+
+        added = 0
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            for row in rows:
+                inserted = conn.execute(
+                    "INSERT OR IGNORE INTO observations (kind, id, observed_on, address_key, zip_code, "
+                    "latitude, longitude, price, days_on_market, record) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) RETURNING rowid",
+                    row,
+                ).fetchone()
+                if inserted is None:
+                    continue
+                added += 1
+                lat, lon = row[5], row[6]
+                if lat is not None and lon is not None:
+                    conn.execute(
+                        "INSERT INTO observation_geo (rowid, min_lat, max_lat, min_lon, max_lon) VALUES (?, ?, ?, ?, ?)",
+                        (inserted[0], lat, lat, lon, lon),
+                    )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def locate(self, address: str) -> Optional[Tuple[float, float]]:
+        """(lat, lon) of the latest observation of this address, any kind."""
+        row = self._conn().execute(
+            "SELECT latitude, longitude FROM observations "
+            "WHERE address_key = ? AND latitude IS NOT NULL AND longitude IS NOT NULL "
+            "ORDER BY observed_on DESC LIMIT 1",
+            (normalize_address(address),),
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def nearby(
+        self,
+        kind: str,
+        lat: float,
+        lon: float,
+        radius: float,
+        max_age_days: int,
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        Latest observation of each property of this kind within radius miles,
+        seen in the last max_age_days days, nearest first. Each record gets
+        distance and observedOn.
+        """
+        since = (date.fromisoformat(_today()) - timedelta(days=max_age_days)).isoformat()
+        dlat = radius / MILES_PER_DEGREE_LAT
+        dlon = radius / (MILES_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        rows = self._conn().execute(
+            "SELECT o.id, o.observed_on, o.latitude, o.longitude, o.record FROM observations o "
+            "JOIN observation_geo g ON g.rowid = o.rowid "
+            "WHERE o.kind = ? AND o.observed_on >= ? "
+            "AND g.max_lat >= ? AND g.min_lat <= ? AND g.max_lon >= ? AND g.min_lon <= ? "
+            "ORDER BY o.observed_on DESC",
+            (kind, since, lat - dlat, lat + dlat, lon - dlon, lon + dlon),
+        ).fetchall()
+
+        latest: Dict[str, Dict[str, Any]] = {}
+        for property_id, observed_on, row_lat, row_lon, record in rows:
+            if property_id in latest:
+                continue
+            distance = distance_miles(lat, lon, row_lat, row_lon)
+            if distance > radius:
+                continue
+            latest[property_id] = {**json.loads(record), "distance": round(distance, 3), "observedOn": observed_on}
+        return sorted(latest.values(), key=lambda record: record["distance"])[:limit]
+
+    def history(self, property_id: str) -> List[Dict[str, Any]]:
+        """
+        Every observation of a property, oldest first. Each carries
+        priceChange and daysOnMarketChange against the previous observation
+        of the same kind (None for the first one).
+        """
+        rows = self._conn().execute(
+            "SELECT kind, observed_on, record FROM observations WHERE id = ? ORDER BY observed_on, kind",
+            (property_id,),
+        ).fetchall()
+        previous: Dict[str, Dict[str, Any]] = {}
+        observations = []
+        for kind, observed_on, record in rows:
+            record = json.loads(record)
+            before = previous.get(kind)
+            observation = {"kind": kind, "observedOn": observed_on, **record, "priceChange": None, "daysOnMarketChange": None}
+            if before is not None:
+                for field, change in (("price", "priceChange"), ("daysOnMarket", "daysOnMarketChange")):
+                    now, then = _number(record.get(field)), _number(before.get(field))
+                    if now is not None and then is not None:
+                        observation[change] = round(now - then, 2)
+            previous[kind] = record
+            observations.append(observation)
+        return observations
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        counts = dict(conn.execute("SELECT kind, COUNT(*) FROM observations GROUP BY kind").fetchall())
+        days = conn.execute("SELECT MIN(observed_on), MAX(observed_on) FROM observations").fetchone()
+        return {
+            "path": self.path,
+            "observations": {kind: counts.get(kind, 0) for kind in KINDS},
+            "first_observed_on": days[0],
+            "last_observed_on": days[1],
+        }
+
+
+_market_history: Optional[MarketHistory] = None
+_market_history_lock = threading.Lock()
+
+
+def get_market_history() -> Optional[MarketHistory]:
+    """Process-wide MarketHistory, or None when MARKET_HISTORY_ENABLED is false."""
+    global _market_history
+    if not MARKET_HISTORY_ENABLED:
+        return None
+    with _market_history_lock:
+        if _market_history is None:
+            _market_history = MarketHistory(MARKET_HISTORY_PATH)
+    return _market_history
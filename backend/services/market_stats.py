@@ -0,0 +1,301 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Rolling per-zip distributions of market metrics, kept as quantile sketches
+# instead of raw history. A sketch is a histogram over log-spaced buckets
+# (DDSketch-style, fixed range): any value's bucket bounds are within
+# RELATIVE_ACCURACY of it, so quantiles read back to ~1% however many
+# values went in, and two sketches merge by adding counts. Counts decay
+# with a half-life, which makes the distribution a rolling one.
+#
+# Each process adds what it sees to its in-memory sketches and a pending
+# delta; flush() folds the deltas into SQLite (shared with the other
+# processes) and reloads every sketch changed since the last flush. Decay
+# is applied lazily: a sketch remembers when its counts were last decayed
+# and is brought up to date when it is written, reloaded or read, so a zip
+# nobody observes any more still fades out of the rolling window.
+MARKET_STATS_PATH = os.getenv("MARKET_STATS_PATH", "market_stats.sqlite3")
+MARKET_STATS_ENABLED = os.getenv("MARKET_STATS_ENABLED", "true").lower() == "true"
+MARKET_STATS_HALF_LIFE_DAYS = float(os.getenv("MARKET_STATS_HALF_LIFE_DAYS", "90"))
+MARKET_STATS_FLUSH_INTERVAL = float(os.getenv("MARKET_STATS_FLUSH_INTERVAL", "30"))
+# below this much (decayed) weight a zip's percentiles are not reported
+MARKET_STATS_MIN_SAMPLES = float(os.getenv("MARKET_STATS_MIN_SAMPLES", "10"))
+# reads re-decay a sketch once it is this many seconds stale
+MARKET_STATS_DECAY_STEP = float(os.getenv("MARKET_STATS_DECAY_STEP", "3600"))
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+
+# metric -> (low, high) covered by the buckets; values outside are clamped
+METRICS = {
+    "sale_price_per_sqft": (1.0, 20000.0),
+    "rent_price_per_sqft": (0.01, 50.0),
+    "gross_yield_percent": (0.1, 100.0),
+    "days_on_market": (1.0, 3650.0),
+}
+BUCKETS = {name: int(math.ceil(math.log(high / low) / LOG_GAMMA)) + 1 for name, (low, high) in METRICS.items()}
+SUMMARY_QUANTILES = {"p25": 0.25, "median": 0.5, "p75": 0.75}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sketches (
+    zip_code TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    counts BLOB NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (zip_code, metric)
+);
+CREATE INDEX IF NOT EXISTS sketches_updated_at ON sketches (updated_at);
+"""
+
+
+def bucket_index(metric: str, values: np.ndarray) -> np.ndarray:
+    """Bucket i holds (low * GAMMA**(i-1), low * GAMMA**i]; bucket 0 everything <= low."""
+    low, _ = METRICS[metric]
+    with np.errstate(divide="ignore"):
+        index = np.ceil(np.log(np.maximum(values, low) / low) / LOG_GAMMA)
+    return np.clip(index, 0, BUCKETS[metric] - 1).astype(np.intp)
+
+
+def bucket_value(metric: str, index: np.ndarray) -> np.ndarray:
+    """Representative value of a bucket: within RELATIVE_ACCURACY of anything in it."""
+    low, _ = METRICS[metric]
+    return 2 * low * GAMMA ** index / (GAMMA + 1)
+
+
+def decay_factor(elapsed: float) -> float:
+    return 0.5 ** (max(elapsed, 0.0) / (MARKET_STATS_HALF_LIFE_DAYS * 86400))
+
+
+class Sketch:
+    """
+    Counts, decayed up to as_of, plus what lookups need, precomputed on
+    every change so rank() and summary() are O(1): the inclusive running
+    total and the SUMMARY_QUANTILES values.
+    """
+
+    __slots__ = ("metric", "counts", "as_of", "cumulative", "total", "quantiles")
+
+    def __init__(self, metric: str, counts: Optional[np.ndarray] = None, as_of: Optional[float] = None):
+        self.metric = metric
+        self.counts = counts if counts is not None else np.zeros(BUCKETS[metric])
+        self.as_of = as_of if as_of is not None else time.time()
+        self.refresh()
+
+    def decayed(self, now: float) -> "Sketch":
+        """This sketch as of now (a new Sketch; self is left alone)."""
+        return Sketch(self.metric, self.counts * decay_factor(now - self.as_of), now)
+
+    def refresh(self) -> None:
+        self.cumulative = np.cumsum(self.counts)
+        self.total = float(self.cumulative[-1])
+        if self.total > 0:
+            targets = np.array(list(SUMMARY_QUANTILES.values())) * self.total
+            index = np.searchsorted(self.cumulative, targets)
+            values = bucket_value(self.metric, np.minimum(index, len(self.counts) - 1))
+            self.quantiles = {name: round(float(v), 2) for name, v in zip(SUMMARY_QUANTILES, values)}
+        else:
+            self.quantiles = {name: None for name in SUMMARY_QUANTILES}
+
+    def rank(self, value: float) -> Optional[float]:
+        """Percent of the distribution below value (half of its own bucket counts as below)."""
+        if self.total <= 0:
+            return None
+        index = int(bucket_index(self.metric, np.array([value]))[0])
+        below = self.cumulative[index] - self.counts[index] / 2
+        return round(float(below / self.total * 100), 1)
+
+    def summary(self) -> Dict[str, Any]:
+        return {"samples": round(self.total, 1), **self.quantiles}
+
+
+class MarketStats:
+    """In-memory sketches per (zip, metric), persisted to SQLite by flush()."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sketches: Dict[Tuple[str, str], Sketch] = {}
+        self._pending: Dict[Tuple[str, str], np.ndarray] = {}
+        self._synced_at = 0.0
+        self.observed = 0
+        self.flushes = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def observe(self, zip_code: Optional[str], metric: str, values: Iterable[Any]) -> None:
+        """Add values (non-numeric and non-positive ones are skipped) to a zip's sketch."""
+        if not zip_code:
+            return
+        array = np.array(
+            [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)], dtype=float,
+        )
+        array = array[np.isfinite(array) & (array > 0)]
+        if not len(array):
+            return
+        delta = np.bincount(bucket_index(metric, array), minlength=BUCKETS[metric]).astype(float)
+        key = (zip_code, metric)
+        now = time.time()
+        with self._lock:
+            pending = self._pending.get(key)
+            self._pending[key] = delta if pending is None else pending + delta
+            sketch = self._sketches.get(key)
+            counts = delta.copy() if sketch is None else sketch.counts * decay_factor(now - sketch.as_of) + delta
+            self._sketches[key] = Sketch(metric, counts, now)
+            self.observed += len(array)
+
+    def observe_items(self, items: Any, metric: str, numerator: str, denominator: Optional[str] = None) -> None:
+        """
+        One value per RentCast item (item[numerator], or numerator /
+        denominator when given), grouped by the item's own zipCode.
+        """
+        if not isinstance(items, list):
+            return
+        by_zip: Dict[str, List[float]] = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            value = item.get(numerator)
+            if denominator is not None:
+                divisor = item.get(denominator)
+                if not isinstance(value, (int, float)) or not isinstance(divisor, (int, float)) or divisor <= 0:
+                    continue
+                value = value / divisor
+            by_zip.setdefault(item.get("zipCode"), []).append(value)
+        for zip_code, values in by_zip.items():
+            self.observe(zip_code, metric, values)
+
+    def flush(self) -> int:
+        """
+        Fold pending deltas into SQLite (decaying what is stored there) and
+        pick up every sketch any process changed since the last flush.
+        Returns how many sketches were written.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # stamped under the write lock, so updated_at grows in commit
+            # order across every process sharing the file
+            now = time.time()
+            for (zip_code, metric), delta in pending.items():
+                row = conn.execute(
+                    "SELECT counts, updated_at FROM sketches WHERE zip_code = ? AND metric = ?", (zip_code, metric),
+                ).fetchone()
+                counts = delta
+                if row is not None:
+                    counts = np.frombuffer(row[0], dtype=np.float64) * decay_factor(now - row[1]) + delta
+                conn.execute(
+                    "INSERT OR REPLACE INTO sketches (zip_code, metric, counts, updated_at) VALUES (?, ?, ?, ?)",
+                    (zip_code, metric, counts.astype(np.float64).tobytes(), now),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            with self._lock:
+                for key, delta in pending.items():
+                    self._pending[key] = self._pending[key] + delta if key in self._pending else delta
+            raise
+
+        rows = conn.execute(
+            "SELECT zip_code, metric, counts, updated_at FROM sketches WHERE updated_at >= ?", (self._synced_at,),
+        ).fetchall()
+        with self._lock:
+            for zip_code, metric, blob, updated_at in rows:
+                # resume from the newest row actually read, not from this
+                # flush's clock: anything committed after the read is newer
+                self._synced_at = max(self._synced_at, updated_at)
+                if metric not in METRICS:
+                    continue
+                counts = np.frombuffer(blob, dtype=np.float64) * decay_factor(now - updated_at)
+                # observed while this flush ran: stays in memory until the next one
+                unflushed = self._pending.get((zip_code, metric))
+                if unflushed is not None:
+                    counts += unflushed
+                self._sketches[(zip_code, metric)] = Sketch(metric, counts, now)
+            self.flushes += 1
+        return len(pending)
+
+    def _sketch(self, zip_code: str, metric: str) -> Optional[Sketch]:
+        """The in-memory sketch, re-decayed first when it is MARKET_STATS_DECAY_STEP stale."""
+        key = (zip_code, metric)
+        sketch = self._sketches.get(key)
+        now = time.time()
+        if sketch is None or now - sketch.as_of < MARKET_STATS_DECAY_STEP:
+            return sketch
+        with self._lock:
+            sketch = self._sketches.get(key)
+            if sketch is not None and now - sketch.as_of >= MARKET_STATS_DECAY_STEP:
+                sketch = self._sketches[key] = sketch.decayed(now)
+        return sketch
+
+    def compare(self, zip_code: Optional[str], values: Dict[str, Optional[float]]) -> Dict[str, Any]:
+        """
+        For each metric, the zip's summary plus the percentile of values[metric]
+        (when given) within it. Metrics with too little data are None.
+        """
+        result: Dict[str, Any] = {"zip_code": zip_code}
+        for metric in METRICS:
+            sketch = self._sketch(zip_code, metric) if zip_code else None
+            if sketch is None or sketch.total < MARKET_STATS_MIN_SAMPLES:
+                result[metric] = None
+                continue
+            value = values.get(metric)
+            known = isinstance(value, (int, float)) and value > 0
+            result[metric] = {
+                **sketch.summary(),
+                "value": round(value, 2) if known else None,
+                "percentile": sketch.rank(value) if known else None,
+            }
+        return result
+
+    def zip_summary(self, zip_code: str) -> Dict[str, Any]:
+        summary: Dict[str, Any] = {}
+        for metric in METRICS:
+            sketch = self._sketch(zip_code, metric)
+            summary[metric] = sketch.summary() if sketch is not None else None
+        return summary
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "sketches": len(self._sketches),
+            "zips": len({zip_code for zip_code, _ in self._sketches}),
+            "pending": len(self._pending),
+            "values_observed": self.observed,
+            "flushes": self.flushes,
+        }
+
+
+_market_stats: Optional[MarketStats] = None
+_market_stats_lock = threading.Lock()
+
+
+def get_market_stats() -> Optional[MarketStats]:
+    """Process-wide MarketStats, or None when MARKET_STATS_ENABLED is false."""
+    global _market_stats
+    if not MARKET_STATS_ENABLED:
+        return None
+    with _market_stats_lock:
+        if _market_stats is None:
+            _market_stats = MarketStats(MARKET_STATS_PATH)
+    return _market_stats
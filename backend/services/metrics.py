@@ -0,0 +1,238 @@
+import asyncio
+import bisect
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Prometheus text-format metrics kept in process memory. Each uvicorn worker
+# exposes its own numbers; scrape every worker (or sum in the query).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+LabelKey = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelKey, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelKey:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value: float, **labels: Any) -> None:
+        """Mirror a monotonic total kept elsewhere (e.g. cache hit counts), copied in at scrape time."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {value}" for key, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Iterable[str] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = ([0] * (len(self.buckets) + 1), [0.0])
+                self._values[key] = entry
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            cumulative += counts[-1]
+            labels = _format_labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {round(total, 6)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, fn: Callable[[], None]) -> None:
+        """fn runs on every scrape, e.g. to copy cache counters into gauges."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        for collect in self._collectors:
+            collect()
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Request latency by route", ("route", "method", "status"),
+))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "Requests currently being served",
+))
+HTTP_REQUEST_SIZE = REGISTRY.register(Histogram(
+    "http_request_size_bytes", "Request body size by route", ("route",), buckets=SIZE_BUCKETS,
+))
+HTTP_RESPONSE_SIZE = REGISTRY.register(Histogram(
+    "http_response_size_bytes", "Response body size by route", ("route",), buckets=SIZE_BUCKETS,
+))
+UPSTREAM_LATENCY = REGISTRY.register(Histogram(
+    "upstream_request_duration_seconds", "Upstream call latency", ("upstream", "operation"),
+))
+UPSTREAM_IN_FLIGHT = REGISTRY.register(Gauge(
+    "upstream_requests_in_flight", "Upstream calls currently outstanding", ("upstream",),
+))
+UPSTREAM_RESPONSE_SIZE = REGISTRY.register(Histogram(
+    "upstream_response_size_bytes", "Upstream response body size", ("upstream", "operation"), buckets=SIZE_BUCKETS,
+))
+FUNCTION_LATENCY = REGISTRY.register(Histogram(
+    "function_duration_seconds", "Hot-path function latency", ("function",),
+))
+CACHE_HITS = REGISTRY.register(Counter("cache_hits_total", "Cache hits since start", ("cache",)))
+CACHE_MISSES = REGISTRY.register(Counter("cache_misses_total", "Cache misses since start", ("cache",)))
+CACHE_HIT_RATIO = REGISTRY.register(Gauge("cache_hit_ratio", "Cache hit ratio since start", ("cache",)))
+
+
+class timed:
+    """
+    Observe elapsed seconds into a histogram, as a context manager
+
+        with timed(UPSTREAM_LATENCY, upstream="supabase", operation="profiles.update"):
+            ...
+
+    or as a decorator on sync or async functions
+
+        @timed(FUNCTION_LATENCY, function="calculate_irr")
+        def calculate_irr(...): ...
+
+    Pass in_flight=<Gauge> to also track concurrency under the same labels
+    (only those the gauge declares are used).
+    """
+
+    def __init__(self, histogram: Histogram, in_flight: Optional[Gauge] = None, **labels: Any):
+        self.histogram = histogram
+        self.in_flight = in_flight
+        self.labels = labels
+        self._started: List[float] = []
+
+    def _gauge_labels(self) -> Dict[str, Any]:
+        return {name: self.labels.get(name, "") for name in self.in_flight.label_names} if self.in_flight else {}
+
+    def __enter__(self) -> "timed":
+        if self.in_flight is not None:
+            self.in_flight.inc(**self._gauge_labels())
+        self._started.append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.histogram.observe(time.perf_counter() - self._started.pop(), **self.labels)
+        if self.in_flight is not None:
+            self.in_flight.dec(**self._gauge_labels())
+
+    def __call__(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        histogram, in_flight, labels = self.histogram, self.in_flight, self.labels
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with timed(histogram, in_flight, **labels):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with timed(histogram, in_flight, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+def record_cache_stats(cache: str, hits: int, misses: int) -> None:
+    CACHE_HITS.set_total(hits, cache=cache)
+    CACHE_MISSES.set_total(misses, cache=cache)
+    lookups = hits + misses
+    CACHE_HIT_RATIO.set(round(hits / lookups, 4) if lookups else 0, cache=cache)
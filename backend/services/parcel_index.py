@@ -0,0 +1,380 @@
+import json
+import math
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from services.response_cache import normalize_address
+
+# Local index of RentCast land parcels (compact_land_record rows), so repeat
+# and refined land searches are answered from SQLite instead of RentCast.
+# A "cell" is a zip code: once every land parcel in a zip has been fetched
+# the cell is fresh for PARCEL_CELL_TTL and queries on it stay local.
+PARCEL_INDEX_PATH = os.getenv("PARCEL_INDEX_PATH", "parcel_index.sqlite3")
+PARCEL_INDEX_ENABLED = os.getenv("PARCEL_INDEX_ENABLED", "true").lower() == "true"
+PARCEL_CELL_TTL = float(os.getenv("PARCEL_CELL_TTL", str(7 * 24 * 3600)))
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parcels (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    zip_code TEXT,
+    lot_size REAL,
+    square_footage REAL,
+    year_built INTEGER,
+    last_sale_date TEXT,
+    last_sale_price REAL,
+    owner_type TEXT,
+    owner_occupied INTEGER,
+    absentee INTEGER,
+    latitude REAL,
+    longitude REAL,
+    record TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS parcels_zip_lot ON parcels (zip_code, lot_size);
+CREATE INDEX IF NOT EXISTS parcels_last_sale_date ON parcels (last_sale_date);
+CREATE INDEX IF NOT EXISTS parcels_last_sale_price ON parcels (last_sale_price);
+CREATE INDEX IF NOT EXISTS parcels_owner_type ON parcels (owner_type);
+CREATE INDEX IF NOT EXISTS parcels_absentee ON parcels (absentee);
+CREATE VIRTUAL TABLE IF NOT EXISTS parcel_geo USING rtree (
+    rowid, min_lat, max_lat, min_lon, max_lon
+);
+CREATE TABLE IF NOT EXISTS cells (
+    zip_code TEXT PRIMARY KEY,
+    refreshed_at REAL NOT NULL,
+    records INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS zip_stats (
+    zip_code TEXT PRIMARY KEY,
+    parcels INTEGER NOT NULL,
+    median_lot_size REAL,
+    median_last_sale_price REAL,
+    computed_at REAL NOT NULL
+);
+"""
+
+# sort key (API name) -> column; a leading "-" sorts descending
+SORT_COLUMNS = {
+    "lotSize": "lot_size",
+    "lastSalePrice": "last_sale_price",
+    "lastSaleDate": "last_sale_date",
+    "yearBuilt": "year_built",
+    "squareFootage": "square_footage",
+}
+
+
+def is_absentee(record: Dict[str, Any]) -> Optional[bool]:
+    """Owner's mailing address differs from the parcel's own; None when either is unknown."""
+    site, mailing = record.get("formattedAddress"), record.get("mailingAddress")
+    if not site or not mailing:
+        return None
+    return normalize_address(site) != normalize_address(mailing)
+
+
+def distance_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle (haversine) distance."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+
+
+def _bool_column(value: Optional[bool]) -> Optional[int]:
+    return None if value is None else int(value)
+
+
+class ParcelIndex:
+    """
+    SQLite table of parcels with B-tree indexes on the filter columns and an
+    R-tree on lat/lon, plus per-zip freshness.
+
+    Calls are synchronous; use asyncio.to_thread from async code. Rows are
+    upserted by RentCast id, so re-fetching a zip refreshes it in place.
+    """
+
+    def __init__(self, path: str, cell_ttl: float):
+        self.path = path
+        self.cell_ttl = cell_ttl
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def upsert(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Insert or refresh compact land records (rows without an id are skipped)."""
+        now = time.time()
+        rows = []
+        for record in records:
+            if record.get("id") is None:
+                continue
+            rows.append((
+                str(record["id"]),
+                record.get("zipCode"),
+                record.get("lotSize"),
+                record.get("squareFootage"),
+                record.get("yearBuilt"),
+                record.get("lastSaleDate"),
+                record.get("lastSalePrice"),
+                record.get("ownerType"),
+                _bool_column(record.get("ownerOccupied")),
+                _bool_column(record["absentee"] if "absentee" in record else is_absentee(record)),
+                record.get("latitude"),
+                record.get("longitude"),
+                json.dumps(record, separators=(",", ":")),
+                now,
+            ))
+        if not rows:
+            return 0
+
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            for row in rows:
+                rowid = conn.execute(
+                    "INSERT INTO parcels (id, zip_code, lot_size, square_footage, year_built, "
+                    "last_sale_date, last_sale_price, owner_type, owner_occupied, absentee, "
+                    "latitude, longitude, record, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET "
+                    "zip_code = excluded.zip_code, lot_size = excluded.lot_size, "
+                    "square_footage = excluded.square_footage, year_built = excluded.year_built, "
+                    "last_sale_date = excluded.last_sale_date, last_sale_price = excluded.last_sale_price, "
+                    "owner_type = excluded.owner_type, owner_occupied = excluded.owner_occupied, "
+                    "absentee = excluded.absentee, latitude = excluded.latitude, "
+                    "longitude = excluded.longitude, record = excluded.record, "
+                    "fetched_at = excluded.fetched_at "
+                    "RETURNING rowid",
+                    row,
+                ).fetchone()[0]
+                lat, lon = row[10], row[11]
+                conn.execute("DELETE FROM parcel_geo WHERE rowid = ?", (rowid,))
+                if lat is not None and lon is not None:
+                    conn.execute(
+                        "INSERT INTO parcel_geo (rowid, min_lat, max_lat, min_lon, max_lon) VALUES (?, ?, ?, ?, ?)",
+                        (rowid, lat, lat, lon, lon),
+                    )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def mark_cell(self, zip_code: str, refreshed_at: float) -> None:
+        """
+        Record a complete walk of a zip started at refreshed_at. Parcels in
+        the zip not seen since then are gone upstream and are dropped, and
+        the zip's medians are recomputed from what is left.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            conn.execute(
+                "DELETE FROM parcel_geo WHERE rowid IN "
+                "(SELECT rowid FROM parcels WHERE zip_code = ? AND fetched_at < ?)",
+                (zip_code, refreshed_at),
+            )
+            conn.execute("DELETE FROM parcels WHERE zip_code = ? AND fetched_at < ?", (zip_code, refreshed_at))
+            count = conn.execute("SELECT COUNT(*) FROM parcels WHERE zip_code = ?", (zip_code,)).fetchone()[0]
+            conn.execute(
+                "INSERT OR REPLACE INTO cells (zip_code, refreshed_at, records) VALUES (?, ?, ?)",
+                (zip_code, refreshed_at, count),
+            )
+            medians = [
+                self._median(conn, column, zip_code) for column in ("lot_size", "last_sale_price")
+            ]
+            conn.execute(
+                "INSERT OR REPLACE INTO zip_stats "
+                "(zip_code, parcels, median_lot_size, median_last_sale_price, computed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (zip_code, count, *medians, time.time()),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _median(conn: sqlite3.Connection, column: str, zip_code: str) -> Optional[float]:
+        values = [row[0] for row in conn.execute(
+            f"SELECT {column} FROM parcels WHERE zip_code = ? AND {column} IS NOT NULL", (zip_code,),
+        )]
+        return statistics.median(values) if values else None
+
+    def zip_stats(self, zip_codes: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Precomputed medians for the zips that have been walked completely."""
+        rows = self._conn().execute(
+            "SELECT zip_code, parcels, median_lot_size, median_last_sale_price, computed_at "
+            f"FROM zip_stats WHERE zip_code IN ({','.join('?' * len(zip_codes))})",
+            list(zip_codes),
+        )
+        return {
+            zip_code: {
+                "parcels": parcels,
+                "median_lot_size": median_lot_size,
+                "median_last_sale_price": median_last_sale_price,
+                "computed_at": computed_at,
+            }
+            for zip_code, parcels, median_lot_size, median_last_sale_price, computed_at in rows
+        }
+
+    def cells(self, zip_codes: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Freshness of each zip: refreshed_at (None if never walked), records, stale."""
+        now = time.time()
+        found = {
+            zip_code: (refreshed_at, records)
+            for zip_code, refreshed_at, records in self._conn().execute(
+                f"SELECT zip_code, refreshed_at, records FROM cells WHERE zip_code IN ({','.join('?' * len(zip_codes))})",
+                list(zip_codes),
+            )
+        }
+        result = {}
+        for zip_code in zip_codes:
+            refreshed_at, records = found.get(zip_code, (None, 0))
+            result[zip_code] = {
+                "refreshed_at": refreshed_at,
+                "records": records,
+                "stale": refreshed_at is None or now - refreshed_at > self.cell_ttl,
+            }
+        return result
+
+    def query(
+        self,
+        filters: Dict[str, Any],
+        sort: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Matching records and the total match count. filters keys (all optional):
+
+            zip_codes                         list of zips
+            min_/max_lot_size, min_/max_last_sale_price
+            last_sale_after, last_sale_before ISO dates
+            owner_types                       list, e.g. ["Organization"]
+            absentee, owner_occupied          booleans
+            bbox                              (min_lat, min_lon, max_lat, max_lon)
+            near                              (lat, lon, radius_miles)
+
+        sort is a SORT_COLUMNS name or "distance" (needs near), "-" prefix
+        for descending; unknown values sort by id. Box and radius searches
+        go through the R-tree; the exact radius cut and distance ordering
+        are applied to the box's candidates.
+        """
+        where: List[str] = []
+        args: List[Any] = []
+
+        def add(clause: str, *values: Any) -> None:
+            where.append(clause)
+            args.extend(values)
+
+        zip_codes = filters.get("zip_codes")
+        if zip_codes:
+            add(f"p.zip_code IN ({','.join('?' * len(zip_codes))})", *zip_codes)
+        for key, column, op in (
+            ("min_lot_size", "lot_size", ">="),
+            ("max_lot_size", "lot_size", "<="),
+            ("min_last_sale_price", "last_sale_price", ">="),
+            ("max_last_sale_price", "last_sale_price", "<="),
+            ("last_sale_after", "last_sale_date", ">="),
+            ("last_sale_before", "last_sale_date", "<"),
+        ):
+            if filters.get(key) is not None:
+                add(f"p.{column} {op} ?", filters[key])
+        owner_types = filters.get("owner_types")
+        if owner_types:
+            add(f"p.owner_type IN ({','.join('?' * len(owner_types))})", *owner_types)
+        for key in ("absentee", "owner_occupied"):
+            if filters.get(key) is not None:
+                add(f"p.{key} = ?", int(filters[key]))
+
+        boxes = []
+        if filters.get("bbox") is not None:
+            boxes.append(filters["bbox"])
+        near = filters.get("near")
+        if near is not None:
+            lat, lon, radius = near
+            dlat = radius / MILES_PER_DEGREE_LAT
+            dlon = radius / (MILES_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+            boxes.append((lat - dlat, lon - dlon, lat + dlat, lon + dlon))
+        source = "parcels p"
+        if boxes:
+            source += " JOIN parcel_geo g ON g.rowid = p.rowid"
+            for min_lat, min_lon, max_lat, max_lon in boxes:
+                add("g.max_lat >= ? AND g.min_lat <= ? AND g.max_lon >= ? AND g.min_lon <= ?",
+                    min_lat, max_lat, min_lon, max_lon)
+
+        descending = bool(sort) and sort.startswith("-")
+        sort_key = sort.lstrip("-") if sort else None
+        column = SORT_COLUMNS.get(sort_key)
+        order = f"p.{column} IS NULL, p.{column} {'DESC' if descending else 'ASC'}, p.id" if column else "p.id"
+
+        body = f" FROM {source}"
+        if where:
+            body += " WHERE " + " AND ".join(where)
+        select = "SELECT p.record, p.absentee, p.latitude, p.longitude" + body
+        conn = self._conn()
+
+        if near is None:
+            total = conn.execute("SELECT COUNT(*)" + body, args).fetchone()[0]
+            rows = conn.execute(f"{select} ORDER BY {order} LIMIT ? OFFSET ?", args + [limit, offset]).fetchall()
+            return [self._record(row) for row in rows], total
+
+        lat, lon, radius = near
+        matches = []
+        for row in conn.execute(f"{select} ORDER BY {order}", args):
+            distance = distance_miles(lat, lon, row[2], row[3])
+            if distance <= radius:
+                matches.append((distance, row))
+        if sort_key == "distance":
+            matches.sort(key=lambda match: match[0], reverse=descending)
+        page = matches[offset:offset + limit]
+        return [self._record(row, distance) for distance, row in page], len(matches)
+
+    @staticmethod
+    def _record(row: Tuple[Any, ...], distance: Optional[float] = None) -> Dict[str, Any]:
+        record = json.loads(row[0])
+        record["absentee"] = None if row[1] is None else bool(row[1])
+        if distance is not None:
+            record["distance"] = round(distance, 3)
+        return record
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        parcels = conn.execute("SELECT COUNT(*) FROM parcels").fetchone()[0]
+        cells, stale = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(refreshed_at < ?), 0) FROM cells",
+            (time.time() - self.cell_ttl,),
+        ).fetchone()
+        return {"path": self.path, "parcels": parcels, "cells": cells, "stale_cells": stale}
+
+
+_parcel_index: Optional[ParcelIndex] = None
+_parcel_index_lock = threading.Lock()
+
+
+def get_parcel_index() -> Optional[ParcelIndex]:
+    """Process-wide ParcelIndex, or None when PARCEL_INDEX_ENABLED is false."""
+    global _parcel_index
+    if not PARCEL_INDEX_ENABLED:
+        return None
+    with _parcel_index_lock:
+        if _parcel_index is None:
+            _parcel_index = ParcelIndex(PARCEL_INDEX_PATH, PARCEL_CELL_TTL)
+    return _parcel_index
@@ -0,0 +1,133 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call would have to queue longer than its wait budget."""
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(f"{upstream} rate limit: retry after {retry_after:.1f}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second, at most `burst` banked.
+
+    acquire() reserves a token up front (the balance may go negative), so
+    callers queue in arrival order and each one sleeps exactly as long as
+    its reservation needs. A caller whose wait would exceed max_wait is
+    shed with RateLimitExceeded instead of queueing. pause() blocks the
+    whole bucket, e.g. for an upstream Retry-After. A caller cancelled
+    while it sleeps on its reservation gives the token back.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, max_wait: float):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self.acquired = 0
+        self.queued = 0
+        self.shed = 0
+        self.refunded = 0
+        self.throttled = 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _wait_for_next(self, now: float) -> float:
+        token_wait = max(0.0, (1 - self._tokens) / self.rate)
+        return max(token_wait, self._paused_until - now)
+
+    async def acquire(self, max_wait: Optional[float] = None) -> float:
+        """Take one token, sleeping if needed. Returns the seconds waited."""
+        budget = self.max_wait if max_wait is None else max_wait
+        now = time.monotonic()
+        self._refill(now)
+
+        wait = self._wait_for_next(now)
+        if wait > budget:
+            self.shed += 1
+            raise RateLimitExceeded(self.name, wait)
+
+        self._tokens -= 1
+        self.acquired += 1
+        if wait > 0:
+            self.queued += 1
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # deadline or disconnect: the reservation was never used
+                self._refill(time.monotonic())
+                self._tokens = min(self.burst, self._tokens + 1)
+                self.acquired -= 1
+                self.refunded += 1
+                raise
+        return wait
+
+    async def wait_for_headroom(self, reserve: float) -> float:
+        """
+        Sleep until at least `reserve` tokens are banked, without taking any.
+        Background work calls this before its requests so interactive
+        callers keep that much of the burst. Returns the seconds waited.
+        """
+        reserve = min(reserve, self.burst)
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max((reserve - self._tokens) / self.rate, self._paused_until - now)
+            if wait <= 0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds: float) -> None:
+        self.throttled += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        self._refill(now)
+        return {
+            "rate_per_sec": self.rate,
+            "burst": self.burst,
+            "max_wait_sec": self.max_wait,
+            "tokens": round(self._tokens, 2),
+            "paused_for_sec": round(max(0.0, self._paused_until - now), 2),
+            "acquired": self.acquired,
+            "queued": self.queued,
+            "shed": self.shed,
+            "refunded": self.refunded,
+            "upstream_throttled": self.throttled,
+        }
+
+
+def _bucket_from_env(name: str, rate: str, burst: str, max_wait: str) -> TokenBucket:
+    prefix = name.upper()
+    return TokenBucket(
+        name,
+        rate=float(os.getenv(f"{prefix}_RATE_PER_SEC", rate)),
+        burst=int(os.getenv(f"{prefix}_BURST", burst)),
+        max_wait=float(os.getenv(f"{prefix}_MAX_WAIT", max_wait)),
+    )
+
+
+# One bucket per upstream, per process. Size the rates for the plan quota
+# divided by the number of uvicorn workers.
+UPSTREAM_LIMITERS: Dict[str, TokenBucket] = {
+    "rentcast": _bucket_from_env("rentcast", rate="10", burst="20", max_wait="5"),
+    "serpapi": _bucket_from_env("serpapi", rate="2", burst="5", max_wait="5"),
+}
+
+
+def get_limiter(upstream: str) -> Optional[TokenBucket]:
+    return UPSTREAM_LIMITERS.get(upstream)
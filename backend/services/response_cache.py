@@ -0,0 +1,172 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# USPS-style suffix and directional abbreviations. Only whole words are
+# replaced, so "Northgate" stays as-is while "North Main Street" becomes
+# "n main st".
+ADDRESS_ABBREVIATIONS = {
+    "street": "st",
+    "avenue": "ave",
+    "av": "ave",
+    "boulevard": "blvd",
+    "drive": "dr",
+    "road": "rd",
+    "lane": "ln",
+    "court": "ct",
+    "circle": "cir",
+    "place": "pl",
+    "terrace": "ter",
+    "parkway": "pkwy",
+    "highway": "hwy",
+    "square": "sq",
+    "trail": "trl",
+    "apartment": "apt",
+    "suite": "ste",
+    "north": "n",
+    "south": "s",
+    "east": "e",
+    "west": "w",
+    "northeast": "ne",
+    "northwest": "nw",
+    "southeast": "se",
+    "southwest": "sw",
+}
+
+_PUNCTUATION = re.compile(r"[.#]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_address(address: str) -> str:
+    """
+    Canonical form of a free-text address for cache keys:
+    "123  North Main Street, Austin, TX 78701" -> "123 n main st, austin, tx 78701"
+    """
+    text = _PUNCTUATION.sub(" ", address.lower())
+    parts = []
+    for segment in text.split(","):
+        words = _WHITESPACE.sub(" ", segment).strip().split(" ")
+        words = [ADDRESS_ABBREVIATIONS.get(word, word) for word in words if word]
+        if words:
+            parts.append(" ".join(words))
+    return ", ".join(parts)
+
+
+def make_cache_key(path: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Key on the path plus params sorted by name, with None values dropped and
+    the address normalized so trivially different spellings share an entry.
+    """
+    canonical: Dict[str, Any] = {}
+    for key, value in (params or {}).items():
+        if value is None:
+            continue
+        if key == "address" and isinstance(value, str):
+            value = normalize_address(value)
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value)
+        canonical[key] = value
+    return f"{path}?{json.dumps(canonical, sort_keys=True, separators=(',', ':'), default=str)}"
+
+
+class TTLCache:
+    """
+    In-process LRU cache with per-entry TTLs and an approximate memory cap.
+
+    Entries are accounted by the size the caller passes to set() (for
+    upstream responses, the raw body length), and least-recently-used
+    entries are evicted once the total exceeds max_bytes. Values are shared
+    between callers, so treat anything returned from get() as read-only.
+
+    Expired entries are kept for a further stale_ttl seconds so get_stale()
+    can serve them as a fallback while the upstream is unavailable.
+    """
+
+    def __init__(self, max_bytes: int, max_entries: int = 10000, stale_ttl: float = 0):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_hits = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, size, value = entry
+            if expires_at <= now:
+                if expires_at + self.stale_ttl <= now:
+                    self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_stale(self, key: str) -> Optional[Any]:
+        """Return the entry even if past its TTL, as long as it is within stale_ttl."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, _, value = entry
+            if expires_at + self.stale_ttl <= now:
+                self._remove(key)
+                return None
+
+            self.stale_hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: float, size: int) -> None:
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self._bytes += size
+
+            while self._entries and (
+                self._bytes > self.max_bytes or len(self._entries) > self.max_entries
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "stale_hits": self.stale_hits,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
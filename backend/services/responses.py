@@ -0,0 +1,167 @@
+import gzip
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: fall back to gzip only
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    orjson-backed JSON response. Return it directly from a route to skip
+    FastAPI's jsonable_encoder pass; payloads may embed orjson.Fragment
+    values holding already-serialized upstream bodies.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def raw_json(raw: Optional[bytes], parsed: Any) -> Any:
+    """Embed pre-serialized JSON bytes as-is when we have them, else the parsed value."""
+    return orjson.Fragment(raw) if raw is not None else parsed
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    """One Server-Sent Events frame; data is JSON (orjson.Fragment allowed)."""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data, option=ORJSON_OPTIONS) + b"\n\n"
+
+
+def ndjson_line(data: Any) -> bytes:
+    return orjson.dumps(data, option=ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+
+
+STREAM_MEDIA_TYPES = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+# Keep proxies (nginx) from buffering the stream.
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def stream_frame(stream_format: str, event: str, data: Any) -> bytes:
+    """An event as an SSE frame or as an NDJSON {"event", "data"} line."""
+    if stream_format == "sse":
+        return sse_event(event, data)
+    return ndjson_line({"event": event, "data": data})
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    """Coding -> q-value from an Accept-Encoding header (q defaults to 1, malformed q is 0)."""
+    accepted: Dict[str, float] = {}
+    for part in header.split(","):
+        token, *params = part.split(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    quality = 0.0
+        accepted[token] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    The supported coding with the highest q-value (an unlisted coding takes
+    the q of "*"), br winning ties; None when every one is at q=0.
+    """
+    accepted = _accepted_encodings(accept_encoding)
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    best, best_quality = None, 0.0
+    for coding in supported:
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """
+    Negotiate br/gzip from Accept-Encoding for responses with a known
+    Content-Length at or above COMPRESSION_MIN_BYTES. Streaming responses
+    (SSE, NDJSON, no Content-Length) pass through untouched so events are
+    not held back by buffering.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        chunks: List[bytes] = []
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                if self._should_compress(message):
+                    start_message = message
+                else:
+                    await send(message)
+                return
+
+            if start_message is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body"):
+                return
+
+            compressed = compress(b"".join(chunks), encoding)
+            response_headers: List[Tuple[bytes, bytes]] = [
+                (k, v) for k, v in start_message.get("headers", [])
+                if k.lower() != b"content-length"
+            ]
+            response_headers.append((b"content-encoding", encoding.encode()))
+            response_headers.append((b"content-length", str(len(compressed)).encode()))
+            response_headers.append((b"vary", b"Accept-Encoding"))
+            await send({**start_message, "headers": response_headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _should_compress(self, start_message: Message) -> bool:
+        headers = {k.lower(): v for k, v in start_message.get("headers", [])}
+        if b"content-encoding" in headers:
+            return False
+        length = headers.get(b"content-length")
+        if length is None or not length.isdigit() or int(length) < self.minimum_size:
+            return False
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
@@ -1,10 +1,22 @@
+import asyncio
 import os
-import requests
+import time
 from urllib.parse import urlparse
 
+from services.disk_cache import get_disk_cache
+from services.http_client import request_with_retry
+from services.logging_config import elapsed_ms, get_logger, sampled_body
+from services.metrics import UPSTREAM_IN_FLIGHT, UPSTREAM_LATENCY, UPSTREAM_RESPONSE_SIZE, timed
+from services.response_cache import make_cache_key
+from services.singleflight import SingleFlight
+
 SERPAPI_URL = "https://serpapi.com/search"
+SERPAPI_CACHE_TTL = int(os.getenv("SERPAPI_CACHE_TTL", str(24 * 3600)))
+
+serpapi_flights = SingleFlight("serpapi")
+logger = get_logger("serpapi")
 
-def search_local_lenders(city: str, state: str, num: int = 20):
+async def search_local_lenders(city: str, state: str, num: int = 20):
     api_key = os.getenv("SERPAPI_KEY")
     if not api_key:
         raise RuntimeError("Missing SERPAPI_KEY")
@@ -13,10 +25,45 @@ def search_local_lenders(city: str, state: str, num: int = 20):
         "engine": "google_maps",
         "q": f"hard money lender {city} {state}",
         "type": "search",
-        "api_key": api_key,
     }
 
-    r = requests.get(SERPAPI_URL, params=params, timeout=15)
+    # Key on the query only — never the api_key
+    cache_key = make_cache_key("serpapi:search", {**params, "q": params["q"].lower()})
+    disk_cache = get_disk_cache()
+    if disk_cache is not None:
+        hit = await asyncio.to_thread(disk_cache.get, cache_key, "serpapi")
+        if hit is not None:
+            return hit[0][:num]
+
+    lenders = await serpapi_flights.do(
+        cache_key,
+        lambda: fetch_local_lenders(params, api_key, cache_key),
+    )
+    return lenders[:num]
+
+async def fetch_local_lenders(params, api_key: str, cache_key: str):
+    started = time.perf_counter()
+    with timed(UPSTREAM_LATENCY, UPSTREAM_IN_FLIGHT, upstream="serpapi", operation="google_maps"):
+        r = await request_with_retry(
+            "serpapi",
+            "GET",
+            SERPAPI_URL,
+            params={**params, "api_key": api_key},
+            timeout=15,
+        )
+    UPSTREAM_RESPONSE_SIZE.observe(len(r.content), upstream="serpapi", operation="google_maps")
+
+    log_fields = {
+        "upstream": "serpapi",
+        "query": params["q"],
+        "status": r.status_code,
+        "elapsed_ms": elapsed_ms(started),
+    }
+    body_sample = sampled_body(r.content)
+    if body_sample is not None:
+        log_fields["body_sample"] = body_sample
+    logger.info("serpapi call", extra={"fields": log_fields})
+
     r.raise_for_status()
     data = r.json()
 
@@ -43,7 +90,11 @@ def search_local_lenders(city: str, state: str, num: int = 20):
             "source": "serpapi_maps",
         })
 
-    return lenders[:num]
+    disk_cache = get_disk_cache()
+    if disk_cache is not None:
+        await asyncio.to_thread(disk_cache.set, cache_key, lenders, SERPAPI_CACHE_TTL, "serpapi")
+
+    return lenders
 
 def normalize_lenders(lenders):
     seen = set()
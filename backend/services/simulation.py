@@ -0,0 +1,183 @@
+import multiprocessing
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from services.irr import irr_batch
+
+# Monte Carlo deal simulation. Paths are generated in fixed-size chunks,
+# each with its own child of one SeedSequence, so a given seed produces the
+# same numbers whether the chunks run inline or on the process pool.
+
+SIMULATE_CHUNK_PATHS = int(os.getenv("SIMULATE_CHUNK_PATHS", "25000"))
+SIMULATE_WORKERS = int(os.getenv("SIMULATE_WORKERS", str(os.cpu_count() or 1)))
+
+PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _pool_context() -> multiprocessing.context.BaseContext:
+    # never plain fork: the pool starts inside a process that already runs
+    # the event loop and the log listener thread, and a forked child can
+    # inherit a lock some other thread held at fork time
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=SIMULATE_WORKERS, mp_context=_pool_context())
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def draw(rng: np.random.Generator, spec: Dict[str, Any], size: int) -> np.ndarray:
+    """
+    Sample a distribution spec:
+        {"kind": "fixed", "value"}
+        {"kind": "uniform", "low", "high"}
+        {"kind": "triangular", "low", "mode", "high"}
+        {"kind": "normal", "mean", "std", optional "low"/"high" clip}
+    """
+    kind = spec["kind"]
+    if kind == "fixed":
+        return np.full(size, float(spec["value"]))
+    if kind == "uniform":
+        return rng.uniform(spec["low"], spec["high"], size)
+    if kind == "triangular":
+        if spec["low"] == spec["high"]:
+            return np.full(size, float(spec["low"]))
+        return rng.triangular(spec["low"], spec["mode"], spec["high"], size)
+    if kind == "normal":
+        values = rng.normal(spec["mean"], spec["std"], size)
+        low, high = spec.get("low"), spec.get("high")
+        if low is not None or high is not None:
+            values = np.clip(values, low, high)
+        return values
+    raise ValueError(f"unknown distribution kind: {kind}")
+
+
+def range_distribution(point: Optional[float], low: Optional[float], high: Optional[float]) -> Optional[Dict[str, Any]]:
+    """
+    Triangular(low, point, high) from a RentCast estimate and its range;
+    the point estimate alone (fixed) when the range is missing.
+    """
+    if point is None:
+        return None
+    if low is None or high is None or not low <= point <= high:
+        return {"kind": "fixed", "value": point}
+    return {"kind": "triangular", "low": low, "mode": point, "high": high}
+
+
+def simulate_chunk(params: Dict[str, Any], seed: np.random.SeedSequence, paths: int) -> Dict[str, np.ndarray]:
+    """One chunk of paths. Module-level so the process pool can pickle it."""
+    rng = np.random.default_rng(seed)
+
+    arv = draw(rng, params["value"], paths)
+    rent = draw(rng, params["rent"], paths)
+    vacancy = np.clip(draw(rng, params["vacancy_rate"], paths), 0, 100) / 100
+    overrun = draw(rng, params["rehab_overrun_pct"], paths) / 100
+    hold = np.clip(np.rint(draw(rng, params["hold_months"], paths)), 1, params["max_hold_months"]).astype(int)
+
+    purchase = params["purchase_price"]
+    rehab = params["rehab_budget"] * (1 + overrun)
+    basis = purchase + rehab
+    noi = rent * 12 * (1 - vacancy) * (1 - params["expense_rate"] / 100)
+    proceeds = arv * (1 - params["sale_closing_cost_pct"] / 100)
+
+    periods = np.arange(hold.max() + 1)
+    flows = np.where((periods >= 1) & (periods <= hold[:, None]), (noi / 12)[:, None], 0.0)
+    flows[:, 0] = -basis
+    flows[np.arange(paths), hold] += proceeds
+
+    solved = irr_batch(flows, tolerance=1e-7, max_iterations=200)
+    monthly = np.where(solved["converged"], solved["rate"], np.nan)
+    with np.errstate(invalid="ignore"):
+        annualized = ((1 + monthly) ** 12 - 1) * 100
+
+    return {
+        "irr_annualized_percent": annualized,
+        "profit": flows.sum(axis=1),
+        "spread_to_arv": arv - basis,
+        "total_basis": basis,
+        "mao_70_rule": arv * 0.70 - rehab,
+        "hold_months": hold.astype(float),
+    }
+
+
+def _summary(values: np.ndarray, bins: int) -> Dict[str, Any]:
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return {"count": 0, "mean": None, "std": None, "percentiles": {}, "histogram": None}
+    counts, edges = np.histogram(finite, bins=bins)
+    return {
+        "count": int(finite.size),
+        "mean": round(float(finite.mean()), 4),
+        "std": round(float(finite.std()), 4),
+        "percentiles": {
+            f"p{p}": round(float(v), 4) for p, v in zip(PERCENTILES, np.percentile(finite, PERCENTILES))
+        },
+        "histogram": {"counts": counts.tolist(), "edges": np.round(edges, 4).tolist()},
+    }
+
+
+def run_simulation(
+    params: Dict[str, Any],
+    paths: int,
+    seed: Optional[int] = None,
+    parallel: bool = False,
+    bins: int = 20,
+    hurdle_irr_percent: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Draw `paths` deal outcomes and summarise them. Returns the seed used so
+    an unseeded run can be replayed exactly.
+    """
+    if seed is None:
+        seed = secrets.randbits(63)
+    root = np.random.SeedSequence(seed)
+    sizes = [SIMULATE_CHUNK_PATHS] * (paths // SIMULATE_CHUNK_PATHS)
+    if paths % SIMULATE_CHUNK_PATHS:
+        sizes.append(paths % SIMULATE_CHUNK_PATHS)
+    seeds = root.spawn(len(sizes))
+
+    if parallel and len(sizes) > 1:
+        chunks: List[Dict[str, np.ndarray]] = list(
+            get_pool().map(simulate_chunk, [params] * len(sizes), seeds, sizes)
+        )
+    else:
+        chunks = [simulate_chunk(params, s, n) for s, n in zip(seeds, sizes)]
+
+    outcomes = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+    irr = outcomes["irr_annualized_percent"]
+
+    probabilities = {
+        "loss": float(np.mean(outcomes["profit"] < 0)),
+        "negative_spread_to_arv": float(np.mean(outcomes["spread_to_arv"] < 0)),
+        "purchase_exceeds_mao": float(np.mean(params["purchase_price"] > outcomes["mao_70_rule"])),
+        "irr_undefined": float(np.mean(~np.isfinite(irr))),
+    }
+    if hurdle_irr_percent is not None:
+        with np.errstate(invalid="ignore"):
+            probabilities["irr_below_hurdle"] = float(np.mean(~(irr >= hurdle_irr_percent)))
+
+    return {
+        "paths": paths,
+        "seed": seed,
+        "chunks": len(sizes),
+        "parallel": parallel and len(sizes) > 1,
+        "probabilities": {name: round(p, 4) for name, p in probabilities.items()},
+        "outcomes": {name: _summary(values, bins) for name, values in outcomes.items() if name != "mao_70_rule"},
+    }
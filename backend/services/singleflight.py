@@ -0,0 +1,72 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable
+
+
+class SingleFlight:
+    """
+    Coalesce identical in-flight async calls.
+
+    The first caller for a key starts the work as a task; everyone arriving
+    while it runs awaits that same task. Waiters await through
+    asyncio.shield, so a waiter being cancelled (client disconnect, its own
+    deadline) never cancels the shared call for the others. Exceptions
+    propagate to every waiter.
+
+    A call nobody is waiting on any more keeps running (its result still
+    fills the cache) unless the caller knows the work is no longer wanted
+    and calls cancel_abandoned, e.g. when a streaming client disconnects.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+        self._waiters: Dict[str, int] = {}
+        self.started = 0
+        self.collapsed = 0
+        self.abandoned = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.started += 1
+        else:
+            self.collapsed += 1
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    def cancel_abandoned(self, keys: Iterable[str]) -> int:
+        """Cancel in-flight calls for these keys that no caller is awaiting any more."""
+        cancelled = 0
+        for key in keys:
+            task = self._inflight.get(key)
+            if task is not None and not task.done() and not self._waiters.get(key):
+                task.cancel()
+                cancelled += 1
+        self.abandoned += cancelled
+        return cancelled
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.started + self.collapsed
+        return {
+            "in_flight": len(self._inflight),
+            "upstream_calls": self.started,
+            "collapsed_calls": self.collapsed,
+            "abandoned_calls": self.abandoned,
+            "collapse_ratio": round(self.collapsed / total, 4) if total else None,
+        }
@@ -3,6 +3,10 @@ import stripe
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from main import supabase
+from services.logging_config import get_logger
+from services.metrics import UPSTREAM_LATENCY, timed
+
+logger = get_logger("stripe")
 
 router = APIRouter(prefix="/stripe", tags=["stripe"])
 
@@ -39,27 +43,32 @@ def create_checkout_session(data: CheckoutRequest):
         raise HTTPException(400, "Invalid plan")
 
     # ✅ Create Stripe customer
-    customer = stripe.Customer.create(
-        email=data.email,
-        metadata={"user_id": data.user_id}
-    )
+    with timed(UPSTREAM_LATENCY, upstream="stripe", operation="Customer.create"):
+        customer = stripe.Customer.create(
+            email=data.email,
+            metadata={"user_id": data.user_id}
+        )
 
     # ✅ Save customer ID to Supabase
-    supabase.table("profiles").update({
-        "stripe_customer_id": customer.id
-    }).eq("id", data.user_id).execute()
+    with timed(UPSTREAM_LATENCY, upstream="supabase", operation="profiles.update"):
+        supabase.table("profiles").update({
+            "stripe_customer_id": customer.id
+        }).eq("id", data.user_id).execute()
+
+    logger.info("stripe customer created", extra={"fields": {"user_id": data.user_id, "plan": data.plan}})
 
     # ✅ Attach customer to checkout
-    session = stripe.checkout.Session.create(
-        mode="subscription",
-        customer=customer.id,
-        line_items=[{
-            "price": PRICE_IDS[data.plan],
-            "quantity": 1,
-        }],
-        success_url=f"{FRONTEND_URL}/chat?success=true",
-        cancel_url=f"{FRONTEND_URL}/pricing-plans",
-    )
+    with timed(UPSTREAM_LATENCY, upstream="stripe", operation="checkout.Session.create"):
+        session = stripe.checkout.Session.create(
+            mode="subscription",
+            customer=customer.id,
+            line_items=[{
+                "price": PRICE_IDS[data.plan],
+                "quantity": 1,
+            }],
+            success_url=f"{FRONTEND_URL}/chat?success=true",
+            cancel_url=f"{FRONTEND_URL}/pricing-plans",
+        )
 
     return {"url": session.url}
 
@@ -71,13 +80,13 @@ def create_portal_session(data: PortalRequest):
         raise HTTPException(400, "Missing customer_id")
 
     try:
-        session = stripe.billing_portal.Session.create(
-            customer=data.customer_id,
-            return_url=f"{FRONTEND_URL}/pricing-plans",
-        )
+        with timed(UPSTREAM_LATENCY, upstream="stripe", operation="billing_portal.Session.create"):
+            session = stripe.billing_portal.Session.create(
+                customer=data.customer_id,
+                return_url=f"{FRONTEND_URL}/pricing-plans",
+            )
         return {"url": session.url}
 
     except Exception:
-        import traceback
-        traceback.print_exc()
+        logger.exception("stripe billing portal error", extra={"fields": {"customer_id": data.customer_id}})
         raise HTTPException(500, "Stripe billing portal error")
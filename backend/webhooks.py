@@ -2,6 +2,10 @@ import os
 import stripe
 from fastapi import APIRouter, Request, HTTPException
 from main import supabase
+from services.logging_config import get_logger
+from services.metrics import UPSTREAM_LATENCY, timed
+
+logger = get_logger("webhooks")
 
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
@@ -28,12 +32,15 @@ async def stripe_webhook(request: Request):
     sig_header = request.headers.get("stripe-signature")
 
     try:
-        event = stripe.Webhook.construct_event(payload, sig_header, WEBHOOK_SECRET)
+        with timed(UPSTREAM_LATENCY, upstream="stripe", operation="Webhook.construct_event"):
+            event = stripe.Webhook.construct_event(payload, sig_header, WEBHOOK_SECRET)
     except Exception as e:
+        logger.warning("stripe webhook rejected", extra={"fields": {"error": str(e)}})
         raise HTTPException(status_code=400, detail=str(e))
 
     event_type = event["type"]
     obj = event["data"]["object"]
+    logger.info("stripe webhook received", extra={"fields": {"event_type": event_type, "event_id": event.get("id")}})
 
     if event_type == "checkout.session.completed":
         await handle_checkout_completed(obj)
@@ -55,45 +62,53 @@ async def handle_checkout_completed(session):
 
     # 1️⃣ Try user_id first
     if user_id:
-        profile = (
-            supabase.table("profiles")
-            .select("id")
-            .eq("id", user_id)
-            .single()
-            .execute()
-        ).data
+        with timed(UPSTREAM_LATENCY, upstream="supabase", operation="profiles.select"):
+            profile = (
+                supabase.table("profiles")
+                .select("id")
+                .eq("id", user_id)
+                .single()
+                .execute()
+            ).data
     else:
         # 2️⃣ Fallback to email
-        profile = (
-            supabase.table("profiles")
-            .select("id")
-            .eq("email", email)
-            .single()
-            .execute()
-        ).data
+        with timed(UPSTREAM_LATENCY, upstream="supabase", operation="profiles.select"):
+            profile = (
+                supabase.table("profiles")
+                .select("id")
+                .eq("email", email)
+                .single()
+                .execute()
+            ).data
 
     if not profile:
+        logger.warning("checkout completed for unknown profile", extra={"fields": {
+            "customer_id": customer_id, "user_id": user_id,
+        }})
         return
 
-    supabase.table("profiles").update({
-        "stripe_customer_id": customer_id,
-        "stripe_subscription_id": subscription_id,
-    }).eq("id", profile["id"]).execute()
+    with timed(UPSTREAM_LATENCY, upstream="supabase", operation="profiles.update"):
+        supabase.table("profiles").update({
+            "stripe_customer_id": customer_id,
+            "stripe_subscription_id": subscription_id,
+        }).eq("id", profile["id"]).execute()
 
-    subscription = stripe.Subscription.retrieve(subscription_id)
+    with timed(UPSTREAM_LATENCY, upstream="stripe", operation="Subscription.retrieve"):
+        subscription = stripe.Subscription.retrieve(subscription_id)
     await apply_plan(profile["id"], subscription)
 
 
 async def handle_subscription_update(subscription):
     customer_id = subscription.get("customer")
 
-    profile = (
-        supabase.table("profiles")
-        .select("id")
-        .eq("stripe_customer_id", customer_id)
-        .single()
-        .execute()
-    ).data
+    with timed(UPSTREAM_LATENCY, upstream="supabase", operation="profiles.select"):
+        profile = (
+            supabase.table("profiles")
+            .select("id")
+            .eq("stripe_customer_id", customer_id)
+            .single()
+            .execute()
+        ).data
 
     if profile:
         await apply_plan(profile["id"], subscription)
@@ -104,29 +119,33 @@ async def apply_plan(user_id, subscription):
     plan_info = PRICE_TO_PLAN.get(price_id)
 
     if not plan_info:
+        logger.warning("subscription price not mapped to a plan", extra={"fields": {"price_id": price_id}})
         return
 
-    supabase.table("profiles").update({
-        "plan": plan_info["plan"],
-        "credits_remaining": plan_info["monthly_credits"],
-        "stripe_subscription_id": subscription["id"],
-    }).eq("id", user_id).execute()
+    with timed(UPSTREAM_LATENCY, upstream="supabase", operation="profiles.update"):
+        supabase.table("profiles").update({
+            "plan": plan_info["plan"],
+            "credits_remaining": plan_info["monthly_credits"],
+            "stripe_subscription_id": subscription["id"],
+        }).eq("id", user_id).execute()
 
 
 async def handle_subscription_canceled(subscription):
     customer_id = subscription.get("customer")
 
-    profile = (
-        supabase.table("profiles")
-        .select("id")
-        .eq("stripe_customer_id", customer_id)
-        .single()
-        .execute()
-    ).data
+    with timed(UPSTREAM_LATENCY, upstream="supabase", operation="profiles.select"):
+        profile = (
+            supabase.table("profiles")
+            .select("id")
+            .eq("stripe_customer_id", customer_id)
+            .single()
+            .execute()
+        ).data
 
     if profile:
-        supabase.table("profiles").update({
-            "plan": "free",
-            "credits_remaining": 10,
-            "stripe_subscription_id": None,
-        }).eq("id", profile["id"]).execute()
+        with timed(UPSTREAM_LATENCY, upstream="supabase", operation="profiles.update"):
+            supabase.table("profiles").update({
+                "plan": "free",
+                "credits_remaining": 10,
+                "stripe_subscription_id": None,
+            }).eq("id", profile["id"]).execute()